@@ -3,6 +3,16 @@ ASGI config for internship project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live message stream (jobportal.views.events_stream) is an async
+view and should be served from here (uvicorn is in requirements.txt):
+
+    WEB_CONCURRENCY=4 gunicorn internship.asgi:application -k uvicorn.workers.UvicornWorker
+
+More than one worker needs the Redis broker (set REDIS_URL, see
+jobportal/realtime.py); give the worker count through WEB_CONCURRENCY so
+startup can refuse the in-process broker instead of silently dropping
+events between workers.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -14,3 +24,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'internship.settings')
 
 application = get_asgi_application()
+
+from jobportal.realtime import check_workers  # noqa: E402  (needs the app registry)
+
+check_workers()
@@ -165,6 +165,26 @@ DATABASES = {
     )
 }
 
+# Cache shared by every worker process (gunicorn runs several). Suggestions,
+# unread badges and sidebar stats are dropped from it by signals, so a cache
+# local to one process (Django's default LocMemCache) would leave the other
+# workers serving stale values. Redis when REDIS_URL is set (needs the redis
+# package), otherwise a table in the main database (created by migration 0028).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'jobportal_cache',
+        }
+    }
+
 # Security: Log user out when they close the browser
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
@@ -221,4 +241,75 @@ LOCALE_PATHS = [
 ]
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Home feed: posts per page (first page is server-rendered, the rest load on scroll)
+FEED_PAGE_SIZE = 10
+
+# Home timelines: authors with more readers than this are merged in at read
+# time instead of being copied into every reader's timeline
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Post impressions are buffered in memory and written in bulk: every N
+# seconds, or as soon as the buffer holds this many distinct posts
+IMPRESSION_FLUSH_INTERVAL = 10
+IMPRESSION_BUFFER_SIZE = 1000
+
+# Job page views use the same write-behind buffer (and feed JobViewDaily)
+JOB_VIEW_FLUSH_INTERVAL = 10
+JOB_VIEW_BUFFER_SIZE = 1000
+
+# Job alert outbox (`manage.py send_outbox`): SMTP sending ceiling
+EMAIL_SEND_RATE_PER_MINUTE = 60
+
+# Search page: results per tab page, and the cap on ranked matches / counts
+SEARCH_PAGE_SIZE = 10
+SEARCH_MAX_RESULTS = 2000
+
+# People typeahead index: rebuilt in the background after this many seconds
+# (picks up profile changes saved by other worker processes)
+TYPEAHEAD_MAX_AGE = 300
+
+# Seconds before the in-memory job / candidate skill matrices used for match scores are rebuilt
+MATCH_MATRIX_MAX_AGE = 300
+
+# Employer applicant list: applications per page
+APPLICANTS_PAGE_SIZE = 25
+
+# Similar jobs: neighbours stored per job, and how often (seconds) the
+# in-memory TF-IDF index used for incremental updates is rebuilt
+SIMILAR_JOBS_K = 10
+SIMILAR_JOBS_INDEX_MAX_AGE = 3600
+
+# "People you may know": how long (seconds) a user's ranked suggestions are
+# cached (in the shared cache above); accepted connections patch the cached
+# lists in place
+SUGGESTIONS_TTL = 24 * 3600
+
+# Connections page size (keyset pages, see connections_list_view)
+CONNECTIONS_PAGE_SIZE = 50
+
+# Connection degree badges: how often (seconds) the in-memory adjacency
+# list is reloaded, and how long a viewer's degrees are cached
+GRAPH_INDEX_MAX_AGE = 300
+DEGREE_CACHE_TTL = 60
+
+# Conversations per inbox page (keyset pages on ThreadMembership)
+INBOX_PAGE_SIZE = 20
+
+# Messages per page of a conversation (newest page first, then "load older")
+MESSAGE_PAGE_SIZE = 30
+
+# Seconds a user's unread-message total (navbar badge) stays in the shared
+# cache (dropped whenever one of their unread counts changes anyway)
+UNREAD_TOTAL_TTL = 3600
+
+# Seconds a user's sidebar / dashboard counts stay in the shared cache
+# (dropped on every Application or SavedJob change anyway)
+USER_STATS_TTL = 3600
+
+# Real-time events (server-sent events, see jobportal/realtime.py).
+# 'local' keeps subscribers in-process and only works with one worker;
+# 'redis' is required with several, and is the default when REDIS_URL is set.
+REALTIME_BROKER = os.environ.get('REALTIME_BROKER', 'redis' if os.environ.get('REDIS_URL') else 'local')
+REALTIME_REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+REALTIME_KEEPALIVE = 25
@@ -7,7 +7,7 @@ from .models import (
     Job, Company, UserProfile, Post, Experience, Education,
     Certification, Application, ConnectionRequest,
     Message, MessageThread, SavedJob,
-    CandidateUser, EmployerUser
+    CandidateUser, EmployerUser, Skill, SkillAlias
 )
 
 # 1. Unregister Groups (Optional: Hides "Groups" from Authentication section)
@@ -61,4 +61,16 @@ admin.site.register(Education)
 admin.site.register(Application)
 admin.site.register(Certification)
 admin.site.register(ConnectionRequest)
-admin.site.register(SavedJob)
\ No newline at end of file
+admin.site.register(SavedJob)
+
+
+# Canonical skills: aliases ("js" -> javascript) are edited on the skill page
+class SkillAliasInline(admin.TabularInline):
+    model = SkillAlias
+    extra = 1
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name', 'aliases__alias')
+    inlines = [SkillAliasInline]
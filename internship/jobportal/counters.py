@@ -0,0 +1,161 @@
+"""
+Write-behind counters.
+
+Hot counters (post impressions, job views) are not written on every hit.
+Increments are summed in a process-local buffer and flushed periodically as
+a few bulk statements of the form
+
+    UPDATE ... SET field = field + CASE WHEN id = 1 THEN 3 WHEN id = 7 THEN 1 ... END
+    WHERE id IN (1, 7, ...)
+
+Every buffer is flushed one last time when the process exits.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from .models import Job, JobViewDaily, Post
+
+logger = logging.getLogger(__name__)
+
+# Max ids per UPDATE ... CASE statement
+FLUSH_BATCH_SIZE = 500
+
+
+def bulk_increment(model, field, counts, batch_size=FLUSH_BATCH_SIZE):
+    """
+    Adds counts[pk] to `field` for every pk, using one UPDATE per batch.
+    """
+    items = list(counts.items())
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        delta = Case(
+            *[When(pk=pk, then=Value(amount)) for pk, amount in batch],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        model.objects.filter(pk__in=[pk for pk, _ in batch]).update(**{field: F(field) + delta})
+
+
+class CounterBuffer:
+    """
+    Process-local buffer of pending increments for one counter column.
+    Flushed when it holds `max_size` distinct rows, every `flush_interval`
+    seconds by a background thread, and at interpreter shutdown.
+    """
+
+    def __init__(self, model, field, flush_interval=10, max_size=1000):
+        self.model = model
+        self.field = field
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def add(self, pks):
+        """Counts one hit for each pk in `pks` (repeats count more than once)."""
+        with self._lock:
+            self._pending.update(pks)
+            full = len(self._pending) >= self.max_size
+        self._start_flusher()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Writes everything buffered so far. Returns the number of rows touched."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+
+        try:
+            with transaction.atomic():
+                self.write(pending)
+        except Exception:
+            logger.exception("Flushing %s.%s failed, keeping counts for the next flush",
+                             self.model.__name__, self.field)
+            with self._lock:
+                self._pending.update(pending)
+            return 0
+        return len(pending)
+
+    def write(self, pending):
+        """Persists a {pk: count} batch. Subclasses can write extra tables."""
+        bulk_increment(self.model, self.field, pending)
+
+    def _start_flusher(self):
+        # Started lazily so management commands and migrations never spawn it
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True,
+                                                name=f"{self.model.__name__}.{self.field} flusher")
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            close_old_connections()
+            self.flush()
+
+
+class JobViewBuffer(CounterBuffer):
+    """
+    Job page views. Buffered per (job, day) so a flush can bump Job.views and
+    the matching JobViewDaily rollup rows together.
+    """
+
+    def add_view(self, job_id):
+        self.add([(job_id, timezone.localdate())])
+
+    def write(self, pending):
+        # Views of jobs deleted since would fail the rollup's foreign key
+        # and with it the whole flush; they are dropped
+        job_ids = {job_id for job_id, _ in pending}
+        existing = set(Job.objects.filter(id__in=job_ids).values_list('id', flat=True))
+        pending = {key: count for key, count in pending.items() if key[0] in existing}
+
+        per_job = Counter()
+        for (job_id, _), count in pending.items():
+            per_job[job_id] += count
+        bulk_increment(Job, 'views', per_job)
+
+        # Make sure every (job, date) row exists, then add to it like any counter.
+        # ignore_conflicts keeps this safe when several workers flush the same day.
+        JobViewDaily.objects.bulk_create(
+            [JobViewDaily(job_id=job_id, date=date) for job_id, date in pending],
+            batch_size=FLUSH_BATCH_SIZE, ignore_conflicts=True,
+        )
+        row_ids = {
+            (job_id, date): pk
+            for pk, job_id, date in JobViewDaily.objects.filter(
+                job_id__in=per_job.keys(), date__in={date for _, date in pending}
+            ).values_list('id', 'job_id', 'date')
+        }
+        bulk_increment(JobViewDaily, 'views', {
+            row_ids[key]: count for key, count in pending.items() if key in row_ids
+        })
+
+
+post_impressions = CounterBuffer(
+    Post, 'impressions_count',
+    flush_interval=getattr(settings, 'IMPRESSION_FLUSH_INTERVAL', 10),
+    max_size=getattr(settings, 'IMPRESSION_BUFFER_SIZE', 1000),
+)
+
+job_views = JobViewBuffer(
+    Job, 'views',
+    flush_interval=getattr(settings, 'JOB_VIEW_FLUSH_INTERVAL', 10),
+    max_size=getattr(settings, 'JOB_VIEW_BUFFER_SIZE', 1000),
+)
@@ -0,0 +1,118 @@
+"""
+Process-local row indexes in CSR form.
+
+A RowIndex loads every (owner, value) row of one table into NumPy arrays,
+sorted and grouped by owner:
+
+    owner_ids[i]                                   an owner
+    values[starts[i]:starts[i] + counts[i]]        its values
+
+so the values of any list of owners come back in one gather, with no
+Python loop per owner. matching.SkillMatrix (job or candidate -> skill
+ids) and graph.AdjacencyIndex (user -> friend ids) are both RowIndexes.
+
+The arrays are built lazily. Owners marked dirty (their rows changed in
+this process) are read from the database until the next rebuild, which
+happens at most every REBUILD_INTERVAL seconds; the whole index is also
+reloaded after `max_age` seconds so changes saved by other processes show
+up.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+# Minimum seconds between rebuilds caused by local changes
+REBUILD_INTERVAL = 10
+
+
+class RowIndex:
+    """
+    The `value_field` of every `model` row, grouped by `owner_field`.
+    Both fields must hold integer ids.
+    """
+
+    def __init__(self, model, owner_field, value_field, max_age=300):
+        self.model = model
+        self.owner_field = owner_field
+        self.value_field = value_field
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._data = None
+        self._built_at = None
+        self._stale = set()
+
+    @staticmethod
+    def build_arrays(pairs):
+        """
+        (owner_ids, starts, counts, values) from an (n, 2) array of
+        (owner_id, value) rows sorted by owner_id.
+        """
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        owner_ids, starts, counts = np.unique(pairs[:, 0], return_index=True, return_counts=True)
+        return owner_ids, starts, counts, pairs[:, 1].copy()
+
+    def _rows(self):
+        return self.model.objects.values_list(self.owner_field, self.value_field)
+
+    def build(self):
+        """Loads every row in one query."""
+        stale = set(self._stale)
+        data = self.build_arrays(list(self._rows().order_by(self.owner_field)))
+        with self._lock:
+            self._data = data
+            self._built_at = time.monotonic()
+            self._stale -= stale
+
+    def mark_dirty(self, owner_id):
+        """`owner_id`'s rows changed; read them from the database until the next rebuild."""
+        self._stale.add(owner_id)
+
+    def _ensure_fresh(self):
+        if self._built_at is None:
+            self.build()
+            return
+        age = time.monotonic() - self._built_at
+        if age > self.max_age or (self._stale and age > REBUILD_INTERVAL):
+            self.build()
+
+    def segments(self, owner_ids):
+        """
+        The values of `owner_ids` (which may repeat), flattened:
+        (rows, values) where rows[k] is the position in `owner_ids`
+        that values[k] belongs to.
+        """
+        self._ensure_fresh()
+        with self._lock:
+            all_ids, starts, counts, values = self._data
+            stale = np.fromiter(self._stale, dtype=np.int64, count=len(self._stale))
+
+        owner_ids = np.asarray(owner_ids, dtype=np.int64)
+        dirty = np.isin(owner_ids, stale)
+        lengths = np.zeros(len(owner_ids), dtype=np.int64)
+        first = np.zeros(len(owner_ids), dtype=np.int64)
+        if len(all_ids):
+            position = np.searchsorted(all_ids, owner_ids).clip(max=len(all_ids) - 1)
+            found = (all_ids[position] == owner_ids) & ~dirty
+            lengths[found] = counts[position[found]]
+            first[found] = starts[position[found]]
+
+        # Every owner's slice first .. first + length, in one gather
+        rows = np.repeat(np.arange(len(owner_ids)), lengths)
+        offsets = np.repeat(first - (np.cumsum(lengths) - lengths), lengths) + np.arange(len(rows))
+        flat = values[offsets]
+
+        if dirty.any():
+            positions = {}
+            for i in np.flatnonzero(dirty).tolist():
+                positions.setdefault(int(owner_ids[i]), []).append(i)
+            extra = [
+                (i, value)
+                for owner_id, value in self._rows().filter(**{f'{self.owner_field}__in': list(positions)})
+                for i in positions[owner_id]
+            ]
+            extra = np.array(extra, dtype=np.int64).reshape(-1, 2)
+            rows = np.concatenate([rows, extra[:, 0]])
+            flat = np.concatenate([flat, extra[:, 1]])
+        return rows, flat
@@ -0,0 +1,253 @@
+"""
+Job alert digests (`manage.py send_job_alerts`).
+
+Each run:
+
+1. takes the run lock on the JobAlertWatermark row, so overlapping cron
+   runs cannot both send,
+2. reads the jobs created since the watermark in one query and indexes
+   them in memory by token,
+3. streams every JobAlert past that index (a few set intersections per
+   alert, same matching rules as percolator.py),
+4. sends each user one digest with all of their new matches and records
+   every (user, job) pair in JobAlertDelivery, so a rerun never resends,
+5. moves the watermark forward only when every digest went out; otherwise
+   the next run scans the same jobs again and skips what was delivered.
+
+Users can be split over several processes: worker i of n handles the
+users with user_id % n == i.
+
+The instant alert emails of outbox.py write the same JobAlertDelivery
+rows, so a job a user was already emailed about never shows up in their
+digest too: the digest only carries matches the outbox did not deliver
+(rows that failed, or jobs posted while the outbox was not running).
+"""
+
+import logging
+import multiprocessing
+import smtplib
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from .models import Job, JobAlert, JobAlertDelivery, JobAlertWatermark
+from .outbox import FROM_EMAIL, RateLimiter, get_recipients
+from .percolator import alert_terms, job_terms
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = 'job_alert_digest'
+
+# With no watermark yet, start from jobs of the last day (the old behaviour)
+FIRST_RUN_WINDOW = timedelta(days=1)
+
+# Re-read a little before the watermark to catch jobs whose transaction
+# committed late; JobAlertDelivery filters out the ones already sent
+OVERLAP = timedelta(minutes=5)
+
+# A run holding the lock longer than this is assumed dead
+LOCK_TIMEOUT = timedelta(hours=1)
+
+# Recipients fetched per query
+USER_BATCH_SIZE = 500
+
+
+class DigestLocked(Exception):
+    """Another send_job_alerts run is in progress."""
+
+
+def acquire_run(now):
+    """Takes the run lock and returns the watermark row."""
+    state, _ = JobAlertWatermark.objects.get_or_create(name=WATERMARK_NAME)
+    won = JobAlertWatermark.objects.filter(pk=state.pk).filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+    ).update(locked_until=now + LOCK_TIMEOUT)
+    if not won:
+        raise DigestLocked(f"Locked until {state.locked_until}")
+    state.refresh_from_db()
+    return state
+
+
+def release_run(state, now, watermark=None):
+    fields = {'locked_until': None, 'last_run_at': now}
+    if watermark is not None:
+        fields['watermark'] = watermark
+    JobAlertWatermark.objects.filter(pk=state.pk).update(**fields)
+
+
+class JobIndex:
+    """Token -> job ids, over the (small) batch of new jobs of one run."""
+
+    def __init__(self, jobs):
+        self.jobs = {job.id: job for job in jobs}
+        self.postings = defaultdict(set)
+        for job in jobs:
+            words, places = job_terms(job)
+            for word in words:
+                self.postings[('keyword', word)].add(job.id)
+            for place in places:
+                self.postings[('location', place)].add(job.id)
+
+    def match(self, terms):
+        """Ids of the jobs that contain every (kind, term) in `terms`."""
+        if not terms:
+            return set()
+        postings = sorted((self.postings.get(term, set()) for term in terms), key=len)
+        matched = set(postings[0])
+        for posting in postings[1:]:
+            if not matched:
+                break
+            matched &= posting
+        return matched
+
+
+def match_partition(index, worker=0, workers=1):
+    """
+    {user_id: {job_id: [alert keywords]}} for the users of one partition.
+    Alerts are streamed in user order, never loaded all at once.
+    """
+    alerts = JobAlert.objects.only('id', 'user_id', 'keyword', 'location')
+    if workers > 1:
+        alerts = alerts.annotate(bucket=Mod('user_id', workers)).filter(bucket=worker)
+
+    matches = {}
+    for user_id, user_alerts in groupby(alerts.order_by('user_id', 'id').iterator(chunk_size=2000),
+                                        key=lambda alert: alert.user_id):
+        found = defaultdict(list)
+        for alert in user_alerts:
+            for job_id in index.match(alert_terms(alert)):
+                found[job_id].append(alert.keyword)
+        if found:
+            matches[user_id] = found
+    return matches
+
+
+def build_digest_email(user, jobs, keywords):
+    job_list = "\n".join([f"- {job.title} at {job.company_name} in {job.location}" for job in jobs])
+    keyword_list = "', '".join(keywords)
+
+    subject = f"New job matches for '{keyword_list}'"
+    message = f"""
+Hello {user.username},
+
+We found new job opportunities matching your alert for '{keyword_list}':
+
+{job_list}
+
+Check them out on our platform!
+
+Best regards,
+Job Portal Team
+"""
+    return EmailMessage(subject, message, FROM_EMAIL, [user.email])
+
+
+def _undelivered(user, found):
+    """`found` ({job_id: keywords}) without the jobs `user` has been emailed about."""
+    delivered = set(JobAlertDelivery.objects.filter(user=user, job_id__in=found).values_list('job_id', flat=True))
+    return {job_id: keywords for job_id, keywords in found.items() if job_id not in delivered}
+
+
+def send_partition(since, until, worker=0, workers=1, per_minute=None):
+    """
+    Matches and mails the users of one partition.
+    Returns (jobs scanned, digests sent, digests failed).
+    """
+    jobs = list(Job.objects.filter(created_at__gt=since, created_at__lte=until).order_by('created_at', 'id'))
+    if not jobs:
+        return 0, 0, 0
+
+    index = JobIndex(jobs)
+    matches = match_partition(index, worker, workers)
+
+    # Drop what earlier (or overlapping) runs already delivered
+    for user_id, job_id in JobAlertDelivery.objects.filter(
+        job_id__in=index.jobs, user_id__in=matches
+    ).values_list('user_id', 'job_id'):
+        matches[user_id].pop(job_id, None)
+    matches = {user_id: found for user_id, found in matches.items() if found}
+
+    if per_minute is None:
+        per_minute = getattr(settings, 'EMAIL_SEND_RATE_PER_MINUTE', 60)
+    limiter = RateLimiter(max(per_minute // workers, 1) if per_minute else 0)
+    connection = get_connection()
+    sent = failed = 0
+
+    user_ids = sorted(matches)
+    try:
+        connection.open()
+        for start in range(0, len(user_ids), USER_BATCH_SIZE):
+            for user in get_recipients(user_ids[start:start + USER_BATCH_SIZE]):
+                found = matches[user.id]
+
+                limiter.wait()
+                try:
+                    # Delivery rows roll back if the email could not be sent
+                    with transaction.atomic():
+                        # The outbox (or an overlapping run) may have sent some
+                        # of these jobs since the matches were read
+                        found = _undelivered(user, found)
+                        if not found:
+                            continue
+                        digest_jobs = [index.jobs[job_id] for job_id in sorted(found)]
+                        keywords = sorted({keyword for keywords in found.values() for keyword in keywords})
+                        JobAlertDelivery.objects.bulk_create(
+                            [JobAlertDelivery(user=user, job=job) for job in digest_jobs], ignore_conflicts=True
+                        )
+                        connection.send_messages([build_digest_email(user, digest_jobs, keywords)])
+                    sent += 1
+                except smtplib.SMTPRecipientsRefused:
+                    # Bad address, retrying will not help
+                    pass
+                except Exception:
+                    logger.exception("Job alert digest to %s failed", user.email)
+                    failed += 1
+    finally:
+        connection.close()
+    return len(jobs), sent, failed
+
+
+def _send_partition_in_worker(*args):
+    # Forked children must not share the parent's database connection
+    connections.close_all()
+    try:
+        return send_partition(*args)
+    finally:
+        connections.close_all()
+
+
+def run_digest(workers=1, per_minute=None, now=None):
+    """
+    One digest run. Returns (jobs scanned, digests sent, digests failed).
+    Raises DigestLocked if another run holds the lock.
+    """
+    now = now or timezone.now()
+    state = acquire_run(now)
+    since = state.watermark - OVERLAP if state.watermark else now - FIRST_RUN_WINDOW
+
+    try:
+        if workers > 1:
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                results = pool.starmap(
+                    _send_partition_in_worker,
+                    [(since, now, worker, workers, per_minute) for worker in range(workers)],
+                )
+        else:
+            results = [send_partition(since, now, per_minute=per_minute)]
+    except BaseException:
+        release_run(state, now)
+        raise
+
+    jobs = max(result[0] for result in results)
+    sent = sum(result[1] for result in results)
+    failed = sum(result[2] for result in results)
+    release_run(state, now, watermark=None if failed else now)
+    return jobs, sent, failed
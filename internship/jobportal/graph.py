@@ -0,0 +1,247 @@
+"""
+The connection graph.
+
+An accepted ConnectionRequest is stored once, as sender -> receiver, so
+"who is X connected to" needs Q(sender=X) | Q(receiver=X): two index scans
+OR-ed together. ConnectionEdge holds both directions of every accepted
+connection, which makes degree counts and connection lists single lookups
+on the (user, friend) index.
+
+Edges are written in the same transaction as the request (signals in
+models.py). `manage.py backfill_connection_edges` rebuilds them from the
+requests, and can first fold in the legacy Connection rows and
+UserProfile.connections links.
+
+Degree badges (1st / 2nd / 3rd) come from a bidirectional BFS, capped at
+MAX_DEGREE hops, over a process-local adjacency list in CSR form
+(csr.RowIndex, the same structure as matching.SkillMatrix):
+
+    user_ids[i]                                     a user
+    friend_ids[starts[i]:starts[i] + counts[i]]     their connections
+
+Users whose connections changed in this process are read from the
+database until the next rebuild, and the whole list is reloaded every
+GRAPH_INDEX_MAX_AGE seconds. A viewer's degrees are cached for DEGREE_CACHE_TTL seconds.
+"""
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .csr import RowIndex
+from .models import Connection, ConnectionEdge, ConnectionRequest, UserProfile
+
+BATCH_SIZE = 5000
+
+# Degrees beyond this are shown as "out of network"
+MAX_DEGREE = 3
+
+DEGREE_CACHE_TTL = getattr(settings, 'DEGREE_CACHE_TTL', 60)
+
+# Backward BFS nodes are packed as target index * PACK + user id
+# (fits int64 for user ids below 2**40 and up to 2**23 targets)
+PACK = 1 << 40
+
+
+def connection_ids(user_id):
+    """Ids of `user_id`'s connections."""
+    return set(ConnectionEdge.objects.filter(user_id=user_id).values_list('friend_id', flat=True))
+
+
+def connection_count(user_id):
+    return ConnectionEdge.objects.filter(user_id=user_id).count()
+
+
+def add_connection(user_id, other_id, created_at=None):
+    """Stores both directions of a new connection."""
+    created_at = created_at or timezone.now()
+    names = {pk: (first, last) for pk, first, last in
+             User.objects.filter(id__in=[user_id, other_id]).values_list('id', 'first_name', 'last_name')}
+    with transaction.atomic():
+        ConnectionEdge.objects.bulk_create(
+            [_edge(ConnectionEdge, user_id, other_id, created_at, *names.get(other_id, ('', ''))),
+             _edge(ConnectionEdge, other_id, user_id, created_at, *names.get(user_id, ('', '')))],
+            ignore_conflicts=True,
+        )
+    _changed(user_id, other_id)
+
+
+def _edge(model, user_id, friend_id, created_at, first_name, last_name):
+    return model(user_id=user_id, friend_id=friend_id, created_at=created_at,
+                 friend_first_name=first_name, friend_last_name=last_name)
+
+
+def remove_connection(user_id, other_id):
+    """Drops both directions, unless another accepted request still links the two."""
+    with transaction.atomic():
+        still_connected = ConnectionRequest.objects.filter(
+            Q(sender_id=user_id, receiver_id=other_id) | Q(sender_id=other_id, receiver_id=user_id),
+            status='accepted',
+        ).exists()
+        if not still_connected:
+            ConnectionEdge.objects.filter(
+                Q(user_id=user_id, friend_id=other_id) | Q(user_id=other_id, friend_id=user_id)
+            ).delete()
+    _changed(user_id, other_id)
+
+
+def rebuild_edges():
+    """Rewrites every edge from the accepted requests. Returns the number of connections."""
+    seen, batch = set(), []
+    with transaction.atomic():
+        ConnectionEdge.objects.all().delete()
+        rows = ConnectionRequest.objects.filter(status='accepted').order_by('timestamp').values_list(
+            'sender_id', 'receiver_id', 'timestamp',
+            'sender__first_name', 'sender__last_name', 'receiver__first_name', 'receiver__last_name',
+        )
+        for sender_id, receiver_id, connected_at, sender_first, sender_last, receiver_first, receiver_last in rows.iterator():
+            pair = (min(sender_id, receiver_id), max(sender_id, receiver_id))
+            if sender_id == receiver_id or pair in seen:
+                continue
+            seen.add(pair)
+            batch.append(_edge(ConnectionEdge, sender_id, receiver_id, connected_at, receiver_first, receiver_last))
+            batch.append(_edge(ConnectionEdge, receiver_id, sender_id, connected_at, sender_first, sender_last))
+            if len(batch) >= BATCH_SIZE:
+                ConnectionEdge.objects.bulk_create(batch)
+                batch = []
+        ConnectionEdge.objects.bulk_create(batch)
+    return len(seen)
+
+
+def import_legacy_connections():
+    """
+    Turns accepted Connection rows and UserProfile.connections links into
+    accepted ConnectionRequests, for pairs that have no request yet.
+    Returns the number of requests created.
+    """
+    pairs = {}
+    for sender_id, receiver_id, created_at in Connection.objects.filter(
+        status='accepted'
+    ).values_list('sender_id', 'receiver_id', 'created_at'):
+        pairs.setdefault((sender_id, receiver_id), created_at)
+
+    through = UserProfile.connections.through
+    for sender_id, receiver_id in through.objects.values_list('from_userprofile__user_id', 'to_userprofile__user_id'):
+        pairs.setdefault((sender_id, receiver_id), None)
+
+    existing = set()
+    for sender_id, receiver_id in ConnectionRequest.objects.values_list('sender_id', 'receiver_id'):
+        existing.add((min(sender_id, receiver_id), max(sender_id, receiver_id)))
+
+    created = []
+    for (sender_id, receiver_id), created_at in pairs.items():
+        pair = (min(sender_id, receiver_id), max(sender_id, receiver_id))
+        if sender_id == receiver_id or pair in existing:
+            continue
+        existing.add(pair)
+        created.append((sender_id, receiver_id, created_at))
+
+    with transaction.atomic():
+        # bulk_create skips the edge signals; rebuild_edges() runs afterwards
+        requests = ConnectionRequest.objects.bulk_create(
+            [ConnectionRequest(sender_id=sender_id, receiver_id=receiver_id, status='accepted')
+             for sender_id, receiver_id, _ in created],
+            batch_size=BATCH_SIZE,
+        )
+        # auto_now_add overwrote the original dates
+        for (sender_id, receiver_id, created_at) in created:
+            if created_at:
+                ConnectionRequest.objects.filter(sender_id=sender_id, receiver_id=receiver_id).update(
+                    created_at=created_at, timestamp=created_at
+                )
+    return len(requests)
+
+
+class AdjacencyIndex(RowIndex):
+    """Every user's connections (friend ids), read from ConnectionEdge."""
+
+    def __init__(self, max_age=300):
+        super().__init__(ConnectionEdge, 'user_id', 'friend_id', max_age=max_age)
+
+    def degrees(self, viewer_id, target_ids, max_degree=MAX_DEGREE):
+        """
+        {target_id: hops from viewer_id} for every target within
+        `max_degree` hops (others are left out).
+
+        One BFS grows from the viewer and one from all the targets at
+        once (each backward node tagged with the target it came from);
+        each step expands whichever frontier is smaller. When the two
+        searches first touch for a target, its distance is the sum of the
+        two radii.
+        """
+        targets = np.unique(np.asarray(list(target_ids), dtype=np.int64))
+        result = {}
+        if viewer_id in targets:
+            result[viewer_id] = 0
+            targets = targets[targets != viewer_id]
+        if not len(targets):
+            return result
+
+        # Forward: visited users, sorted, and the newest level
+        forward = np.array([viewer_id], dtype=np.int64)
+        forward_frontier = forward
+        # Backward: (target index, user) pairs, packed as index * PACK + user
+        backward_frontier = np.arange(len(targets), dtype=np.int64) * PACK + targets
+        backward = backward_frontier
+        open_targets = np.ones(len(targets), dtype=bool)
+
+        for radius in range(1, max_degree + 1):
+            if len(forward_frontier) <= len(backward_frontier):
+                _, reached = self.segments(forward_frontier)
+                reached = np.unique(reached)
+                forward_frontier = np.setdiff1d(reached, forward, assume_unique=True)
+                forward = np.union1d(forward, forward_frontier)
+            else:
+                tags, users = np.divmod(backward_frontier, PACK)
+                rows, reached = self.segments(users)
+                codes = np.unique(tags[rows] * PACK + reached)
+                backward_frontier = np.setdiff1d(codes, backward, assume_unique=True)
+                backward = np.union1d(backward, backward_frontier)
+
+            # Targets whose backward search reached a user the forward search has seen
+            tags, users = np.divmod(backward, PACK)
+            met = np.unique(tags[np.isin(users, forward)])
+            met = met[open_targets[met]]
+            for index in met.tolist():
+                result[int(targets[index])] = radius
+            open_targets[met] = False
+            if not open_targets.any() or not (len(forward_frontier) and len(backward_frontier)):
+                break
+        return result
+
+
+adjacency_index = AdjacencyIndex(max_age=getattr(settings, 'GRAPH_INDEX_MAX_AGE', 300))
+
+
+def _degree_cache_key(viewer_id):
+    return f"degrees:{viewer_id}"
+
+
+def _changed(user_id, other_id):
+    adjacency_index.mark_dirty(user_id)
+    adjacency_index.mark_dirty(other_id)
+    cache.delete_many([_degree_cache_key(user_id), _degree_cache_key(other_id)])
+
+
+def connection_degrees(viewer, users):
+    """
+    {user_id: 1, 2 or 3} for the `users` (User objects or ids) within three
+    hops of `viewer`, in one batched search. Cached per viewer for a short
+    while; only users not cached yet are searched.
+    """
+    if viewer is None or not viewer.is_authenticated:
+        return {}
+    ids = {getattr(user, 'id', user) for user in users}
+    key = _degree_cache_key(viewer.id)
+    known = cache.get(key) or {}
+    missing = ids - known.keys()
+    if missing:
+        found = adjacency_index.degrees(viewer.id, missing)
+        # None = searched, more than MAX_DEGREE hops away
+        known.update({user_id: found.get(user_id) for user_id in missing})
+        cache.set(key, known, DEGREE_CACHE_TTL)
+    return {user_id: known[user_id] for user_id in ids if known[user_id]}
@@ -0,0 +1,259 @@
+"""
+Materialized inbox.
+
+Every participant of a thread has a ThreadMembership row holding the
+thread's latest message, its time and the participant's unread count, so
+the inbox is one range scan on the (user, last_message_at) index instead of
+a MAX() over every message plus a query per thread for the preview.
+
+The rows are kept up to date by the signals in models.py (section 18):
+participants added or removed, messages sent or deleted. Code that
+bulk_creates messages (which skips the signals) calls messages_sent()
+itself. Once the transaction commits, every participant's open pages are
+told about the change over server-sent events (see realtime.py).
+
+The navbar's unread total is the sum of the user's unread_count columns,
+cached per user and dropped whenever one of those counts changes. The
+cache is the one every worker shares (settings.CACHES), so a badge never
+outlives the change in another process.
+"""
+
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Message, MessageThread, ThreadMembership
+from .pagination import keyset_page
+
+INBOX_PAGE_SIZE = getattr(settings, 'INBOX_PAGE_SIZE', 20)
+UNREAD_TOTAL_TTL = getattr(settings, 'UNREAD_TOTAL_TTL', 3600)
+
+
+def _unread_key(user_id):
+    return f"unread_total:{user_id}"
+
+
+def unread_total(user_id):
+    """Unread messages over all of `user_id`'s threads, from the membership counters."""
+    key = _unread_key(user_id)
+    total = cache.get(key)
+    if total is None:
+        total = ThreadMembership.objects.filter(user_id=user_id, unread_count__gt=0).aggregate(
+            total=Sum('unread_count')
+        )['total'] or 0
+        cache.set(key, total, UNREAD_TOTAL_TTL)
+    return total
+
+
+def forget_unread(user_ids):
+    cache.delete_many([_unread_key(user_id) for user_id in user_ids])
+
+
+def add_members(thread_id, user_ids):
+    latest = Message.objects.filter(thread_id=thread_id).order_by('-timestamp', '-id').values_list('id', 'timestamp').first()
+    last_message = {'last_message_id': latest[0], 'last_message_at': latest[1]} if latest else {}
+    ThreadMembership.objects.bulk_create(
+        [ThreadMembership(thread_id=thread_id, user_id=user_id, **last_message) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+
+
+def remove_members(thread_id, user_ids=None):
+    memberships = ThreadMembership.objects.filter(thread_id=thread_id)
+    if user_ids is not None:
+        memberships = memberships.filter(user_id__in=user_ids)
+    removed = list(memberships.filter(unread_count__gt=0).values_list('user_id', flat=True))
+    memberships.delete()
+    transaction.on_commit(lambda: forget_unread(removed))
+
+
+def _refresh_last_message(thread_ids):
+    """Points the memberships of `thread_ids` at each thread's newest message (one UPDATE)."""
+    latest = Message.objects.filter(thread=OuterRef('thread')).order_by('-timestamp', '-id')
+    ThreadMembership.objects.filter(thread_id__in=thread_ids).update(
+        last_message_id=Subquery(latest.values('id')[:1]),
+        # An emptied thread keeps its old activity time
+        last_message_at=Coalesce(Subquery(latest.values('timestamp')[:1]), F('last_message_at')),
+    )
+
+
+def messages_sent(messages):
+    """
+    Updates the inbox rows for newly created `messages`: the last message of
+    their threads, and +1 unread per message for everyone but its sender.
+    """
+    if not messages:
+        return
+    _refresh_last_message({message.thread_id for message in messages})
+
+    # Threads that got the same number of messages from the same sender share one UPDATE
+    per_thread = Counter((message.thread_id, message.sender_id) for message in messages)
+    groups = {}
+    for (thread_id, sender_id), count in per_thread.items():
+        groups.setdefault((sender_id, count), []).append(thread_id)
+    for (sender_id, count), thread_ids in groups.items():
+        ThreadMembership.objects.filter(thread_id__in=thread_ids).exclude(user_id=sender_id).update(
+            unread_count=F('unread_count') + count
+        )
+
+    transaction.on_commit(lambda: _publish_messages(messages))
+
+
+def message_deleted(message):
+    _refresh_last_message([message.thread_id])
+    if not message.is_read:
+        ThreadMembership.objects.filter(thread_id=message.thread_id, unread_count__gt=0).exclude(
+            user_id=message.sender_id
+        ).update(unread_count=Greatest(F('unread_count') - 1, 0))
+
+    thread_id, message_id = message.thread_id, message.id
+    transaction.on_commit(lambda: _publish_deleted(thread_id, message_id))
+
+
+def mark_thread_read(thread_id, user_id):
+    """
+    Marks every message of the thread that `user_id` has not read yet as read
+    (one UPDATE over the partial index of unread messages) and zeroes the
+    user's unread count for it. Returns how many messages were marked.
+    """
+    marked = Message.objects.filter(thread_id=thread_id, is_read=False).exclude(sender_id=user_id).update(is_read=True)
+    reset = ThreadMembership.objects.filter(thread_id=thread_id, user_id=user_id, unread_count__gt=0).update(unread_count=0)
+    if marked or reset:
+        transaction.on_commit(lambda: _publish_read(thread_id, user_id))
+    return marked
+
+
+def direct_key(user_id, other_id):
+    return f"{min(user_id, other_id)}:{max(user_id, other_id)}"
+
+
+def direct_threads(user_id, other_ids):
+    """
+    {other_id: MessageThread} with the one-to-one thread between `user_id`
+    and each of `other_ids`, creating the missing ones in bulk. A fixed
+    number of queries however many users are passed.
+    """
+    keys = {direct_key(user_id, other_id): other_id for other_id in other_ids if other_id != user_id}
+    threads = {thread.direct_key: thread for thread in MessageThread.objects.filter(direct_key__in=keys)}
+
+    missing = [key for key in keys if key not in threads]
+    if missing:
+        with transaction.atomic():
+            # ignore_conflicts: a concurrent request may create the same pair first
+            MessageThread.objects.bulk_create([MessageThread(direct_key=key) for key in missing], ignore_conflicts=True)
+            created = list(MessageThread.objects.filter(direct_key__in=missing, memberships__isnull=True))
+            # bulk_create skips the m2m_changed signal, so the membership rows are written here too
+            Participant = MessageThread.participants.through
+            Participant.objects.bulk_create(
+                [Participant(messagethread_id=thread.id, user_id=member_id)
+                 for thread in created for member_id in (user_id, keys[thread.direct_key])],
+                ignore_conflicts=True,
+            )
+            ThreadMembership.objects.bulk_create(
+                [ThreadMembership(thread_id=thread.id, user_id=member_id)
+                 for thread in created for member_id in (user_id, keys[thread.direct_key])],
+                ignore_conflicts=True,
+            )
+        threads.update({thread.direct_key: thread for thread in MessageThread.objects.filter(direct_key__in=missing)})
+    return {other_id: threads[key] for key, other_id in keys.items() if key in threads}
+
+
+def send_to_many(sender, recipient_ids, **fields):
+    """
+    Sends one message (Message `fields`: body, post, ...) from `sender` to
+    each recipient in their one-to-one thread: the threads are resolved
+    with direct_threads() and the messages inserted in one statement.
+    Returns the created messages.
+    """
+    threads = direct_threads(sender.id, recipient_ids)
+    with transaction.atomic():
+        messages = Message.objects.bulk_create(
+            [Message(thread=thread, sender=sender, **fields) for thread in threads.values()]
+        )
+        MessageThread.objects.filter(id__in=[thread.id for thread in threads.values()]).update(updated_at=timezone.now())
+        # bulk_create skips the Message signals
+        messages_sent(messages)
+    return messages
+
+
+def inbox_page(user, cursor=None, page_size=INBOX_PAGE_SIZE):
+    """
+    One page of `user`'s threads, most recent activity first, as
+    (memberships, next_cursor). Each membership comes with its thread, the
+    thread's participants and its last message loaded.
+    """
+    memberships = ThreadMembership.objects.filter(user=user).select_related(
+        'thread', 'last_message'
+    ).prefetch_related('thread__participants__userprofile')
+    return keyset_page(memberships, ('-last_message_at', '-id'), cursor=cursor, page_size=page_size)
+
+
+class _Viewer:
+    """Stands in for `request` when rendering a message bubble outside a request."""
+
+    def __init__(self, user):
+        self.user = user
+
+
+def _bubble(message, viewer):
+    return render_to_string('jobportal/partials/message_list.html', {
+        'chat_messages': [message], 'request': _Viewer(viewer), 'user': viewer,
+    })
+
+
+def _unread_counts(thread_ids):
+    """{thread_id: [(user_id, unread_count), ...]} for every participant of `thread_ids`."""
+    members = {}
+    for thread_id, user_id, unread in ThreadMembership.objects.filter(
+        thread_id__in=thread_ids
+    ).values_list('thread_id', 'user_id', 'unread_count'):
+        members.setdefault(thread_id, []).append((user_id, unread))
+    return members
+
+
+def _publish_messages(messages):
+    from .realtime import publish_to_users
+
+    members = _unread_counts({message.thread_id for message in messages})
+    forget_unread({user_id for thread_members in members.values() for user_id, unread in thread_members})
+    for message in messages:
+        # The bubble looks the same to every participant but the sender
+        html = {True: _bubble(message, message.sender), False: _bubble(message, AnonymousUser())}
+        for user_id, unread_count in members.get(message.thread_id, []):
+            publish_to_users([user_id], {
+                'type': 'message',
+                'thread_id': message.thread_id,
+                'message_id': message.id,
+                'sender_id': message.sender_id,
+                'unread_count': unread_count,
+                'html': html[user_id == message.sender_id],
+            })
+
+
+def _publish_deleted(thread_id, message_id):
+    from .realtime import publish_to_users
+
+    members = _unread_counts([thread_id]).get(thread_id, [])
+    forget_unread([user_id for user_id, unread in members])
+    for user_id, unread_count in members:
+        publish_to_users([user_id], {
+            'type': 'message_deleted',
+            'thread_id': thread_id,
+            'message_id': message_id,
+            'unread_count': unread_count,
+        })
+
+
+def _publish_read(thread_id, user_id):
+    from .realtime import publish_to_users
+
+    forget_unread([user_id])
+    # The reader's other tabs clear the thread's badge
+    publish_to_users([user_id], {'type': 'thread_read', 'thread_id': thread_id, 'unread_count': 0})
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobportal.graph import import_legacy_connections, rebuild_edges
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the ConnectionEdge table (both directions of every accepted connection)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--legacy', action='store_true',
+            help='First copy accepted Connection rows and UserProfile.connections links into ConnectionRequest',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['legacy']:
+            imported = import_legacy_connections()
+            self.stdout.write(f'Imported {imported} legacy connections as accepted requests')
+        connections = rebuild_edges()
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {connections} connections ({connections * 2} edges) in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,100 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobportal.models import Company, Job, JobAlert, JobAlertTerm
+from jobportal.percolator import alert_terms, match_user_ids
+
+SKILLS = [
+    'python', 'django', 'flask', 'java', 'spring', 'kotlin', 'android', 'ios', 'swift',
+    'react', 'angular', 'vue', 'node.js', 'typescript', 'javascript', 'php', 'laravel',
+    'ruby', 'rails', 'go', 'rust', 'c++', 'c#', '.net', 'sql', 'postgresql', 'mysql',
+    'mongodb', 'redis', 'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'terraform',
+    'linux', 'devops', 'data', 'analyst', 'scientist', 'machine', 'learning', 'ai',
+    'tableau', 'excel', 'figma', 'ui', 'ux', 'designer', 'marketing', 'seo', 'sales',
+    'accountant', 'finance', 'hr', 'recruiter', 'support', 'qa', 'tester', 'security',
+]
+ROLES = ['developer', 'engineer', 'intern', 'manager', 'lead', 'senior', 'junior', 'architect', 'consultant']
+CITIES = [
+    'ahmedabad', 'surat', 'vadodara', 'rajkot', 'mumbai', 'pune', 'delhi', 'noida', 'gurgaon',
+    'bangalore', 'hyderabad', 'chennai', 'kolkata', 'jaipur', 'indore', 'remote',
+]
+FILLER = 'we are looking for a motivated person to join our growing team and build great products'.split()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time job -> alert matching against a synthetic alert index (all data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alerts', type=int, default=100000)
+        parser.add_argument('--jobs', type=int, default=200, help='Number of jobs to match')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        try:
+            with transaction.atomic():
+                self._run(rng, options['alerts'], options['jobs'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, rng, alert_count, job_count):
+        self.stdout.write(f'Building index with {alert_count} alerts...')
+        users = User.objects.bulk_create(
+            [User(username=f'bench_user_{i}', email=f'bench{i}@example.com') for i in range(1000)]
+        )
+        if not users[0].pk:
+            users = list(User.objects.filter(username__startswith='bench_user_'))
+
+        alerts = []
+        for _ in range(alert_count):
+            keyword = ' '.join(rng.sample(SKILLS, rng.randint(1, 2)) + rng.sample(ROLES, rng.randint(0, 1)))
+            location = rng.choice(CITIES) if rng.random() < 0.5 else None
+            alerts.append(JobAlert(user=rng.choice(users), keyword=keyword, location=location))
+        alerts = JobAlert.objects.bulk_create(alerts, batch_size=5000)
+        if not alerts[0].pk:
+            alerts = list(JobAlert.objects.filter(user__username__startswith='bench_user_'))
+
+        # Same rows index_alert() writes, without a signal per alert
+        terms = []
+        for alert in alerts:
+            alert_term_set = alert_terms(alert)
+            terms.extend(
+                JobAlertTerm(alert=alert, user_id=alert.user_id, kind=kind, term=term, required=len(alert_term_set))
+                for kind, term in alert_term_set
+            )
+        JobAlertTerm.objects.bulk_create(terms, batch_size=5000)
+
+        owner = User.objects.create(username='bench_company_owner')
+        company = Company.objects.create(user=owner, company_name='Bench Co', location='Ahmedabad')
+
+        timings = []
+        matched = []
+        for _ in range(job_count):
+            job = Job(
+                company=company,
+                title=' '.join(rng.sample(SKILLS, 1) + rng.sample(ROLES, 2)),
+                location=rng.choice(CITIES).title(),
+                description=' '.join(rng.choices(FILLER, k=40) + rng.sample(SKILLS, 5)),
+                skills=', '.join(rng.sample(SKILLS, 4)),
+            )
+            start = time.perf_counter()
+            matched.append(len(match_user_ids(job)))
+            timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(self.style.SUCCESS(
+            f'{job_count} jobs against {alert_count} alerts ({len(terms)} index rows): '
+            f'mean {statistics.mean(timings):.1f} ms, p95 {p95:.1f} ms, '
+            f'max {timings[-1]:.1f} ms, avg {statistics.mean(matched):.0f} matching users per job'
+        ))
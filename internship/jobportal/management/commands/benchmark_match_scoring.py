@@ -0,0 +1,83 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobportal.matching import SkillMatrix
+from jobportal.models import Company, Job, JobSkill
+from jobportal.skills import get_skill_ids, skill_match_score
+
+from .benchmark_alert_matching import ROLES, SKILLS, Rollback
+
+
+class Command(BaseCommand):
+    help = 'Time match scoring of one candidate against many synthetic jobs (all data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=50000)
+        parser.add_argument('--skills-per-job', type=int, default=6)
+        parser.add_argument('--runs', type=int, default=50, help='Number of candidates to score')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        try:
+            with transaction.atomic():
+                self._run(rng, options['jobs'], options['skills_per_job'], options['runs'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, rng, job_count, skills_per_job, runs):
+        self.stdout.write(f'Building {job_count} jobs...')
+        skill_ids = get_skill_ids(SKILLS)
+        owner = User.objects.create(username='bench_company_owner')
+        company = Company.objects.create(user=owner, company_name='Bench Co', location='Ahmedabad')
+
+        # bulk_create skips the sync signal, so JobSkill rows are written directly
+        jobs = Job.objects.bulk_create(
+            [Job(company=company, title=f'{rng.choice(SKILLS)} {rng.choice(ROLES)}', location='Ahmedabad',
+                 description='benchmark') for _ in range(job_count)],
+            batch_size=5000,
+        )
+        if not jobs[0].pk:
+            jobs = list(Job.objects.filter(company=company).order_by('id'))
+        JobSkill.objects.bulk_create(
+            [JobSkill(job=job, skill_id=skill_id) for job in jobs
+             for skill_id in rng.sample(skill_ids, rng.randint(1, skills_per_job))],
+            batch_size=5000,
+        )
+        job_ids = [job.id for job in jobs]
+
+        matrix = SkillMatrix(JobSkill, 'job_id')
+        start = time.perf_counter()
+        matrix.build()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        candidates = [set(rng.sample(skill_ids, rng.randint(3, 12))) for _ in range(runs)]
+        timings = []
+        for candidate in candidates:
+            start = time.perf_counter()
+            scores = matrix.scores(job_ids, candidate)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        # Same numbers as the per-job function, for one candidate
+        required = {}
+        for job_id, skill_id in JobSkill.objects.filter(job_id__in=job_ids).values_list('job_id', 'skill_id'):
+            required.setdefault(job_id, set()).add(skill_id)
+        start = time.perf_counter()
+        expected = [skill_match_score(required.get(job_id, set()), candidates[-1]) for job_id in job_ids]
+        loop_ms = (time.perf_counter() - start) * 1000
+        if expected != scores.tolist():
+            self.stderr.write('Vectorized scores differ from skill_match_score()')
+
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(self.style.SUCCESS(
+            f'{job_count} jobs, {runs} candidates: mean {statistics.mean(timings):.1f} ms, '
+            f'p95 {p95:.1f} ms per candidate (matrix build {build_ms:.0f} ms, '
+            f'per-job Python loop {loop_ms:.1f} ms)'
+        ))
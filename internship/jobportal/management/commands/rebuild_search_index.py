@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from jobportal.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for people, companies and jobs'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.install()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search index ({type(backend).__name__})'))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobportal.similar import K, rebuild_similar_jobs
+
+
+class Command(BaseCommand):
+    help = 'Recompute the similar-jobs lists of every job from a fresh TF-IDF index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=K, help='Neighbours stored per job')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        written = rebuild_similar_jobs(k=options['k'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {written} similar-job rows in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobportal.models import Post
+from jobportal.timeline import fan_out_post
+
+
+class Command(BaseCommand):
+    help = 'Backfill home timelines by fanning out existing posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Only posts from the last N days (0 = all posts)')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.select_related('user').order_by('created_at')
+        if options['days']:
+            posts = posts.filter(created_at__gte=timezone.now() - timedelta(days=options['days']))
+
+        count = 0
+        for post in posts.iterator(chunk_size=500):
+            # Safe to rerun: existing (owner, post) rows are ignored
+            fan_out_post(post)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Fanned out {count} posts'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from jobportal.models import Post, PostComment
+
+
+class Command(BaseCommand):
+    help = 'Recompute Post.likes_count and Post.comments_count from the like and comment rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Posts per UPDATE statement')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        Like = Post.likes.through
+
+        likes = Like.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(c=Count('*')).values('c')
+        comments = PostComment.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(c=Count('*')).values('c')
+        real_likes = Coalesce(Subquery(likes), 0)
+        real_comments = Coalesce(Subquery(comments), 0)
+
+        last_id = Post.objects.aggregate(Max('id'))['id__max'] or 0
+        fixed = 0
+
+        # Walk the table in id ranges so each UPDATE only locks one chunk
+        for start in range(0, last_id + 1, chunk_size):
+            chunk = Post.objects.filter(id__gte=start, id__lt=start + chunk_size)
+            fixed += chunk.filter(
+                ~Q(likes_count=real_likes) | ~Q(comments_count=real_comments)
+            ).update(likes_count=real_likes, comments_count=real_comments)
+
+        self.stdout.write(self.style.SUCCESS(f'Reconciled counters, {fixed} posts corrected'))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobportal.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Send queued job alert emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Recipients fetched per query')
+        parser.add_argument('--per-minute', type=int, default=None, help='Max emails per minute (default: EMAIL_SEND_RATE_PER_MINUTE)')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Give up on a job after this many failed attempts')
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new work')
+        parser.add_argument('--interval', type=int, default=30, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = drain_outbox(
+                batch_size=options['batch_size'],
+                per_minute=options['per_minute'],
+                max_attempts=options['max_attempts'],
+            )
+            if sent or failed:
+                self.stdout.write(self.style.SUCCESS(f'Sent {sent} emails, {failed} jobs will be retried or failed'))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
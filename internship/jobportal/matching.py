@@ -0,0 +1,131 @@
+"""
+Bulk skill-match scoring.
+
+skills.skill_match_score() scores one job with a set intersection; doing
+that for every job in a list is a Python loop per job. Instead, canonical
+skills are kept in CSR-style matrices of NumPy arrays (csr.RowIndex), one
+row per owner:
+
+    owner_ids[i]                                   a job (or a candidate)
+    skill_ids[starts[i]:starts[i] + counts[i]]     its skills
+
+job_matrix holds every job's JobSkill rows, candidate_matrix every
+candidate's ProfileSkill rows. Scoring a list of jobs for one candidate, or
+a list of applicants for their jobs, is then a gather of those rows plus
+np.isin / np.bincount, with no Python loop per job or applicant.
+
+The matrices are process-local and built lazily. skills.py marks an owner
+dirty whenever its skills change; dirty owners are read from the database
+until the next rebuild (at most every csr.REBUILD_INTERVAL seconds), and
+every matrix is rebuilt after MATCH_MATRIX_MAX_AGE seconds so changes saved
+by other processes show up.
+"""
+
+import numpy as np
+from django.conf import settings
+
+from .csr import RowIndex
+from .models import JobSkill, ProfileSkill
+
+# Orders the employer applicant lists accept
+APPLICANT_SORTS = ('match', 'experience', 'recent')
+
+
+class SkillMatrix(RowIndex):
+    """Canonical skill ids per owner: model.objects.values_list(owner_field, 'skill_id')."""
+
+    def __init__(self, model, owner_field, max_age=300):
+        super().__init__(model, owner_field, 'skill_id', max_age=max_age)
+
+    def scores(self, job_ids, candidate_skill_ids):
+        """
+        Match scores (0-100) of one candidate for `job_ids`, as an int array in
+        the same order. Same numbers as skill_match_score().
+        """
+        rows, flat = self.segments(job_ids)
+        # Candidate as a boolean lookup table indexed by skill id
+        has_skill = np.zeros(int(flat.max(initial=0)) + 1, dtype=bool)
+        wanted = np.fromiter(candidate_skill_ids, dtype=np.int64, count=len(candidate_skill_ids))
+        has_skill[wanted[wanted < len(has_skill)]] = True
+        hits = np.bincount(rows, weights=has_skill[flat], minlength=len(job_ids))
+        return _percent(hits.astype(np.int64), np.bincount(rows, minlength=len(job_ids)))
+
+
+def _percent(hits, required):
+    scores = np.zeros(len(hits), dtype=np.int64)
+    scored = required > 0
+    scores[scored] = hits[scored] * 100 // required[scored]
+    return scores
+
+
+_max_age = getattr(settings, 'MATCH_MATRIX_MAX_AGE', 300)
+job_matrix = SkillMatrix(JobSkill, 'job_id', max_age=_max_age)
+candidate_matrix = SkillMatrix(ProfileSkill, 'profile__user_id', max_age=_max_age)
+
+
+def attach_match_scores(jobs, candidate_skill_ids, sort_by_match=False):
+    """
+    Sets job.match_score on every job in `jobs` (one vectorized pass) and
+    returns them as a list, best match first if `sort_by_match`.
+    Ties keep their original order.
+    """
+    jobs = list(jobs)
+    scores = job_matrix.scores([job.id for job in jobs], candidate_skill_ids)
+    for job, score in zip(jobs, scores.tolist()):
+        job.match_score = score
+    if sort_by_match:
+        jobs = [jobs[i] for i in np.argsort(-scores, kind='stable')]
+    return jobs
+
+
+def _years(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def rank_applications(applications, sort='match', min_score=None, min_experience=None, commute=None):
+    """
+    Scores every application in `applications` against the job it is for,
+    applies the filters and sorts, all on NumPy arrays.
+
+    Returns (application ids in order, {application id: match score}).
+    Ties, and sort='recent', fall back to newest application first.
+    """
+    rows = list(applications.order_by().values_list('id', 'user_id', 'job_id', 'experience', 'commute'))
+    if not rows:
+        return [], {}
+
+    app_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    experience = np.array([_years(row[3]) for row in rows], dtype=float)
+    commutes = np.array([row[4] or '' for row in rows], dtype=object)
+
+    # Every (application, skill) pair of the job and of the candidate,
+    # encoded as one integer: application index * width + skill id
+    job_rows, job_skills = job_matrix.segments([row[2] for row in rows])
+    candidate_rows, candidate_skills = candidate_matrix.segments([row[1] for row in rows])
+    width = int(max(job_skills.max(initial=0), candidate_skills.max(initial=0))) + 1
+    hit = np.isin(candidate_rows * width + candidate_skills, job_rows * width + job_skills)
+    hits = np.bincount(candidate_rows, weights=hit, minlength=len(rows)).astype(np.int64)
+    scores = _percent(hits, np.bincount(job_rows, minlength=len(rows)))
+
+    keep = np.ones(len(rows), dtype=bool)
+    if min_score:
+        keep &= scores >= min_score
+    if min_experience is not None:
+        keep &= experience >= min_experience
+    if commute:
+        keep &= commutes == commute
+
+    app_ids, scores, experience = app_ids[keep], scores[keep], experience[keep]
+    experience = np.nan_to_num(experience, nan=-1.0)
+    # np.lexsort sorts by the last key first
+    if sort == 'experience':
+        order = np.lexsort((-app_ids, -scores, -experience))
+    elif sort == 'recent':
+        order = np.argsort(-app_ids)
+    else:
+        order = np.lexsort((-app_ids, -experience, -scores))
+
+    return app_ids[order].tolist(), dict(zip(app_ids.tolist(), scores.tolist()))
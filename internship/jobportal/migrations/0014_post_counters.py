@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:09
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model('jobportal', 'Post')
+    PostComment = apps.get_model('jobportal', 'PostComment')
+    Like = Post.likes.through
+
+    likes = Like.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(c=Count('*')).values('c')
+    comments = PostComment.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(c=Count('*')).values('c')
+    Post.objects.update(
+        likes_count=Coalesce(Subquery(likes), 0),
+        comments_count=Coalesce(Subquery(comments), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobportal', '0013_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
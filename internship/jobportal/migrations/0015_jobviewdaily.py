@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobportal', '0014_post_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobViewDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='jobportal.job')),
+            ],
+            options={
+                'unique_together': {('job', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:17
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of jobportal/text.py's tokenize() at the time of this migration
+TOKEN_RE = re.compile(r"[a-z0-9+#.]*[a-z0-9+#]")
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'our', 'the', 'to', 'we', 'with', 'you',
+    'your', 'will', 'this', 'that',
+}
+
+
+def tokenize(text):
+    tokens = (token.lstrip('.') for token in TOKEN_RE.findall((text or '').lower()))
+    return {token[:50] for token in tokens if token and token not in STOPWORDS}
+
+
+def index_existing_alerts(apps, schema_editor):
+    JobAlert = apps.get_model('jobportal', 'JobAlert')
+    JobAlertTerm = apps.get_model('jobportal', 'JobAlertTerm')
+
+    rows = []
+    for alert in JobAlert.objects.all().iterator():
+        terms = {('keyword', token) for token in tokenize(alert.keyword)}
+        terms.update(('location', token) for token in tokenize(alert.location))
+        rows.extend(
+            JobAlertTerm(alert_id=alert.id, user_id=alert.user_id, kind=kind, term=term, required=len(terms))
+            for kind, term in terms
+        )
+    JobAlertTerm.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobportal', '0016_jobalertoutbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobAlertTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('keyword', 'Keyword'), ('location', 'Location')], max_length=10)),
+                ('term', models.CharField(max_length=50)),
+                ('required', models.PositiveSmallIntegerField()),
+                ('alert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='jobportal.jobalert')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'term', 'alert', 'user', 'required'], name='alert_term_idx')],
+                'unique_together': {('alert', 'kind', 'term')},
+            },
+        ),
+        migrations.RunPython(index_existing_alerts, migrations.RunPython.noop),
+    ]
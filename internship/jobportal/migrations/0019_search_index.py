@@ -0,0 +1,75 @@
+from django.db import migrations
+
+# Frozen copy of the index definitions in jobportal/search.py at the time of
+# this migration: table, (column, weight) list and the rows to index.
+INDEXES = [
+    (
+        'jobportal_job_search',
+        [('title', 'A'), ('company_name', 'B'), ('skills', 'B'), ('location', 'B'), ('description', 'C')],
+        """
+        SELECT j.id AS id, j.title AS title, c.company_name AS company_name,
+               COALESCE(j.skills, '') AS skills, j.location AS location, j.description AS description
+        FROM jobportal_job j JOIN jobportal_company c ON c.id = j.company_id
+        """,
+    ),
+    (
+        'jobportal_company_search',
+        [('company_name', 'A'), ('industry', 'B'), ('location', 'B')],
+        """
+        SELECT c.id AS id, c.company_name AS company_name, c.industry AS industry, c.location AS location
+        FROM jobportal_company c
+        """,
+    ),
+    (
+        'jobportal_user_search',
+        [('username', 'A'), ('first_name', 'A'), ('last_name', 'A'), ('headline', 'B')],
+        """
+        SELECT u.id AS id, u.username AS username, u.first_name AS first_name,
+               u.last_name AS last_name, COALESCE(p.headline, '') AS headline
+        FROM auth_user u LEFT JOIN jobportal_userprofile p ON p.user_id = u.id
+        """,
+    ),
+]
+
+
+def install_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        for table, columns, source in INDEXES:
+            names = ', '.join(column for column, _ in columns)
+            if vendor == 'sqlite':
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} "
+                    f"USING fts5({names}, tokenize='unicode61 remove_diacritics 2')"
+                )
+                cursor.execute(f"INSERT INTO {table} (rowid, {names}) SELECT id, {names} FROM ({source})")
+            elif vendor == 'postgresql':
+                document = ' || '.join(
+                    f"setweight(to_tsvector('simple', COALESCE(src.{column}, '')), '{weight}')"
+                    for column, weight in columns
+                )
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} (id bigint PRIMARY KEY, document tsvector NOT NULL)")
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_gin ON {table} USING GIN (document)")
+                cursor.execute(
+                    f"INSERT INTO {table} (id, document) SELECT src.id, {document} FROM ({source}) src "
+                    f"ON CONFLICT (id) DO NOTHING"
+                )
+
+
+def uninstall_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, _, _ in INDEXES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobportal', '0018_job_alert_digest'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,145 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:30
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of jobportal.skills.DEFAULT_ALIASES and its text helpers
+DEFAULT_ALIASES = {
+    'js': 'javascript',
+    'es6': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'python3': 'python',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'vuejs': 'vue',
+    'vue.js': 'vue',
+    'angularjs': 'angular',
+    'node': 'node.js',
+    'nodejs': 'node.js',
+    'postgres': 'postgresql',
+    'mongo': 'mongodb',
+    'k8s': 'kubernetes',
+    'golang': 'go',
+    'ml': 'machine learning',
+    'cpp': 'c++',
+    'csharp': 'c#',
+    'amazon web services': 'aws',
+    'ms excel': 'excel',
+}
+
+
+def split_skills(skill_text):
+    if not skill_text:
+        return []
+    return [s.strip() for s in re.split(r'[,\n\r]+', skill_text) if s.strip()]
+
+
+def normalize_skill(skill):
+    if not skill:
+        return ""
+    return ' '.join(skill.lower().split()).rstrip('.,')[:100]
+
+
+def backfill_skills(apps, schema_editor):
+    Skill = apps.get_model('jobportal', 'Skill')
+    SkillAlias = apps.get_model('jobportal', 'SkillAlias')
+    Job = apps.get_model('jobportal', 'Job')
+    UserProfile = apps.get_model('jobportal', 'UserProfile')
+    JobSkill = apps.get_model('jobportal', 'JobSkill')
+    ProfileSkill = apps.get_model('jobportal', 'ProfileSkill')
+
+    skill_ids = {}
+
+    def skill_id(name):
+        if name not in skill_ids:
+            skill_ids[name] = Skill.objects.get_or_create(name=name)[0].id
+        return skill_ids[name]
+
+    for alias, name in DEFAULT_ALIASES.items():
+        SkillAlias.objects.get_or_create(alias=alias, defaults={'skill_id': skill_id(name)})
+
+    def canonical_ids(text):
+        names = {normalize_skill(skill) for skill in split_skills(text)}
+        return {skill_id(DEFAULT_ALIASES.get(name, name)) for name in names if name}
+
+    JobSkill.objects.bulk_create([
+        JobSkill(job_id=job_id, skill_id=sid)
+        for job_id, text in Job.objects.exclude(skills__isnull=True).values_list('id', 'skills').iterator()
+        for sid in canonical_ids(text)
+    ], batch_size=1000)
+    ProfileSkill.objects.bulk_create([
+        ProfileSkill(profile_id=profile_id, skill_id=sid)
+        for profile_id, text in UserProfile.objects.exclude(skills__isnull=True).values_list('id', 'skills').iterator()
+        for sid in canonical_ids(text)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobportal', '0019_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProfileSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profile_skills', to='jobportal.userprofile')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profile_skills', to='jobportal.skill')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_skills', to='jobportal.job')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_skills', to='jobportal.skill')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='skill_set',
+            field=models.ManyToManyField(blank=True, related_name='jobs', through='jobportal.JobSkill', to='jobportal.skill'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='skill_set',
+            field=models.ManyToManyField(blank=True, related_name='profiles', through='jobportal.ProfileSkill', to='jobportal.skill'),
+        ),
+        migrations.CreateModel(
+            name='SkillAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=100, unique=True)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='jobportal.skill')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='profileskill',
+            index=models.Index(fields=['skill', 'profile'], name='profileskill_skill_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='profileskill',
+            unique_together={('profile', 'skill')},
+        ),
+        migrations.AddIndex(
+            model_name='jobskill',
+            index=models.Index(fields=['skill', 'job'], name='jobskill_skill_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='jobskill',
+            unique_together={('job', 'skill')},
+        ),
+        migrations.RunPython(backfill_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# The lists of existing jobs are filled by `manage.py rebuild_similar_jobs`,
+# or job by job in the background as their pages are viewed (see similar.py)
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobportal', '0020_skills'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_entries', to='jobportal.job')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='jobportal.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job', '-score'], name='similarjob_job_score_idx')],
+                'unique_together': {('job', 'similar')},
+            },
+        ),
+    ]
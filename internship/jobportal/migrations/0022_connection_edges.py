@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_connection_edges(apps, schema_editor):
+    ConnectionRequest = apps.get_model('jobportal', 'ConnectionRequest')
+    ConnectionEdge = apps.get_model('jobportal', 'ConnectionEdge')
+
+    seen, edges = set(), []
+    rows = ConnectionRequest.objects.filter(status='accepted').order_by('timestamp')
+    for sender_id, receiver_id, connected_at in rows.values_list('sender_id', 'receiver_id', 'timestamp'):
+        pair = (min(sender_id, receiver_id), max(sender_id, receiver_id))
+        if sender_id == receiver_id or pair in seen:
+            continue
+        seen.add(pair)
+        edges.append(ConnectionEdge(user_id=sender_id, friend_id=receiver_id, created_at=connected_at))
+        edges.append(ConnectionEdge(user_id=receiver_id, friend_id=sender_id, created_at=connected_at))
+    ConnectionEdge.objects.bulk_create(edges, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobportal', '0021_similar_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConnectionEdge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('friend', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='connection_edges', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at'], name='connedge_user_created_idx')],
+                'unique_together': {('user', 'friend')},
+            },
+        ),
+        migrations.RunPython(build_connection_edges, migrations.RunPython.noop),
+    ]
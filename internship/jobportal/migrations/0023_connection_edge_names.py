@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:57
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_friend_names(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    ConnectionEdge = apps.get_model('jobportal', 'ConnectionEdge')
+
+    # One UPDATE copying every friend's current name onto the edge
+    friend = User.objects.filter(pk=OuterRef('friend_id'))
+    ConnectionEdge.objects.update(
+        friend_first_name=Subquery(friend.values('first_name')[:1]),
+        friend_last_name=Subquery(friend.values('last_name')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobportal', '0022_connection_edges'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='connectionedge',
+            name='friend_first_name',
+            field=models.CharField(blank=True, default='', max_length=150),
+        ),
+        migrations.AddField(
+            model_name='connectionedge',
+            name='friend_last_name',
+            field=models.CharField(blank=True, default='', max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='connectionedge',
+            index=models.Index(fields=['user', 'friend_first_name', 'friend'], name='connedge_user_first_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='connectionedge',
+            index=models.Index(fields=['user', 'friend_last_name', 'friend'], name='connedge_user_last_idx'),
+        ),
+        migrations.RunPython(fill_friend_names, migrations.RunPython.noop),
+    ]
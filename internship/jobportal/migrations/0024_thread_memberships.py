@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_memberships(apps, schema_editor):
+    MessageThread = apps.get_model('jobportal', 'MessageThread')
+    Message = apps.get_model('jobportal', 'Message')
+    ThreadMembership = apps.get_model('jobportal', 'ThreadMembership')
+
+    # Nothing marked messages read before this migration, so is_read=False
+    # on old rows says nothing. Existing conversations start out read.
+    Message.objects.filter(is_read=False).update(is_read=True)
+
+    latest = {}
+    for message_id, thread_id, timestamp in Message.objects.order_by('timestamp', 'id').values_list('id', 'thread_id', 'timestamp'):
+        latest[thread_id] = (message_id, timestamp)
+
+    rows = []
+    for thread_id, user_id, updated_at in MessageThread.participants.through.objects.values_list(
+        'messagethread_id', 'user_id', 'messagethread__updated_at'
+    ):
+        message_id, timestamp = latest.get(thread_id, (None, updated_at))
+        rows.append(ThreadMembership(
+            thread_id=thread_id, user_id=user_id, last_message_id=message_id, last_message_at=timestamp,
+            unread_count=0,
+        ))
+    ThreadMembership.objects.bulk_create(rows, batch_size=5000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobportal', '0023_connection_edge_names'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThreadMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='jobportal.message')),
+                ('thread', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='jobportal.messagethread')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='thread_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-last_message_at'], name='membership_inbox_idx')],
+                'unique_together': {('thread', 'user')},
+            },
+        ),
+        migrations.RunPython(build_memberships, migrations.RunPython.noop),
+    ]
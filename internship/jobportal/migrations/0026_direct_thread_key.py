@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+def set_direct_keys(apps, schema_editor):
+    MessageThread = apps.get_model('jobportal', 'MessageThread')
+    Participant = MessageThread.participants.through
+
+    members = {}
+    for thread_id, user_id in Participant.objects.values_list('messagethread_id', 'user_id'):
+        members.setdefault(thread_id, set()).add(user_id)
+
+    # Pairs that already have several threads: the most recently active one gets the key
+    keyed = {}
+    for thread in MessageThread.objects.filter(id__in=members).order_by('updated_at', 'id'):
+        users = members[thread.id]
+        if len(users) == 2:
+            keyed[':'.join(str(user_id) for user_id in sorted(users))] = thread.id
+    for key, thread_id in keyed.items():
+        MessageThread.objects.filter(id=thread_id).update(direct_key=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobportal', '0025_message_thread_time_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messagethread',
+            name='direct_key',
+            field=models.CharField(blank=True, max_length=41, null=True, unique=True),
+        ),
+        migrations.RunPython(set_direct_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+# update_application_status used to save the button labels instead of the
+# Application.STATUS_CHOICES values
+STATUS_VALUES = {
+    'Applied': 'applied',
+    'Pending': 'applied',
+    'Interview': 'interview',
+    'Selected': 'selected',
+    'Accepted': 'selected',
+    'Rejected': 'rejected',
+}
+
+
+def normalize_statuses(apps, schema_editor):
+    Application = apps.get_model('jobportal', 'Application')
+    for old, new in STATUS_VALUES.items():
+        Application.objects.filter(status=old).update(status=new)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobportal', '0028_cache_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_statuses, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.core.exceptions import ObjectDoesNotExist
 
@@ -95,6 +97,8 @@ class Job(models.Model):
     
     # Skills required for the job (comma-separated)
     skills = models.TextField(blank=True, null=True, help_text="Comma-separated skills required for this job")
+    # Canonical form of `skills`, kept in sync on save (see jobportal/skills.py)
+    skill_set = models.ManyToManyField('Skill', through='JobSkill', related_name='jobs', blank=True)
 
     def save(self, *args, **kwargs):
         # Auto-sync company name
@@ -112,6 +116,22 @@ class Job(models.Model):
         return self.benefits.split('\n')
 
 
+class JobViewDaily(models.Model):
+    """
+    Per-job, per-day view totals, written in bulk by the job view buffer
+    (jobportal/counters.py). Lets dashboards chart trends without raw hits.
+    """
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='daily_views')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('job', 'date')
+
+    def __str__(self):
+        return f"{self.job_id} on {self.date}: {self.views} views"
+
+
 # ---------------------------------------------------------
 # 3. CANDIDATE DETAILS
 # ---------------------------------------------------------
@@ -164,12 +184,46 @@ class Post(models.Model):
     likes = models.ManyToManyField(User, related_name='liked_posts', blank=True)
     impressions_count = models.PositiveIntegerField(default=0)
 
+    # Denormalized counters, kept in sync with F() updates
+    # (see toggle_like() and the PostComment signals below).
+    # `manage.py reconcile_post_counters` repairs any drift.
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Backs the keyset-paginated home feed: ORDER BY created_at DESC, id DESC
+            models.Index(fields=['-created_at', '-id'], name='post_feed_idx'),
+        ]
+
     def __str__(self):
         return f"Post by {self.user.username}"
 
     @property
     def total_likes(self):
-        return self.likes.count()
+        return self.likes_count
+
+    def toggle_like(self, user):
+        """
+        Likes the post for `user`, or removes the like if it exists.
+        The like row and likes_count change in one transaction.
+        Returns True if the post is now liked.
+        """
+        Like = Post.likes.through
+        with transaction.atomic():
+            removed, _ = Like.objects.filter(post=self, user=user).delete()
+            if removed:
+                Post.objects.filter(pk=self.pk).update(likes_count=Greatest(F('likes_count') - removed, 0))
+                return False
+
+            try:
+                with transaction.atomic():
+                    Like.objects.create(post=self, user=user)
+            except IntegrityError:
+                # A concurrent request liked it first
+                return True
+            Post.objects.filter(pk=self.pk).update(likes_count=F('likes_count') + 1)
+            return True
 
 class PostComment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
@@ -181,6 +235,37 @@ class PostComment(models.Model):
         return f"Comment by {self.user.username} on {self.post.id}"
 
 
+@receiver(post_save, sender=PostComment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(comments_count=F('comments_count') + 1)
+
+@receiver(post_delete, sender=PostComment)
+def decrement_comments_count(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id).update(comments_count=Greatest(F('comments_count') - 1, 0))
+
+
+class TimelineEntry(models.Model):
+    """
+    One row per (reader, post) in a reader's home timeline.
+    Written when a post is created (fan-out-on-write), so reading a feed is a
+    single range scan on (owner, created_at, post).
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    # Copy of post.created_at so the feed can be sorted without joining Post
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('owner', 'post')
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post'], name='timeline_owner_idx'),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in {self.owner_id}'s timeline"
+
+
 # ---------------------------------------------------------
 # 5. APPLICATIONS & SAVED JOBS
 # ---------------------------------------------------------
@@ -240,12 +325,81 @@ class ConnectionRequest(models.Model):
         unique_together = ('sender', 'receiver')
 
 
+class ConnectionEdge(models.Model):
+    """
+    One direction of an accepted connection. Every connection is stored
+    twice (user -> friend and friend -> user), so "X's connections" is a
+    lookup on `user` alone (see jobportal/graph.py).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='connection_edges')
+    friend = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(default=timezone.now)
+    # Copies of the friend's name, so the connections page can search and
+    # sort by name inside this table (kept in step by a User signal)
+    friend_first_name = models.CharField(max_length=150, blank=True, default='')
+    friend_last_name = models.CharField(max_length=150, blank=True, default='')
+
+    class Meta:
+        unique_together = ('user', 'friend')
+        indexes = [
+            # Newest connections first
+            models.Index(fields=['user', '-created_at'], name='connedge_user_created_idx'),
+            # connections_list_view sorted by first / last name
+            models.Index(fields=['user', 'friend_first_name', 'friend'], name='connedge_user_first_idx'),
+            models.Index(fields=['user', 'friend_last_name', 'friend'], name='connedge_user_last_idx'),
+        ]
+
+
+# ---------------------------------------------------------
+# 6.1. CONNECTION GRAPH SIGNALS (keep ConnectionEdge in step)
+# ---------------------------------------------------------
+@receiver(pre_save, sender=ConnectionRequest)
+def remember_request_status(sender, instance, **kwargs):
+    instance._previous_status = (
+        ConnectionRequest.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        if instance.pk else None
+    )
+
+@receiver(post_save, sender=ConnectionRequest)
+def connection_edges_signal(sender, instance, **kwargs):
+    from .graph import add_connection, remove_connection
+    from .timeline import backfill_connection
+    previous = getattr(instance, '_previous_status', None)
+    if instance.status == 'accepted' and previous != 'accepted':
+        add_connection(instance.sender_id, instance.receiver_id)
+        a, b = instance.sender_id, instance.receiver_id
+        transaction.on_commit(lambda: backfill_connection(a, b))
+    elif previous == 'accepted' and instance.status != 'accepted':
+        remove_connection(instance.sender_id, instance.receiver_id)
+
+@receiver(post_delete, sender=ConnectionRequest)
+def remove_connection_edges_signal(sender, instance, **kwargs):
+    from .graph import remove_connection
+    if instance.status == 'accepted':
+        remove_connection(instance.sender_id, instance.receiver_id)
+
+def _is_login_save(update_fields):
+    """True for the save Django makes on every login, which only sets last_login."""
+    return update_fields is not None and set(update_fields) <= {'last_login'}
+
+@receiver(post_save, sender=User)
+def connection_edge_names_signal(sender, instance, update_fields=None, **kwargs):
+    if _is_login_save(update_fields):
+        return
+    ConnectionEdge.objects.filter(friend=instance).exclude(
+        friend_first_name=instance.first_name, friend_last_name=instance.last_name
+    ).update(friend_first_name=instance.first_name, friend_last_name=instance.last_name)
+
+
 # ---------------------------------------------------------
 # 7. MESSAGING
 # ---------------------------------------------------------
 class MessageThread(models.Model):
     participants = models.ManyToManyField(User, related_name="threads")
     updated_at = models.DateTimeField(auto_now=True)
+    # "<smaller user id>:<larger user id>" on one-to-one threads, so a pair
+    # has at most one (see inbox.direct_threads); empty on group threads
+    direct_key = models.CharField(max_length=41, unique=True, null=True, blank=True)
 
 
 class Message(models.Model):
@@ -260,6 +414,32 @@ class Message(models.Model):
 
     class Meta: 
         ordering = ['timestamp']
+        indexes = [
+            # A thread's history, newest page first
+            models.Index(fields=['thread', 'timestamp'], name='message_thread_time_idx'),
+            # Only the unread rows, for marking a thread read
+            models.Index(fields=['thread'], condition=models.Q(is_read=False), name='message_unread_idx'),
+        ]
+
+
+class ThreadMembership(models.Model):
+    """
+    One participant's inbox row for a thread: the thread's latest message
+    and how many messages this participant has not read yet, kept up to
+    date by the Message signals (see jobportal/inbox.py).
+    """
+    thread = models.ForeignKey(MessageThread, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='thread_memberships')
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(default=timezone.now)
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('thread', 'user')
+        indexes = [
+            # The inbox: a user's threads, most recent activity first
+            models.Index(fields=['user', '-last_message_at'], name='membership_inbox_idx'),
+        ]
 
 
 # ---------------------------------------------------------
@@ -298,6 +478,8 @@ class UserProfile(models.Model):
     # --- LINKS & SKILLS ---
     portfolio_url = models.URLField(blank=True, null=True)
     skills = models.TextField(blank=True, null=True, help_text="Comma-separated skills")
+    # Canonical form of `skills`, kept in sync on save (see jobportal/skills.py)
+    skill_set = models.ManyToManyField('Skill', through='ProfileSkill', related_name='profiles', blank=True)
 
     # --- >>> THIS IS THE MISSING FIELD THAT CAUSED THE ERROR <<< ---
     connections = models.ManyToManyField("self", blank=True)
@@ -314,6 +496,11 @@ class UserProfile(models.Model):
     # --- ANALYTICS ---
     search_appearances_count = models.PositiveIntegerField(default=0)
 
+    # --- FEED ---
+    # True when this user's audience is too big to copy every post into each
+    # reader's timeline; readers pull their posts at read time instead.
+    fanout_on_read = models.BooleanField(default=False)
+
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
@@ -356,7 +543,9 @@ def create_profile_signal(sender, instance, created, **kwargs):
         UserProfile.objects.get_or_create(user=instance)
 
 @receiver(post_save, sender=User)
-def save_profile_signal(sender, instance, **kwargs):
+def save_profile_signal(sender, instance, update_fields=None, **kwargs):
+    if _is_login_save(update_fields):
+        return
     try:
         instance.userprofile.save()
     except ObjectDoesNotExist:
@@ -376,84 +565,357 @@ class JobAlert(models.Model):
         return f"{self.user.username} - {self.keyword}"
 
 
+class JobAlertTerm(models.Model):
+    """
+    Inverted index over JobAlert keywords and locations (one row per token).
+    A new job looks up alerts by its own tokens instead of scanning every
+    alert, see jobportal/percolator.py.
+    """
+    KIND_CHOICES = (
+        ('keyword', 'Keyword'),
+        ('location', 'Location'),
+    )
+    alert = models.ForeignKey(JobAlert, on_delete=models.CASCADE, related_name='terms')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    term = models.CharField(max_length=50)
+
+    # Copied from the alert so matching never has to join JobAlert:
+    # the owner, and how many terms the alert has in total (all must hit)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    required = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ('alert', 'kind', 'term')
+        indexes = [
+            # Covering index: matching reads only this index
+            models.Index(fields=['kind', 'term', 'alert', 'user', 'required'], name='alert_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.term} -> alert {self.alert_id}"
+
+
+@receiver(post_save, sender=JobAlert)
+def index_job_alert_signal(sender, instance, **kwargs):
+    from .percolator import index_alert
+    index_alert(instance)
+
+
 # ---------------------------------------------------------
 # 11. SIGNAL FOR AUTOMATIC JOB ALERTS
 # ---------------------------------------------------------
+class JobAlertOutbox(models.Model):
+    """
+    One row per new job whose alert emails still have to go out.
+    Written by the post_save signal in the same transaction as the Job;
+    `manage.py send_outbox` drains it in batches (see jobportal/outbox.py).
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='alert_outbox')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # Recipients are walked in id order; this is how far we got
+    last_recipient_id = models.BigIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+
+    # Retry bookkeeping
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Alerts for job {self.job_id} ({self.status})"
+
+
 @receiver(post_save, sender=Job)
 def send_job_alert_on_new_job(sender, instance, created, **kwargs):
-    """Send job alerts to ALL users when a new job is posted"""
+    """Queue job alert emails for a new job (sent later by `manage.py send_outbox`)"""
     if not created:
         return  # Only send on new jobs, not updates
-    
-    try:
-        from django.core.mail import send_mail
-        from django.contrib.auth.models import User as DjangoUser
-        
-        # Get all candidate users (exclude superusers and admins)
-        candidate_users = DjangoUser.objects.filter(
-            is_active=True,
-            is_staff=False
-        )
-        
-        print(f"\n{'='*80}")
-        print(f"📧 SENDING JOB ALERTS FOR NEW JOB: {instance.title}")
-        print(f"{'='*80}\n")
-        
-        sent_count = 0
-        failed_count = 0
-        
-        for user in candidate_users:
-            if not user.email:
-                print(f"⚠️  Skipping {user.username} - No email address")
-                continue
-            
-            try:
-                subject = f"🎯 New Job Posted: {instance.title}"
-                message = f"""
-Hello {user.first_name or user.username},
-
-🎉 A new exciting job opportunity has been posted on JobPortal!
-
-{'─'*80}
-📌 JOB DETAILS:
-{'─'*80}
-Job Title:   {instance.title}
-Company:     {instance.company_name}
-Location:    {instance.location}
-Job Type:    {instance.job_type}
-Salary:      ${instance.salary_min} - ${instance.salary_max} (if available)
-{'─'*80}
-
-📝 DESCRIPTION:
-{instance.description[:500]}...
-
-✨ Don't miss this opportunity! Login to JobPortal to view full details and apply now.
-
-Best regards,
-JobPortal Team
-"""
-                
-                # Send email
-                send_mail(
-                    subject,
-                    message,
-                    'noreply@jobportal.com',
-                    [user.email],
-                    fail_silently=False,
-                )
-                
-                sent_count += 1
-                print(f"✅ Email sent to {user.email} ({user.username})")
-                
-            except Exception as email_error:
-                failed_count += 1
-                print(f"❌ Failed to send email to {user.email}: {str(email_error)}")
-        
-        print(f"\n{'='*80}")
-        print(f"📊 SUMMARY: {sent_count} emails sent, {failed_count} failed")
-        print(f"{'='*80}\n")
-        
-    except Exception as e:
-        print(f"❌ ERROR IN JOB ALERT SIGNAL: {str(e)}")
-        import traceback
-        traceback.print_exc()
\ No newline at end of file
+
+    JobAlertOutbox.objects.create(job=instance)
+
+
+# ---------------------------------------------------------
+# 12. JOB ALERT DIGESTS (manage.py send_job_alerts)
+# ---------------------------------------------------------
+class JobAlertWatermark(models.Model):
+    """
+    Progress of the digest command: jobs created up to `watermark` have been
+    matched and mailed. `locked_until` keeps overlapping runs apart.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    watermark = models.DateTimeField(blank=True, null=True)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    last_run_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.watermark}"
+
+
+class JobAlertDelivery(models.Model):
+    """
+    One row per job a user has been emailed about (instant alert or digest),
+    so neither a rerun nor the other channel sends it again.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='job_alert_deliveries')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'job')
+
+    def __str__(self):
+        return f"Job {self.job_id} -> {self.user_id}"
+
+
+# ---------------------------------------------------------
+# 13. SEARCH INDEX (see jobportal/search.py)
+# ---------------------------------------------------------
+@receiver(post_save, sender=Job)
+def index_job_signal(sender, instance, **kwargs):
+    from .search import update_index
+    update_index('jobs', [instance.id])
+
+@receiver(post_delete, sender=Job)
+def unindex_job_signal(sender, instance, **kwargs):
+    from .search import remove_from_index
+    remove_from_index('jobs', [instance.id])
+
+@receiver(post_save, sender=Company)
+def index_company_signal(sender, instance, **kwargs):
+    from .search import update_index
+    update_index('companies', [instance.id])
+    # Job rows carry the company name too
+    update_index('jobs', list(instance.jobs.values_list('id', flat=True)))
+
+@receiver(post_delete, sender=Company)
+def unindex_company_signal(sender, instance, **kwargs):
+    from .search import remove_from_index
+    remove_from_index('companies', [instance.id])
+
+@receiver(post_save, sender=User)
+def index_user_signal(sender, instance, update_fields=None, **kwargs):
+    if _is_login_save(update_fields):
+        return
+    from .search import update_index
+    update_index('people', [instance.id])
+
+@receiver(post_save, sender=UserProfile)
+def index_user_profile_signal(sender, instance, **kwargs):
+    from .search import update_index
+    update_index('people', [instance.user_id])
+
+@receiver(post_delete, sender=User)
+def unindex_user_signal(sender, instance, **kwargs):
+    from .search import remove_from_index
+    remove_from_index('people', [instance.id])
+
+
+# ---------------------------------------------------------
+# 14. PEOPLE TYPEAHEAD (see jobportal/typeahead.py)
+# ---------------------------------------------------------
+@receiver(post_save, sender=User)
+def typeahead_user_signal(sender, instance, update_fields=None, **kwargs):
+    if _is_login_save(update_fields):
+        return
+    from .typeahead import people_index
+    transaction.on_commit(lambda: people_index.update_user(instance.id))
+
+@receiver(post_save, sender=UserProfile)
+def typeahead_user_profile_signal(sender, instance, **kwargs):
+    from .typeahead import people_index
+    transaction.on_commit(lambda: people_index.update_user(instance.user_id))
+
+@receiver(post_delete, sender=User)
+def typeahead_remove_user_signal(sender, instance, **kwargs):
+    from .typeahead import people_index
+    user_id = instance.id
+    transaction.on_commit(lambda: people_index.remove_user(user_id))
+
+
+# ---------------------------------------------------------
+# 15. SKILLS (canonical names, see jobportal/skills.py)
+# ---------------------------------------------------------
+class Skill(models.Model):
+    """One canonical skill, e.g. "javascript". Names are normalized (lowercase)."""
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class SkillAlias(models.Model):
+    """Another spelling of a skill, e.g. "js" -> javascript."""
+    alias = models.CharField(max_length=100, unique=True)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='aliases')
+
+    def __str__(self):
+        return f"{self.alias} -> {self.skill.name}"
+
+
+class JobSkill(models.Model):
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='job_skills')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='job_skills')
+
+    class Meta:
+        unique_together = ('job', 'skill')
+        indexes = [
+            # "Which jobs need skill X"
+            models.Index(fields=['skill', 'job'], name='jobskill_skill_idx'),
+        ]
+
+
+class ProfileSkill(models.Model):
+    profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='profile_skills')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='profile_skills')
+
+    class Meta:
+        unique_together = ('profile', 'skill')
+        indexes = [
+            # "Which candidates have skill X"
+            models.Index(fields=['skill', 'profile'], name='profileskill_skill_idx'),
+        ]
+
+
+@receiver(post_save, sender=Job)
+def sync_job_skills_signal(sender, instance, **kwargs):
+    from .skills import sync_job_skills
+    sync_job_skills(instance)
+
+@receiver(post_save, sender=UserProfile)
+def sync_profile_skills_signal(sender, instance, **kwargs):
+    from .skills import sync_profile_skills
+    sync_profile_skills(instance)
+
+@receiver(post_save, sender=SkillAlias)
+@receiver(post_delete, sender=SkillAlias)
+def skill_alias_changed_signal(sender, **kwargs):
+    from .skills import clear_alias_cache
+    clear_alias_cache()
+
+
+# ---------------------------------------------------------
+# 16. SIMILAR JOBS (TF-IDF neighbours, see jobportal/similar.py)
+# ---------------------------------------------------------
+class SimilarJob(models.Model):
+    """One of the top-k most similar jobs of `job` (cosine of TF-IDF vectors)."""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='similar_entries')
+    similar = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('job', 'similar')
+        indexes = [
+            # job_detail_view: "the best neighbours of job X"
+            models.Index(fields=['job', '-score'], name='similarjob_job_score_idx'),
+        ]
+
+
+@receiver(post_save, sender=Job)
+def similar_jobs_signal(sender, instance, update_fields=None, **kwargs):
+    from .similar import TEXT_FIELDS, similar_jobs_queue
+    if update_fields is not None and not TEXT_FIELDS & set(update_fields):
+        return
+    job_id = instance.id
+    transaction.on_commit(lambda: similar_jobs_queue.job_saved(job_id))
+
+@receiver(pre_delete, sender=Job)
+def remember_similar_lists(sender, instance, **kwargs):
+    # The SimilarJob rows pointing at the job are gone by post_delete
+    instance._similar_lists = list(SimilarJob.objects.filter(similar=instance).values_list('job_id', flat=True))
+
+@receiver(post_delete, sender=Job)
+def remove_similar_job_signal(sender, instance, **kwargs):
+    from .similar import similar_jobs_queue
+    job_id, listed_in = instance.id, getattr(instance, '_similar_lists', [])
+    transaction.on_commit(lambda: similar_jobs_queue.job_deleted(job_id, listed_in))
+
+
+
+# ---------------------------------------------------------
+# 17. PEOPLE YOU MAY KNOW (see jobportal/suggestions.py)
+# ---------------------------------------------------------
+@receiver(post_save, sender=ConnectionRequest)
+def connection_suggestions_signal(sender, instance, **kwargs):
+    from .suggestions import connection_accepted, forget
+    a, b = instance.sender_id, instance.receiver_id
+    if instance.status == 'accepted' and getattr(instance, '_previous_status', None) != 'accepted':
+        transaction.on_commit(lambda: connection_accepted(a, b))
+    else:
+        # A pending / ignored request hides the two users from each other's suggestions
+        transaction.on_commit(lambda: forget(a, b))
+
+@receiver(post_delete, sender=ConnectionRequest)
+def connection_removed_suggestions_signal(sender, instance, **kwargs):
+    from .suggestions import connection_ids, forget
+    a, b = instance.sender_id, instance.receiver_id
+    if instance.status == 'accepted':
+        # Mutual counts through this connection are gone too
+        transaction.on_commit(lambda: forget(a, b, *connection_ids(a), *connection_ids(b)))
+    else:
+        transaction.on_commit(lambda: forget(a, b))
+
+@receiver(post_save, sender=Experience)
+@receiver(post_save, sender=Education)
+@receiver(post_delete, sender=Experience)
+@receiver(post_delete, sender=Education)
+def shared_background_changed_signal(sender, instance, **kwargs):
+    from .suggestions import forget
+    user_id = instance.user_id
+    transaction.on_commit(lambda: forget(user_id))
+
+
+# ---------------------------------------------------------
+# 18. INBOX (ThreadMembership rows, see jobportal/inbox.py)
+# ---------------------------------------------------------
+@receiver(m2m_changed, sender=MessageThread.participants.through)
+def thread_participants_signal(sender, instance, action, reverse, pk_set, **kwargs):
+    from .inbox import add_members, remove_members
+    if action == 'post_clear' and not reverse:
+        remove_members(instance.pk)
+    elif action in ('post_add', 'post_remove') and pk_set:
+        # reverse: user.threads.add(...), `instance` is the user
+        pairs = [(thread_id, [instance.pk]) for thread_id in pk_set] if reverse else [(instance.pk, pk_set)]
+        for thread_id, user_ids in pairs:
+            if action == 'post_add':
+                add_members(thread_id, user_ids)
+            else:
+                remove_members(thread_id, user_ids)
+
+@receiver(post_save, sender=Message)
+def message_sent_signal(sender, instance, created, **kwargs):
+    from .inbox import messages_sent
+    if created:
+        messages_sent([instance])
+
+@receiver(post_delete, sender=Message)
+def message_deleted_signal(sender, instance, **kwargs):
+    from .inbox import message_deleted
+    message_deleted(instance)
+
+
+# ---------------------------------------------------------
+# 19. USER STATS (sidebar / dashboard counts, see jobportal/stats.py)
+# ---------------------------------------------------------
+@receiver(post_save, sender=Application)
+@receiver(post_save, sender=SavedJob)
+@receiver(post_delete, sender=Application)
+@receiver(post_delete, sender=SavedJob)
+def user_stats_signal(sender, instance, **kwargs):
+    from .stats import forget
+    user_id = instance.user_id
+    transaction.on_commit(lambda: forget(user_id))
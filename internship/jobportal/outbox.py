@@ -0,0 +1,212 @@
+"""
+Job alert email outbox.
+
+Posting a job only writes a JobAlertOutbox row. This module drains those
+rows outside the request: the job is matched against saved JobAlerts,
+recipients are fetched in batches, every email goes
+over one reused mail connection, sending is capped per minute, and failures
+are retried with exponential backoff. Progress is stored on the row after
+every batch, so a crashed or retried run never emails the same user twice.
+
+Every email sent is recorded in JobAlertDelivery, the ledger the digests
+of digest.py use too: a user gets each matching job once, either here or
+in a later digest, never through both.
+"""
+
+import smtplib
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import JobAlertDelivery, JobAlertOutbox
+from .percolator import match_user_ids
+
+FROM_EMAIL = 'noreply@jobportal.com'
+
+# A row stuck in 'sending' longer than this belongs to a dead worker
+LOCK_TIMEOUT = timedelta(minutes=10)
+
+
+class RateLimiter:
+    """Blocks so that at most `per_minute` emails go out in any 60 s window."""
+
+    def __init__(self, per_minute, clock=time.monotonic, sleep=time.sleep):
+        self.per_minute = per_minute
+        self.clock = clock
+        self.sleep = sleep
+        self._sent = deque()
+
+    def wait(self):
+        if not self.per_minute:
+            return
+        now = self.clock()
+        while self._sent and now - self._sent[0] >= 60:
+            self._sent.popleft()
+        if len(self._sent) >= self.per_minute:
+            self.sleep(60 - (now - self._sent[0]))
+            self._sent.popleft()
+        self._sent.append(self.clock())
+
+
+def build_job_alert_email(job, user):
+    subject = f"🎯 New Job Posted: {job.title}"
+    message = f"""
+Hello {user.first_name or user.username},
+
+🎉 A new exciting job opportunity has been posted on JobPortal!
+
+{'─'*80}
+📌 JOB DETAILS:
+{'─'*80}
+Job Title:   {job.title}
+Company:     {job.company_name}
+Location:    {job.location}
+Job Type:    {job.job_type}
+Salary:      ${job.salary_min} - ${job.salary_max} (if available)
+{'─'*80}
+
+📝 DESCRIPTION:
+{job.description[:500]}...
+
+✨ Don't miss this opportunity! Login to JobPortal to view full details and apply now.
+
+Best regards,
+JobPortal Team
+"""
+    return EmailMessage(subject, message, FROM_EMAIL, [user.email])
+
+
+def get_recipients(user_ids):
+    """The users in `user_ids` that can receive email, in id order."""
+    return list(
+        User.objects.filter(id__in=user_ids, is_active=True, is_staff=False)
+        .exclude(email='')
+        .order_by('id')
+    )
+
+
+def backoff_delay(attempts, base_seconds=60):
+    """1, 2, 4, 8 ... minutes, capped at one hour."""
+    return timedelta(seconds=min(base_seconds * 2 ** (attempts - 1), 3600))
+
+
+def claim_due_items(limit=10):
+    """
+    Marks up to `limit` due rows as 'sending' and returns them.
+    The conditional UPDATE makes each row go to exactly one worker.
+    """
+    now = timezone.now()
+    due = JobAlertOutbox.objects.filter(
+        Q(status='pending', next_attempt_at__lte=now) |
+        Q(status='sending', locked_at__lt=now - LOCK_TIMEOUT)
+    ).order_by('id').values_list('id', flat=True)[:limit]
+
+    claimed = []
+    for item_id in list(due):
+        won = JobAlertOutbox.objects.filter(id=item_id).filter(
+            Q(status='pending') | Q(status='sending', locked_at__lt=now - LOCK_TIMEOUT)
+        ).update(status='sending', locked_at=now)
+        if won:
+            claimed.append(JobAlertOutbox.objects.select_related('job').get(id=item_id))
+    return claimed
+
+
+def _record_deliveries(job, users):
+    JobAlertDelivery.objects.bulk_create(
+        [JobAlertDelivery(user=user, job=job) for user in users], ignore_conflicts=True
+    )
+
+
+def drain_item(item, connection, limiter, batch_size=100, max_attempts=5):
+    """
+    Sends every remaining email for one outbox row.
+    Returns the number of emails sent by this call.
+    """
+    sent = 0
+    emailed = []
+    try:
+        # Only users whose job alerts match this job (see percolator.py)
+        user_ids = sorted(uid for uid in match_user_ids(item.job) if uid > item.last_recipient_id)
+
+        # Open once so send_messages() reuses the session for every email
+        connection.open()
+        while True:
+            batch_ids, user_ids = user_ids[:batch_size], user_ids[batch_size:]
+            if not batch_ids:
+                item.status = 'sent'
+                item.locked_at = None
+                item.save()
+                return sent
+
+            # Users a digest already told about this job
+            delivered = set(JobAlertDelivery.objects.filter(
+                job=item.job, user_id__in=batch_ids
+            ).values_list('user_id', flat=True))
+            for user in get_recipients(batch_ids):
+                if user.id in delivered:
+                    continue
+                limiter.wait()
+                try:
+                    connection.send_messages([build_job_alert_email(item.job, user)])
+                    item.sent_count += 1
+                    sent += 1
+                    emailed.append(user)
+                except smtplib.SMTPRecipientsRefused:
+                    # Bad address: skip this user, keep going
+                    item.failed_count += 1
+                item.last_recipient_id = user.id
+
+            _record_deliveries(item.job, emailed)
+            emailed = []
+            # Checkpoint after every batch
+            item.last_recipient_id = batch_ids[-1]
+            item.locked_at = timezone.now()
+            item.save(update_fields=['last_recipient_id', 'sent_count', 'failed_count', 'locked_at'])
+
+    except Exception as e:
+        # Connection-level problem: retry the rest of this row later. The
+        # users already emailed in this batch go into the ledger first, or a
+        # digest would email them again.
+        _record_deliveries(item.job, emailed)
+        item.attempts += 1
+        item.last_error = str(e)
+        item.locked_at = None
+        if item.attempts >= max_attempts:
+            item.status = 'failed'
+        else:
+            item.status = 'pending'
+            item.next_attempt_at = timezone.now() + backoff_delay(item.attempts)
+        item.save()
+        connection.close()
+        raise
+
+
+def drain_outbox(batch_size=100, per_minute=None, max_attempts=5, limiter=None):
+    """
+    Processes every due outbox row once. Returns (emails_sent, rows_failed).
+    """
+    if per_minute is None:
+        per_minute = getattr(settings, 'EMAIL_SEND_RATE_PER_MINUTE', 60)
+    limiter = limiter or RateLimiter(per_minute)
+    connection = get_connection()
+    sent = failed_rows = 0
+
+    try:
+        while True:
+            items = claim_due_items()
+            if not items:
+                break
+            for item in items:
+                try:
+                    sent += drain_item(item, connection, limiter, batch_size, max_attempts)
+                except Exception:
+                    failed_rows += 1
+    finally:
+        connection.close()
+    return sent, failed_rows
@@ -0,0 +1,127 @@
+"""
+Keyset (cursor) pagination helpers.
+Instead of OFFSET, each page remembers the sort key of its last row and the
+next page starts strictly after it, so every page costs one index range scan
+no matter how deep the user scrolls.
+"""
+
+import base64
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor string from the client cannot be decoded."""
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder rounds datetimes to milliseconds, which would make
+    # the cursor skip rows created within the same millisecond.
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    """
+    Packs the sort-key values of a row into an opaque URL-safe string.
+    """
+    raw = json.dumps(list(values), cls=_CursorEncoder)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Reverses encode_cursor(). Returns the list of raw (JSON) values.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {e}")
+    if not isinstance(values, list):
+        raise InvalidCursor("Malformed cursor")
+    return values
+
+
+def _resolve_field(model, path):
+    """
+    Follows a lookup path like 'receiver__first_name' to the final model field.
+    Returns None for annotations and other non-field names.
+    """
+    field = None
+    for part in path.split('__'):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if field.is_relation and field.related_model is not None:
+            model = field.related_model
+    return field
+
+
+def _value_for(obj, path):
+    """Reads a (possibly related or annotated) sort key from a row."""
+    value = obj
+    for part in path.split('__'):
+        value = getattr(value, part)
+        if value is None:
+            break
+    return value
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=10):
+    """
+    Returns (items, next_cursor) for one page of `queryset`.
+
+    `ordering` is a tuple like ('-created_at', '-id'). All keys must sort in
+    the same direction and the last key must be unique, so that
+    (key1, key2, ...) identifies a single row. A matching composite index is
+    what keeps the page cost flat.
+    next_cursor is None when there are no more rows.
+    """
+    descending = ordering[0].startswith('-')
+    fields = [name.lstrip('-') for name in ordering]
+    if any(name.startswith('-') != descending for name in ordering):
+        raise ValueError("keyset_page() needs every ordering key in the same direction")
+
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(fields):
+            raise InvalidCursor("Cursor does not match the page ordering")
+
+        # Turn the JSON values back into python values (e.g. ISO string -> datetime)
+        parsed = []
+        for name, value in zip(fields, values):
+            field = _resolve_field(queryset.model, name)
+            if field is not None and value is not None:
+                try:
+                    value = field.to_python(value)
+                except ValidationError as e:
+                    raise InvalidCursor(f"Bad cursor value for {name}: {e}")
+            parsed.append(value)
+
+        # (a, b) < (x, y)  ==  a < x OR (a = x AND b < y)
+        op = 'lt' if descending else 'gt'
+        after = Q()
+        for i, name in enumerate(fields):
+            step = Q(**{f"{name}__{op}": parsed[i]})
+            for prev_name, prev_value in zip(fields[:i], parsed[:i]):
+                step &= Q(**{prev_name: prev_value})
+            after |= step
+        queryset = queryset.filter(after)
+
+    # Fetch one extra row to know whether another page exists
+    rows = list(queryset.order_by(*ordering)[:page_size + 1])
+    items = rows[:page_size]
+
+    next_cursor = None
+    if len(rows) > page_size:
+        last = items[-1]
+        next_cursor = encode_cursor(_value_for(last, name) for name in fields)
+    return items, next_cursor
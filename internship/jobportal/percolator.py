@@ -0,0 +1,68 @@
+"""
+Percolator for job alerts.
+
+Rather than testing every JobAlert against a new job, alerts are stored as
+an inverted index (JobAlertTerm: token -> alert) and the job's own tokens
+are looked up in it. An alert matches when every one of its keyword tokens
+appears in the job's title, description or skills and every location token
+appears in the job's location. Cost grows with the number of index rows the
+job's tokens hit, not with the number of users or alerts.
+"""
+
+from django.db.models import Count, F, Q
+
+from .models import JobAlertTerm
+from .text import tokenize
+
+# Guards the size of the IN (...) list for very long descriptions
+MAX_JOB_TOKENS = 1000
+
+
+def alert_terms(alert):
+    """The (kind, term) pairs that describe one alert."""
+    terms = {('keyword', token) for token in tokenize(alert.keyword)}
+    terms.update(('location', token) for token in tokenize(alert.location))
+    return terms
+
+
+def index_alert(alert):
+    """(Re)builds the index rows of one alert. Called from the post_save signal."""
+    terms = alert_terms(alert)
+    JobAlertTerm.objects.filter(alert=alert).delete()
+    JobAlertTerm.objects.bulk_create([
+        JobAlertTerm(alert=alert, user_id=alert.user_id, kind=kind, term=term, required=len(terms))
+        for kind, term in terms
+    ])
+
+
+def job_terms(job):
+    """(keyword tokens, location tokens) of a job."""
+    words = tokenize(job.title) | tokenize(job.description) | tokenize(job.skills)
+    places = tokenize(job.location)
+    if job.is_remote:
+        places.add('remote')
+    return set(list(words)[:MAX_JOB_TOKENS]), places
+
+
+def match_alerts(job):
+    """
+    (alert_id, user_id) pairs for every alert whose terms are all present in `job`.
+    One GROUP BY over the index rows the job's tokens hit.
+    """
+    words, places = job_terms(job)
+    if not words:
+        return JobAlertTerm.objects.none().values_list('alert_id', 'user_id')
+
+    return (
+        JobAlertTerm.objects
+        .filter(Q(kind='keyword', term__in=words) | Q(kind='location', term__in=places))
+        .values('alert_id', 'user_id', 'required')
+        .annotate(hits=Count('*'))
+        .filter(hits=F('required'))
+        .values_list('alert_id', 'user_id')
+    )
+
+
+def match_user_ids(job):
+    """Ids of users with at least one alert matching `job`."""
+    return {user_id for _, user_id in match_alerts(job)}
@@ -0,0 +1,258 @@
+"""
+Real-time events over server-sent events (SSE).
+
+Code that changes a user's messages publishes a small JSON event to that
+user's channel ("user:<id>"). The async `events_stream` view keeps one
+open response per browser tab and writes every event of the user's channel
+to it. An idle connection is just a coroutine waiting on an asyncio.Queue,
+so one ASGI worker (internship/asgi.py) can hold thousands of them. Under
+plain WSGI every open stream would pin a worker thread.
+
+The broker is pluggable (settings.REALTIME_BROKER):
+
+    'local'  LocalBroker: subscribers live in this process. Only works
+             with a single worker (development, or one ASGI process): an
+             event published by one worker never reaches the streams held
+             by another.
+    'redis'  RedisBroker: events go through Redis pub/sub, so an event
+             published by any worker reaches the subscribers of every
+             worker (needs the `redis` package and REALTIME_REDIS_URL).
+             The default whenever REDIS_URL is set.
+
+check_workers() (called from internship/asgi.py) refuses to start several
+workers, as counted by WEB_CONCURRENCY, on the local broker.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per connection; a client this far behind loses the oldest
+QUEUE_SIZE = 100
+
+# Seconds between keep-alive comments on an idle stream
+KEEPALIVE_INTERVAL = getattr(settings, 'REALTIME_KEEPALIVE', 25)
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """One open stream: an asyncio.Queue on the event loop that serves it."""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, event):
+        # Runs on self.loop
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """The next event, or None after `timeout` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Interface of the realtime brokers."""
+
+    def publish(self, channel, event):
+        """Sends `event` (a JSON-serializable dict) to every subscriber of `channel`."""
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """A Subscription for `channel`; must be called from the event loop."""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class LocalBroker(Broker):
+    """Subscribers of this process only. publish() may be called from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Its event loop is gone (worker shutting down)
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+class RedisBroker(LocalBroker):
+    """
+    Publishes through Redis; one listener thread per process receives every
+    event and hands it to the local subscribers.
+    """
+
+    PREFIX = 'jobportal:realtime:'
+
+    # Seconds before reconnecting after Redis went away, doubled per failure
+    RECONNECT_DELAY = 1
+    MAX_RECONNECT_DELAY = 30
+
+    def __init__(self, url=None):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("REALTIME_BROKER = 'redis' needs the redis package (pip install redis)")
+        self._errors = (redis.ConnectionError, redis.TimeoutError)
+        self._redis = redis.Redis.from_url(url or getattr(settings, 'REALTIME_REDIS_URL', 'redis://localhost:6379/0'))
+        self._listener = None
+
+    def publish(self, channel, event):
+        self._redis.publish(self.PREFIX + channel, json.dumps(event))
+
+    def subscribe(self, channel):
+        self._start_listener()
+        return super().subscribe(channel)
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='realtime-redis', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        """
+        Relays every event to the local subscribers, reconnecting (with
+        backoff) whenever the Redis connection drops. Events published while
+        disconnected are lost; the streams stay open and get the next ones.
+        """
+        delay = self.RECONNECT_DELAY
+        try:
+            while True:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                try:
+                    pubsub.psubscribe(self.PREFIX + '*')
+                    delay = self.RECONNECT_DELAY
+                    for message in pubsub.listen():
+                        self._relay(message)
+                except self._errors:
+                    logger.warning("Realtime Redis connection lost, reconnecting in %s s", delay, exc_info=True)
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+                finally:
+                    pubsub.close()
+        except Exception:
+            logger.exception("Realtime Redis listener stopped")
+        finally:
+            # The next subscribe() starts a new listener
+            with self._lock:
+                self._listener = None
+
+    def _relay(self, message):
+        try:
+            channel = message['channel'].decode()[len(self.PREFIX):]
+            LocalBroker.publish(self, channel, json.loads(message['data']))
+        except (ValueError, KeyError, AttributeError):
+            logger.warning("Ignoring malformed realtime message %r", message)
+
+
+BROKERS = {
+    'local': LocalBroker,
+    'redis': RedisBroker,
+}
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            name = getattr(settings, 'REALTIME_BROKER', 'local')
+            if name not in BROKERS:
+                raise ImproperlyConfigured(f"Unknown REALTIME_BROKER {name!r} (choose from {', '.join(BROKERS)})")
+            _broker = BROKERS[name]()
+        return _broker
+
+
+def check_workers():
+    """
+    Raises ImproperlyConfigured if WEB_CONCURRENCY (the worker count gunicorn
+    and most hosts read) asks for more than one worker on the local broker.
+    """
+    try:
+        workers = int(os.environ.get('WEB_CONCURRENCY') or 1)
+    except ValueError:
+        workers = 1
+    if workers > 1 and getattr(settings, 'REALTIME_BROKER', 'local') == 'local':
+        raise ImproperlyConfigured(
+            f"WEB_CONCURRENCY={workers} with REALTIME_BROKER = 'local': live events would only reach "
+            "streams held by the worker that published them. Set REDIS_URL (or REALTIME_BROKER = 'redis')."
+        )
+
+
+def publish_to_users(user_ids, event):
+    """Sends `event` to every open stream of `user_ids`."""
+    broker = get_broker()
+    for user_id in user_ids:
+        broker.publish(user_channel(user_id), event)
+
+
+def format_event(event):
+    """One SSE frame: the event type as `event:`, the rest as JSON `data:`."""
+    event = dict(event)
+    kind = event.pop('type', 'message')
+    return f"event: {kind}\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(user_id):
+    """Async iterator of SSE frames for one connection of `user_id`."""
+    subscription = get_broker().subscribe(user_channel(user_id))
+    try:
+        # Tells EventSource how long to wait before reconnecting (ms)
+        yield "retry: 3000\n\n"
+        while True:
+            event = await subscription.get(KEEPALIVE_INTERVAL)
+            # A comment line keeps proxies from closing an idle stream
+            yield format_event(event) if event is not None else ": keepalive\n\n"
+    finally:
+        subscription.close()
@@ -0,0 +1,337 @@
+"""
+Full-text search for the search page.
+
+The backend is chosen from the database vendor:
+
+- SQLite: one FTS5 virtual table per result type, ranked with bm25()
+- PostgreSQL: one side table per result type holding a weighted tsvector,
+  GIN indexed, ranked with ts_rank()
+- anything else: the old icontains filters (unranked, no index)
+
+Each query word is matched as a word prefix ("dev" finds "developer") and
+words are OR-ed, like the old search. Index rows are kept current by the
+signals in models.py; `manage.py rebuild_search_index` rebuilds them all.
+"""
+
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db.models import Count, Q
+
+# Result type -> index table and (column, weight) list.
+# A = title-like fields, B = secondary fields, C = long text.
+INDEXES = {
+    'jobs': {
+        'table': 'jobportal_job_search',
+        'columns': [('title', 'A'), ('company_name', 'B'), ('skills', 'B'), ('location', 'B'), ('description', 'C')],
+        'source': """
+            SELECT j.id AS id, j.title AS title, c.company_name AS company_name,
+                   COALESCE(j.skills, '') AS skills, j.location AS location, j.description AS description
+            FROM jobportal_job j JOIN jobportal_company c ON c.id = j.company_id
+        """,
+        'id_column': 'j.id',
+    },
+    'companies': {
+        'table': 'jobportal_company_search',
+        'columns': [('company_name', 'A'), ('industry', 'B'), ('location', 'B')],
+        'source': """
+            SELECT c.id AS id, c.company_name AS company_name, c.industry AS industry, c.location AS location
+            FROM jobportal_company c
+        """,
+        'id_column': 'c.id',
+    },
+    'people': {
+        'table': 'jobportal_user_search',
+        'columns': [('username', 'A'), ('first_name', 'A'), ('last_name', 'A'), ('headline', 'B')],
+        'source': """
+            SELECT u.id AS id, u.username AS username, u.first_name AS first_name,
+                   u.last_name AS last_name, COALESCE(p.headline, '') AS headline
+            FROM auth_user u LEFT JOIN jobportal_userprofile p ON p.user_id = u.id
+        """,
+        'id_column': 'u.id',
+    },
+}
+
+# Longer queries are cut to this many words
+MAX_QUERY_WORDS = 10
+
+# Every match is ranked, but only the best this-many are kept and paged
+# through. Result counts are capped at this number too ("2000+").
+MAX_CANDIDATES = getattr(settings, 'SEARCH_MAX_RESULTS', 2000)
+
+# Facet values shown per field (most common first)
+FACET_SIZE = 10
+
+WORD_RE = re.compile(r"\w+")
+
+
+def query_words(query):
+    return WORD_RE.findall(query.lower())[:MAX_QUERY_WORDS]
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+class SearchBackend:
+    """Interface shared by the backends. Every method works on id lists."""
+
+    # How the database spells "no limit" in LIMIT ... OFFSET
+    NO_LIMIT = 'ALL'
+
+    def __init__(self, connection=None):
+        self.connection = connection or default_connection
+
+    def install(self):
+        """Creates the index tables (called from the migration)."""
+
+    def uninstall(self):
+        """Drops the index tables."""
+        with self.connection.cursor() as cursor:
+            for spec in INDEXES.values():
+                cursor.execute(f"DROP TABLE IF EXISTS {spec['table']}")
+
+    def rebuild(self):
+        """Reindexes every row of every result type."""
+        for kind in INDEXES:
+            self.update(kind)
+
+    def update(self, kind, ids=None):
+        """Reindexes the rows in `ids` (all rows if None)."""
+
+    def remove(self, kind, ids):
+        """Drops the rows in `ids` from the index."""
+
+    def search(self, kind, query, limit=None, offset=0):
+        """Ids matching `query`, best match first."""
+        raise NotImplementedError
+
+    def _source(self, kind, ids):
+        spec = INDEXES[kind]
+        if ids is None:
+            return spec['source'], []
+        return f"{spec['source']} WHERE {spec['id_column']} IN ({_placeholders(ids)})", list(ids)
+
+    def _delete(self, kind, id_column, ids):
+        table = INDEXES[kind]['table']
+        with self.connection.cursor() as cursor:
+            if ids is None:
+                cursor.execute(f"DELETE FROM {table}")
+            elif ids:
+                cursor.execute(f"DELETE FROM {table} WHERE {id_column} IN ({_placeholders(ids)})", list(ids))
+
+    def _page(self, limit, offset):
+        if limit is None and not offset:
+            return "", []
+        if limit is None:
+            return f" LIMIT {self.NO_LIMIT} OFFSET %s", [offset]
+        return " LIMIT %s OFFSET %s", [limit, offset]
+
+
+class SQLiteFTSBackend(SearchBackend):
+    NO_LIMIT = '-1'
+
+    # bm25() column weights for the A/B/C groups
+    WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 1.0}
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            for spec in INDEXES.values():
+                columns = ', '.join(column for column, _ in spec['columns'])
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {spec['table']} "
+                    f"USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')"
+                )
+
+    def update(self, kind, ids=None):
+        spec = INDEXES[kind]
+        if ids is not None:
+            ids = list(ids)
+            if not ids:
+                return
+        self._delete(kind, 'rowid', ids)
+        columns = ', '.join(column for column, _ in spec['columns'])
+        source, params = self._source(kind, ids)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {spec['table']} (rowid, {columns}) SELECT id, {columns} FROM ({source})",
+                params,
+            )
+
+    def remove(self, kind, ids):
+        self._delete(kind, 'rowid', list(ids))
+
+    def match_expression(self, query):
+        words = query_words(query)
+        if not words:
+            return None
+        return ' OR '.join(f'"{word}"*' for word in words)
+
+    def search(self, kind, query, limit=None, offset=0):
+        expression = self.match_expression(query)
+        if expression is None:
+            return []
+        spec = INDEXES[kind]
+        weights = ', '.join(str(self.WEIGHTS[weight]) for _, weight in spec['columns'])
+        page, page_params = self._page(limit, offset)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id FROM ("
+                f"  SELECT rowid AS id, bm25({spec['table']}, {weights}) AS score FROM {spec['table']}"
+                f"  WHERE {spec['table']} MATCH %s ORDER BY score, id DESC LIMIT %s"
+                f") ORDER BY score, id DESC{page}",
+                [expression, MAX_CANDIDATES] + page_params,
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresFTSBackend(SearchBackend):
+    CONFIG = 'simple'
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            for spec in INDEXES.values():
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {spec['table']} (id bigint PRIMARY KEY, document tsvector NOT NULL)"
+                )
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {spec['table']}_gin ON {spec['table']} USING GIN (document)"
+                )
+
+    def update(self, kind, ids=None):
+        spec = INDEXES[kind]
+        if ids is not None:
+            ids = list(ids)
+            if not ids:
+                return
+        document = ' || '.join(
+            f"setweight(to_tsvector('{self.CONFIG}', COALESCE(src.{column}, '')), '{weight}')"
+            for column, weight in spec['columns']
+        )
+        source, params = self._source(kind, ids)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {spec['table']} (id, document) SELECT src.id, {document} FROM ({source}) src "
+                f"ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document",
+                params,
+            )
+
+    def remove(self, kind, ids):
+        self._delete(kind, 'id', list(ids))
+
+    def rebuild(self):
+        for kind in INDEXES:
+            self._delete(kind, 'id', None)
+            self.update(kind)
+
+    def tsquery(self, query):
+        words = query_words(query)
+        if not words:
+            return None
+        return ' | '.join(f"{word}:*" for word in words)
+
+    def search(self, kind, query, limit=None, offset=0):
+        tsquery = self.tsquery(query)
+        if tsquery is None:
+            return []
+        table = INDEXES[kind]['table']
+        page, page_params = self._page(limit, offset)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id FROM ("
+                f"  SELECT s.id, ts_rank(s.document, q) AS score FROM {table} s, to_tsquery('{self.CONFIG}', %s) q"
+                f"  WHERE s.document @@ q ORDER BY score DESC, s.id DESC LIMIT %s"
+                f") candidates ORDER BY score DESC, id DESC{page}",
+                [tsquery, MAX_CANDIDATES] + page_params,
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class IcontainsBackend(SearchBackend):
+    """Fallback for other databases: the original substring filters, no index."""
+
+    def uninstall(self):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def filter_for(self, kind, query):
+        from django.contrib.auth.models import User
+        from .models import Company, Job
+
+        fields = {
+            'people': (User, ['username', 'first_name', 'last_name', 'userprofile__headline']),
+            'companies': (Company, ['company_name', 'industry', 'location']),
+            'jobs': (Job, ['title', 'description', 'company__company_name', 'location', 'skills']),
+        }
+        model, lookups = fields[kind]
+        condition = Q()
+        for word in query.split() + [query]:
+            for lookup in lookups:
+                condition |= Q(**{f'{lookup}__icontains': word})
+        return model.objects.filter(condition).distinct()
+
+    def search(self, kind, query, limit=None, offset=0):
+        if not query.strip():
+            return []
+        ids = self.filter_for(kind, query).order_by('-id').values_list('id', flat=True)
+        return list(ids[offset:offset + (limit if limit is not None else MAX_CANDIDATES)])
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresFTSBackend,
+}
+
+
+def get_backend(connection=None):
+    connection = connection or default_connection
+    return BACKENDS.get(connection.vendor, IcontainsBackend)(connection)
+
+
+def search(kind, query, limit=None, offset=0):
+    """
+    Ids of `kind` ('people', 'companies' or 'jobs') matching `query`, best first.
+    At most MAX_CANDIDATES ids are returned.
+    """
+    return get_backend().search(kind, query, limit, offset)
+
+
+def update_index(kind, ids):
+    get_backend().update(kind, ids)
+
+
+def remove_from_index(kind, ids):
+    get_backend().remove(kind, ids)
+
+
+def job_facets(job_ids):
+    """
+    job_type, remote, location and industry counts over `job_ids`,
+    folded from a single grouped query. Each facet is a list of (value, count).
+    """
+    from .models import Job
+
+    facets = {'job_type': Counter(), 'is_remote': Counter(), 'location': Counter(), 'industry': Counter()}
+    rows = (
+        Job.objects.filter(id__in=job_ids)
+        .values('job_type', 'is_remote', 'location', 'company__industry')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        facets['job_type'][row['job_type']] += row['count']
+        facets['is_remote'][row['is_remote']] += row['count']
+        facets['location'][row['location']] += row['count']
+        if row['company__industry']:
+            facets['industry'][row['company__industry']] += row['count']
+    return {name: counter.most_common(FACET_SIZE) for name, counter in facets.items()}
+
+
+def in_rank_order(queryset, ids):
+    """Loads `ids` from `queryset` and returns them as a list in the same order."""
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
@@ -0,0 +1,379 @@
+"""
+Similar jobs for the job page.
+
+Every job is a TF-IDF vector over the words of its title, skills and
+description (title words count 3x, skills 2x). Its SIMILAR_JOBS_K nearest
+jobs by cosine similarity are stored as SimilarJob rows, so job_detail_view
+reads them with one indexed query.
+
+Similarities are computed with NumPy over an inverted index (term -> jobs
+and weights): one job's scores against every other job are a gather over
+the postings of its terms plus np.bincount.
+
+The index is process-local and built lazily, never inside a request: the
+Job signals in models.py only queue ids on `similar_jobs_queue`, and its
+background thread applies them a few seconds later. A posted or edited
+job's vector is computed against the current index, its own list is
+rewritten and it is inserted into the lists of the jobs it now beats; lists
+that lost an entry (edit or delete) are recomputed. A job page that finds
+no list queues its job too. IDF weights drift as jobs are added, so
+`manage.py rebuild_similar_jobs` recomputes every list from scratch.
+"""
+
+import atexit
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Min, Q
+
+from .text import words
+
+logger = logging.getLogger(__name__)
+
+# Neighbours stored per job
+K = getattr(settings, 'SIMILAR_JOBS_K', 10)
+
+# Saving a Job with update_fields outside these does not change its vector
+TEXT_FIELDS = {'title', 'description', 'skills'}
+
+# Terms found in more than this share of jobs carry no signal and are
+# dropped (only once there are MIN_DOCS_FOR_MAX_DF jobs)
+MAX_DF = 0.5
+MIN_DOCS_FOR_MAX_DF = 100
+
+# A new job is offered to the lists of this many of its best matches
+REVERSE_CANDIDATES = 200
+
+# Incremental updates kept beside the index before it is rebuilt
+MAX_PENDING = 500
+
+BATCH_SIZE = 5000
+
+# Seconds between runs of the background updater
+UPDATE_INTERVAL = getattr(settings, 'SIMILAR_JOBS_UPDATE_INTERVAL', 5)
+
+
+def term_counts(title, description, skills):
+    counts = Counter()
+    for text, weight in ((title, 3), (skills, 2), (description, 1)):
+        for word in words(text):
+            counts[word] += weight
+    return counts
+
+
+def top_k(job_ids, scores, exclude_id, k):
+    """The `k` best (job_id, score) pairs with a positive score, best first."""
+    keep = (scores > 0) & (job_ids != exclude_id)
+    job_ids, scores = job_ids[keep], scores[keep]
+    if len(scores) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+        job_ids, scores = job_ids[best], scores[best]
+    order = np.lexsort((job_ids, -scores))
+    return list(zip(job_ids[order].tolist(), scores[order].tolist()))
+
+
+class SimilarityIndex:
+
+    def __init__(self, max_age=3600):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._built_at = None
+
+    def build(self, rows=None):
+        """Indexes `rows` of (job_id, title, description, skills); all jobs if None."""
+        if rows is None:
+            from .models import Job
+            rows = Job.objects.order_by('id').values_list('id', 'title', 'description', 'skills')
+        docs = [(job_id, term_counts(title, description, skills)) for job_id, title, description, skills in rows]
+
+        df = Counter()
+        for _, counts in docs:
+            df.update(counts.keys())
+        n = len(docs)
+        limit = MAX_DF * n if n >= MIN_DOCS_FOR_MAX_DF else n
+        vocab = {}
+        for term, count in df.items():
+            if count <= limit:
+                vocab[term] = len(vocab)
+        idf = np.zeros(len(vocab))
+        for term, column in vocab.items():
+            idf[column] = math.log((1 + n) / (1 + df[term])) + 1
+
+        vectors = [self._weigh(counts, vocab, idf) for _, counts in docs]
+
+        # Inverted index: the postings of term t are post_*[indptr[t]:indptr[t + 1]]
+        lengths = np.array([len(columns) for columns, _ in vectors], dtype=np.int64)
+        columns = np.concatenate([c for c, _ in vectors] + [np.zeros(0, dtype=np.int64)])
+        weights = np.concatenate([w for _, w in vectors] + [np.zeros(0)])
+        order = np.argsort(columns, kind='stable')
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(columns, minlength=len(vocab)))
+
+        with self._lock:
+            self.job_ids = np.array([job_id for job_id, _ in docs], dtype=np.int64)
+            self.positions = {job_id: i for i, (job_id, _) in enumerate(docs)}
+            self.vocab, self.idf, self.vectors = vocab, idf, vectors
+            self.indptr = indptr
+            self.post_docs = np.repeat(np.arange(n), lengths)[order]
+            self.post_weights = weights[order]
+            self.active = np.ones(n, dtype=bool)
+            self.pending = {}   # job_id -> vector, for jobs saved since the build
+            self._built_at = time.monotonic()
+
+    @staticmethod
+    def _weigh(counts, vocab, idf):
+        """(sorted columns, L2-normalized sublinear TF-IDF weights)."""
+        pairs = sorted((vocab[term], count) for term, count in counts.items() if term in vocab)
+        columns = np.array([column for column, _ in pairs], dtype=np.int64)
+        if not pairs:
+            return columns, np.zeros(0)
+        tf = np.array([count for _, count in pairs], dtype=float)
+        weights = (1 + np.log(tf)) * idf[columns]
+        return columns, weights / np.linalg.norm(weights)
+
+    def _ensure_fresh(self):
+        if (self._built_at is None or time.monotonic() - self._built_at > self.max_age
+                or len(self.pending) > MAX_PENDING):
+            self.build()
+
+    def vector(self, job_id):
+        with self._lock:
+            if job_id in self.pending:
+                return self.pending[job_id]
+            position = self.positions.get(job_id)
+            return self.vectors[position] if position is not None and self.active[position] else None
+
+    def upsert(self, job_id, title, description, skills):
+        """Re-vectorizes one job against the current IDF weights."""
+        self._ensure_fresh()
+        counts = term_counts(title, description, skills)
+        with self._lock:
+            # Words new since the build get the weight of a word seen in one job
+            new_terms = [term for term in counts if term not in self.vocab]
+            if new_terms:
+                rare = math.log((1 + len(self.job_ids)) / 2) + 1
+                for term in new_terms:
+                    self.vocab[term] = len(self.vocab)
+                self.idf = np.concatenate([self.idf, np.full(len(new_terms), rare)])
+            vector = self._weigh(counts, self.vocab, self.idf)
+            position = self.positions.get(job_id)
+            if position is not None:
+                self.active[position] = False
+            self.pending[job_id] = vector
+
+    def remove(self, job_id):
+        if self._built_at is None:
+            return
+        with self._lock:
+            position = self.positions.get(job_id)
+            if position is not None:
+                self.active[position] = False
+            self.pending.pop(job_id, None)
+
+    def similarities(self, vector):
+        """(job_ids, cosine scores) of every indexed job against `vector`."""
+        columns, weights = vector
+        with self._lock:
+            # Words added after the build have no postings
+            indexed = columns < len(self.indptr) - 1
+            lengths = np.zeros(len(columns), dtype=np.int64)
+            lengths[indexed] = self.indptr[columns[indexed] + 1] - self.indptr[columns[indexed]]
+            starts = self.indptr[np.minimum(columns, len(self.indptr) - 1)]
+            offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+            scores = np.bincount(
+                self.post_docs[offsets],
+                weights=np.repeat(weights, lengths) * self.post_weights[offsets],
+                minlength=len(self.job_ids),
+            )
+            scores[~self.active] = 0
+            job_ids = self.job_ids
+
+            # Jobs saved since the build: plain sparse dot products
+            pending_ids = np.fromiter(self.pending, dtype=np.int64, count=len(self.pending))
+            pending_scores = np.zeros(len(pending_ids))
+            for i, (other_columns, other_weights) in enumerate(self.pending.values()):
+                _, mine, theirs = np.intersect1d(columns, other_columns, assume_unique=True, return_indices=True)
+                pending_scores[i] = weights[mine] @ other_weights[theirs]
+        return np.concatenate([job_ids, pending_ids]), np.concatenate([scores, pending_scores])
+
+    def neighbours(self, job_id, k=K):
+        vector = self.vector(job_id)
+        if vector is None:
+            return []
+        job_ids, scores = self.similarities(vector)
+        return top_k(job_ids, scores, job_id, k)
+
+
+similarity_index = SimilarityIndex(max_age=getattr(settings, 'SIMILAR_JOBS_INDEX_MAX_AGE', 3600))
+
+
+def rebuild_similar_jobs(k=K):
+    """
+    Recomputes the neighbour list of every job from a fresh index.
+    Returns the number of SimilarJob rows written.
+    """
+    from .models import SimilarJob as model
+
+    index = SimilarityIndex()
+    index.build()
+    batch, written = [], 0
+    with transaction.atomic():
+        model.objects.all().delete()
+        for job_id in index.job_ids.tolist():
+            batch.extend(model(job_id=job_id, similar_id=other, score=score)
+                         for other, score in index.neighbours(job_id, k))
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        model.objects.bulk_create(batch)
+    return written + len(batch)
+
+
+def refill_lists(job_ids):
+    """Recomputes the lists of `job_ids` that hold fewer than K entries."""
+    from .models import SimilarJob
+
+    sizes = dict(
+        SimilarJob.objects.filter(job_id__in=job_ids).values('job_id').annotate(size=Count('id')).values_list('job_id', 'size')
+    )
+    short = [job_id for job_id in job_ids if sizes.get(job_id, 0) < K]
+    if not short:
+        return
+    with transaction.atomic():
+        SimilarJob.objects.filter(job_id__in=short).delete()
+        SimilarJob.objects.bulk_create([
+            SimilarJob(job_id=job_id, similar_id=other, score=score)
+            for job_id in short for other, score in similarity_index.neighbours(job_id, K)
+        ])
+
+
+def update_similar_jobs(job_id):
+    """Rewrites the neighbour lists touched by posting or editing one job."""
+    from .models import Job, SimilarJob
+
+    row = Job.objects.filter(id=job_id).values_list('title', 'description', 'skills').first()
+    if row is None:
+        return
+    similarity_index.upsert(job_id, *row)
+    job_ids, scores = similarity_index.similarities(similarity_index.vector(job_id))
+
+    with transaction.atomic():
+        # Lists the job was in before the edit
+        listed_in = set(SimilarJob.objects.filter(similar_id=job_id).values_list('job_id', flat=True))
+        SimilarJob.objects.filter(Q(job_id=job_id) | Q(similar_id=job_id)).delete()
+        SimilarJob.objects.bulk_create(
+            [SimilarJob(job_id=job_id, similar_id=other, score=score) for other, score in top_k(job_ids, scores, job_id, K)]
+        )
+
+        # Cosine similarity is symmetric: offer the job to the lists of its best matches
+        candidates = dict(top_k(job_ids, scores, job_id, REVERSE_CANDIDATES))
+        lists = {
+            other: (size, lowest)
+            for other, size, lowest in SimilarJob.objects.filter(job_id__in=candidates)
+            .values('job_id').annotate(size=Count('id'), lowest=Min('score')).values_list('job_id', 'size', 'lowest')
+        }
+        joined = [other for other, score in candidates.items()
+                  if other not in lists or lists[other][0] < K or score > lists[other][1]]
+        SimilarJob.objects.bulk_create(
+            [SimilarJob(job_id=other, similar_id=job_id, score=candidates[other]) for other in joined]
+        )
+
+        # Lists that were already full drop their last entry
+        full = [other for other in joined if other in lists and lists[other][0] >= K]
+        if full:
+            drop = []
+            rows = SimilarJob.objects.filter(job_id__in=full).order_by('job_id', '-score').values_list('job_id', 'id')
+            for _, group in groupby(rows, key=itemgetter(0)):
+                drop.extend(pk for _, pk in list(group)[K:])
+            SimilarJob.objects.filter(id__in=drop).delete()
+
+        # Lists the job dropped out of are one short now
+        refill_lists(listed_in - set(joined))
+
+
+def remove_similar_job(job_id, listed_in):
+    """A job was deleted; refills the lists (`listed_in`) it was part of."""
+    similarity_index.remove(job_id)
+    refill_lists(set(listed_in) - {job_id})
+
+
+class UpdateQueue:
+    """
+    Job ids saved or deleted since the last run. A daemon thread (started
+    on the first job) applies them every `interval` seconds, and once more
+    when the process exits, so building the index never holds up a request.
+    """
+
+    def __init__(self, interval=UPDATE_INTERVAL):
+        self.interval = interval
+        self._saved = set()
+        self._removed = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        atexit.register(self.run)
+
+    def job_saved(self, job_id):
+        with self._lock:
+            self._saved.add(job_id)
+        self._start_thread()
+
+    def job_deleted(self, job_id, listed_in):
+        with self._lock:
+            self._saved.discard(job_id)
+            self._removed[job_id] = listed_in
+        self._start_thread()
+
+    def run(self):
+        """Applies everything queued so far."""
+        with self._lock:
+            saved, self._saved = self._saved, set()
+            removed, self._removed = self._removed, {}
+        for job_id, listed_in in removed.items():
+            self._apply(remove_similar_job, job_id, listed_in)
+        for job_id in sorted(saved):
+            self._apply(update_similar_jobs, job_id)
+
+    @staticmethod
+    def _apply(function, *args):
+        # A failed update is dropped, not retried: rebuild_similar_jobs repairs the lists
+        try:
+            function(*args)
+        except Exception:
+            logger.exception("Similar jobs: %s%r failed", function.__name__, args)
+
+    def _start_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True, name='similar jobs updater')
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            close_old_connections()
+            self.run()
+
+
+similar_jobs_queue = UpdateQueue()
+
+
+def similar_jobs(job, limit=3):
+    """The `limit` most similar jobs to `job` (one indexed query)."""
+    from .models import SimilarJob
+
+    entries = SimilarJob.objects.filter(job=job).select_related('similar__company').order_by('-score')[:limit]
+    if not entries and job.id not in getattr(similarity_index, 'pending', ()):
+        # Not computed yet (or nothing similar): worked out in the background
+        similar_jobs_queue.job_saved(job.id)
+    return [entry.similar for entry in entries]
@@ -0,0 +1,197 @@
+"""
+Canonical skills.
+
+Job.skills and UserProfile.skills stay free text (that is what the forms
+edit), but every save also writes the matching Skill rows into JobSkill /
+ProfileSkill. Spellings are folded through SkillAlias ("js" -> javascript),
+so match scores compare ids with indexed joins instead of splitting and
+scanning strings.
+"""
+
+import re
+
+from .matching import candidate_matrix, job_matrix
+from .models import JobSkill, ProfileSkill, Skill, SkillAlias, UserProfile
+
+# Seeded by migration 0020; more can be added as SkillAlias rows in the admin
+DEFAULT_ALIASES = {
+    'js': 'javascript',
+    'es6': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'python3': 'python',
+    'reactjs': 'react',
+    'react.js': 'react',
+    'vuejs': 'vue',
+    'vue.js': 'vue',
+    'angularjs': 'angular',
+    'node': 'node.js',
+    'nodejs': 'node.js',
+    'postgres': 'postgresql',
+    'mongo': 'mongodb',
+    'k8s': 'kubernetes',
+    'golang': 'go',
+    'ml': 'machine learning',
+    'cpp': 'c++',
+    'csharp': 'c#',
+    'amazon web services': 'aws',
+    'ms excel': 'excel',
+}
+
+
+def split_skills(skill_text):
+    """
+    Splits a skill string by Commas (,) OR Newlines (Enter key).
+    This handles cases where you pasted a list or pressed Enter between skills.
+    """
+    if not skill_text:
+        return []
+
+    # [,\n\r]+  -> Means "Split whenever you find a comma OR a new line"
+    skills = re.split(r'[,\n\r]+', skill_text)
+
+    # Clean up each skill (remove extra spaces)
+    return [s.strip() for s in skills if s.strip()]
+
+
+def normalize_skill(skill):
+    """
+    Standardizes a skill for comparison:
+    - "Sketch." -> "sketch" (Removes dots)
+    - "Python"  -> "python" (Case insensitive)
+    - " C++ "   -> "c++"    (Removes spaces)
+    """
+    if not skill:
+        return ""
+    # Lowercase, trailing punctuation (. or ,) removed, inner spaces collapsed
+    return ' '.join(skill.lower().split()).rstrip('.,')[:100]
+
+
+_alias_cache = None
+
+
+def get_aliases():
+    """{alias: canonical name}, loaded once per process."""
+    global _alias_cache
+    if _alias_cache is None:
+        _alias_cache = dict(SkillAlias.objects.values_list('alias', 'skill__name'))
+    return _alias_cache
+
+
+def clear_alias_cache():
+    global _alias_cache
+    _alias_cache = None
+
+
+def canonical_names(skill_text, aliases=None):
+    """Canonical names of the skills in a free-text list, in order, without repeats."""
+    if aliases is None:
+        aliases = get_aliases()
+    names = []
+    for skill in split_skills(skill_text):
+        name = normalize_skill(skill)
+        name = aliases.get(name, name)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def get_skill_ids(names):
+    """Skill ids for `names` (same order), creating the missing Skill rows."""
+    if not names:
+        return []
+    ids = dict(Skill.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = [name for name in names if name not in ids]
+    if missing:
+        Skill.objects.bulk_create([Skill(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(Skill.objects.filter(name__in=missing).values_list('name', 'id'))
+    return [ids[name] for name in names]
+
+
+def _sync(through, owner_field, owner_id, skill_text):
+    wanted = set(get_skill_ids(canonical_names(skill_text)))
+    current = set(through.objects.filter(**{owner_field: owner_id}).values_list('skill_id', flat=True))
+
+    if current - wanted:
+        through.objects.filter(**{owner_field: owner_id}, skill_id__in=current - wanted).delete()
+    if wanted - current:
+        through.objects.bulk_create(
+            [through(**{owner_field: owner_id, 'skill_id': skill_id}) for skill_id in wanted - current],
+            ignore_conflicts=True,
+        )
+
+
+def sync_job_skills(job):
+    """Rewrites the JobSkill rows of `job` from job.skills (only the difference)."""
+    _sync(JobSkill, 'job_id', job.id, job.skills)
+    job_matrix.mark_dirty(job.id)
+
+
+def sync_profile_skills(profile):
+    """Rewrites the ProfileSkill rows of `profile` from profile.skills (only the difference)."""
+    _sync(ProfileSkill, 'profile_id', profile.id, profile.skills)
+    candidate_matrix.mark_dirty(profile.user_id)
+
+
+def add_profile_skill(profile, skill_text):
+    """
+    Adds the skills in `skill_text` (one, or a comma / newline separated
+    list) to a profile. Returns False if the profile already has all of
+    them (under any spelling).
+    """
+    aliases = get_aliases()
+    names = canonical_names(skill_text, aliases)
+    if not names:
+        return False
+    ids = dict(zip(names, get_skill_ids(names)))
+    existing = set(ProfileSkill.objects.filter(profile=profile, skill_id__in=ids.values()).values_list('skill_id', flat=True))
+    new = [name for name in names if ids[name] not in existing]
+    if not new:
+        return False
+    ProfileSkill.objects.bulk_create(
+        [ProfileSkill(profile=profile, skill_id=ids[name]) for name in new], ignore_conflicts=True
+    )
+    candidate_matrix.mark_dirty(profile.user_id)
+
+    # Keep the text the profile form edits in step, without re-running the sync signal:
+    # the first spelling typed for each new skill
+    added = []
+    for skill in split_skills(skill_text):
+        name = canonical_names(skill, aliases)[:1]
+        if name and name[0] in new:
+            new.remove(name[0])
+            added.append(skill)
+    profile.skills = ",".join(filter(None, [profile.skills] + added))
+    UserProfile.objects.filter(pk=profile.pk).update(skills=profile.skills)
+    return True
+
+
+def remove_profile_skill(profile, skill_name):
+    """Removes one skill (every spelling of it) from a profile. Returns False if it was not there."""
+    names = canonical_names(skill_name)
+    deleted, _ = ProfileSkill.objects.filter(profile=profile, skill__name__in=names).delete()
+    if not deleted:
+        return False
+    candidate_matrix.mark_dirty(profile.user_id)
+
+    aliases = get_aliases()
+    kept = [skill for skill in split_skills(profile.skills) if canonical_names(skill, aliases)[:1] != names[:1]]
+    profile.skills = ",".join(kept)
+    UserProfile.objects.filter(pk=profile.pk).update(skills=profile.skills)
+    return True
+
+
+def job_skill_ids(job):
+    return set(JobSkill.objects.filter(job=job).values_list('skill_id', flat=True))
+
+
+def profile_skill_ids(profile):
+    return set(ProfileSkill.objects.filter(profile=profile).values_list('skill_id', flat=True))
+
+
+def skill_match_score(job_skill_ids, candidate_skill_ids):
+    """Percentage (0-100) of the job's skills the candidate has."""
+    if not job_skill_ids:
+        return 0
+    # Integer maths, so matching.py's vectorized scores come out identical
+    return len(job_skill_ids & candidate_skill_ids) * 100 // len(job_skill_ids)
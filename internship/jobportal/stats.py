@@ -0,0 +1,52 @@
+"""
+Per-user stats for the home sidebar and the dashboard.
+
+All the numbers come from one SELECT: the user's row LEFT JOINed to their
+applications and counted with conditional aggregates (COUNT ... FILTER),
+plus the saved-jobs count as a scalar subquery, so the saved jobs do not
+multiply the application rows. The result is cached per user in the cache
+all workers share (settings.CACHES); the Application and SavedJob signals in
+models.py (section 19) drop it once the change commits.
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import SavedJob
+
+USER_STATS_TTL = getattr(settings, 'USER_STATS_TTL', 3600)
+
+EMPTY_STATS = {'applied': 0, 'interviews': 0, 'selected': 0, 'rejected': 0, 'saved': 0}
+
+
+def compute_stats(user_id):
+    saved = SavedJob.objects.filter(user=OuterRef('pk')).order_by().values('user').annotate(total=Count('id')).values('total')
+    row = User.objects.filter(pk=user_id).values('pk').annotate(
+        applied=Count('application'),
+        interviews=Count('application', filter=Q(application__status='interview')),
+        selected=Count('application', filter=Q(application__status='selected')),
+        rejected=Count('application', filter=Q(application__status='rejected')),
+        saved=Coalesce(Subquery(saved, output_field=IntegerField()), Value(0)),
+    ).values(*EMPTY_STATS).first()
+    return row or dict(EMPTY_STATS)
+
+
+def _cache_key(user_id):
+    return f"user_stats:{user_id}"
+
+
+def user_stats(user_id):
+    """{'applied', 'interviews', 'selected', 'rejected', 'saved'} counts for `user_id`."""
+    key = _cache_key(user_id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_stats(user_id)
+        cache.set(key, stats, USER_STATS_TTL)
+    return stats
+
+
+def forget(user_id):
+    cache.delete(_cache_key(user_id))
@@ -0,0 +1,153 @@
+"""
+"People you may know".
+
+Candidates are the people two connections away (graph.py edges), ranked by the
+number of mutual connections, plus people who list the same company
+(Experience) or school (Education). Counting is done with GROUP BY queries;
+nobody is sorted at random.
+
+Each user's scored candidates are cached as {candidate_id: [mutual, company,
+school]}. When a connection is accepted the cached lists it affects are
+patched in place (one mutual more for every new friend-of-friend pair);
+any other change drops the two users' entries, which are recomputed on the
+next read. Both go through the cache every worker shares (settings.CACHES),
+so no process keeps serving a list another one has invalidated.
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.functions import Lower
+
+from .graph import connection_ids
+from .models import ConnectionEdge, ConnectionRequest, Education, Experience
+
+# Cached candidates per user (best first), and for how long
+POOL_SIZE = 100
+SUGGESTIONS_TTL = getattr(settings, 'SUGGESTIONS_TTL', 24 * 3600)
+
+# Score = mutual connections + weights for a shared company / school
+COMPANY_WEIGHT = 2
+SCHOOL_WEIGHT = 1
+
+# People per shared company / school that are considered
+SHARED_LIMIT = 200
+
+MUTUAL, COMPANY, SCHOOL = range(3)
+
+
+def excluded_ids(user_id):
+    """Self plus everyone with a request (any status) to or from `user_id`."""
+    excluded = {user_id}
+    for sender_id, receiver_id in ConnectionRequest.objects.filter(
+        Q(sender_id=user_id) | Q(receiver_id=user_id)
+    ).values_list('sender_id', 'receiver_id'):
+        excluded.add(sender_id)
+        excluded.add(receiver_id)
+    return excluded
+
+
+def score(counts):
+    return counts[MUTUAL] + COMPANY_WEIGHT * counts[COMPANY] + SCHOOL_WEIGHT * counts[SCHOOL]
+
+
+def _top(candidates):
+    best = sorted(candidates.items(), key=lambda item: (-score(item[1]), -item[0]))[:POOL_SIZE]
+    return dict(best)
+
+
+def compute_candidates(user_id):
+    """{candidate_id: [mutual, shared company, shared school]}, best POOL_SIZE only."""
+    friends = connection_ids(user_id)
+    excluded = excluded_ids(user_id)
+    candidates = {}
+
+    # Two hops out: the friends' edges, counted per far end
+    if friends:
+        for candidate_id, mutual in ConnectionEdge.objects.filter(user_id__in=friends).exclude(
+            friend_id__in=excluded
+        ).values('friend_id').annotate(mutual=Count('id')).values_list('friend_id', 'mutual'):
+            candidates[candidate_id] = [mutual, 0, 0]
+
+    companies = {name.lower() for name in Experience.objects.filter(user_id=user_id).values_list('company', flat=True) if name}
+    schools = {name.lower() for name in Education.objects.filter(user_id=user_id).values_list('school', flat=True) if name}
+    for model, field, names, slot in ((Experience, 'company', companies, COMPANY), (Education, 'school', schools, SCHOOL)):
+        if not names:
+            continue
+        shared = (
+            model.objects.annotate(name=Lower(field)).filter(name__in=names)
+            .exclude(user_id__in=excluded).values_list('user_id', flat=True).distinct()[:SHARED_LIMIT]
+        )
+        for candidate_id in shared:
+            candidates.setdefault(candidate_id, [0, 0, 0])[slot] = 1
+
+    return _top(candidates)
+
+
+def _cache_key(user_id):
+    return f"suggestions:{user_id}"
+
+
+def get_candidates(user_id):
+    key = _cache_key(user_id)
+    candidates = cache.get(key)
+    if candidates is None:
+        candidates = compute_candidates(user_id)
+        cache.set(key, candidates, SUGGESTIONS_TTL)
+    return candidates
+
+
+def suggestions_for(user, limit=4):
+    """
+    Up to `limit` Users `user` may know, best first, each with
+    .mutual_count. Topped up with the newest members when the network is
+    too small to fill the list.
+    """
+    candidates = get_candidates(user.id)
+    ranked = sorted(candidates, key=lambda candidate_id: (-score(candidates[candidate_id]), -candidate_id))[:limit]
+
+    if len(ranked) < limit:
+        newest = User.objects.exclude(id__in=excluded_ids(user.id) | set(ranked)).filter(is_active=True)
+        ranked += list(newest.order_by('-id').values_list('id', flat=True)[:limit - len(ranked)])
+
+    users = User.objects.select_related('userprofile').in_bulk(ranked)
+    result = []
+    for candidate_id in ranked:
+        if candidate_id in users:
+            suggestion = users[candidate_id]
+            suggestion.mutual_count = candidates.get(candidate_id, [0, 0, 0])[MUTUAL]
+            result.append(suggestion)
+    return result
+
+
+def forget(*user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def connection_accepted(a, b):
+    """
+    Patches the cached lists touched by a new connection a <-> b: every
+    friend of a gains b as a mutual-connection candidate (and a gains b's
+    friends), and the other way round. Uncached lists are left alone.
+    """
+    friends_a = connection_ids(a) - {b}
+    friends_b = connection_ids(b) - {a}
+    keys = {_cache_key(user_id): user_id for user_id in friends_a | friends_b | {a, b}}
+    cached = {keys[key]: candidates for key, candidates in cache.get_many(keys).items()}
+
+    def bump(owner, candidate_id):
+        if owner in cached and owner != candidate_id:
+            cached[owner].setdefault(candidate_id, [0, 0, 0])[MUTUAL] += 1
+
+    for friend in friends_a - friends_b:
+        bump(friend, b)
+        bump(b, friend)
+    for friend in friends_b - friends_a:
+        bump(friend, a)
+        bump(a, friend)
+
+    # a and b are connected now
+    cached.get(a, {}).pop(b, None)
+    cached.get(b, {}).pop(a, None)
+    cache.set_many({_cache_key(owner): _top(candidates) for owner, candidates in cached.items()}, SUGGESTIONS_TTL)
@@ -21,3 +21,26 @@ def trim(value):
     if value:
         return str(value).strip()
     return value
+
+@register.simple_tag(takes_context=True)
+def query_string(context, **kwargs):
+    """
+    The current GET parameters with some of them replaced (None removes one).
+    Usage: <a href="?{% query_string page=2 %}">
+    """
+    params = context['request'].GET.copy()
+    for key, value in kwargs.items():
+        if value is None or value == '':
+            params.pop(key, None)
+        else:
+            params[key] = value
+    return params.urlencode()
+
+
+@register.filter
+def degree_label(value):
+    """
+    Connection degree as a badge label.
+    Usage: {{ user.connection_degree|degree_label }}  ->  "2nd"
+    """
+    return {1: '1st', 2: '2nd', 3: '3rd'}.get(value, '')
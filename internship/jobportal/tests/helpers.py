@@ -0,0 +1,57 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from jobportal.models import Company, ConnectionRequest, Job
+
+
+def make_user(username, **fields):
+    fields.setdefault('first_name', username.title())
+    fields.setdefault('email', f'{username}@example.com')
+    return User.objects.create_user(username=username, password=None, **fields)
+
+
+def make_company(username='employer', **fields):
+    user = make_user(username)
+    fields.setdefault('company_name', f'{username.title()} Inc')
+    fields.setdefault('location', 'Remote')
+    return Company.objects.create(user=user, **fields)
+
+
+def make_job(company, title='Python Developer', **fields):
+    fields.setdefault('location', 'Remote')
+    fields.setdefault('description', f'{title} wanted.')
+    return Job.objects.create(company=company, title=title, **fields)
+
+
+def connect(a, b):
+    return ConnectionRequest.objects.create(sender=a, receiver=b, status='accepted')
+
+
+class MigrationTestCase(TransactionTestCase):
+    """
+    Runs the database back to `migrate_from`, lets setUpBeforeMigration()
+    write rows with the historical models, then migrates to `migrate_to`.
+    """
+    migrate_from = None
+    migrate_to = None
+    # Keeps the rows seeded by data migrations for the tests that follow
+    serialized_rollback = True
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('jobportal', self.migrate_from)])
+        self.setUpBeforeMigration(executor.loader.project_state([('jobportal', self.migrate_from)]).apps)
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([('jobportal', self.migrate_to)])
+        self.apps = executor.loader.project_state([('jobportal', self.migrate_to)]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def setUpBeforeMigration(self, apps):
+        pass
@@ -0,0 +1,199 @@
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase
+
+from jobportal import digest
+from jobportal.digest import run_digest
+from jobportal.models import JobAlert, JobAlertDelivery, JobAlertOutbox, JobAlertTerm
+from jobportal.outbox import RateLimiter, drain_outbox
+from jobportal.percolator import match_user_ids
+
+from .helpers import MigrationTestCase, make_company, make_job, make_user
+
+
+class DigestTests(TestCase):
+    def setUp(self):
+        self.seeker = make_user('seeker')
+        JobAlert.objects.create(user=self.seeker, keyword='Python', location='Remote')
+        self.company = make_company()
+
+    def test_digest_sends_each_match_once(self):
+        make_job(self.company, 'Python Developer')
+
+        self.assertEqual(run_digest(per_minute=0)[1:], (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Python Developer', mail.outbox[0].body)
+
+        # A rerun has nothing new to send
+        self.assertEqual(run_digest(per_minute=0)[1:], (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_jobs_sent_by_the_outbox_are_left_out_of_digests(self):
+        job = make_job(self.company, 'Python Developer')
+        drain_outbox(per_minute=0)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertTrue(JobAlertDelivery.objects.filter(user=self.seeker, job=job).exists())
+        self.assertEqual(run_digest(per_minute=0)[1:], (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_jobs_in_a_digest_are_not_sent_by_the_outbox(self):
+        make_job(self.company, 'Python Developer')
+        run_digest(per_minute=0)
+        drain_outbox(per_minute=0)
+
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_digest_is_logged_and_keeps_the_watermark(self):
+        make_job(self.company, 'Python Developer')
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError('down')):
+            with self.assertLogs('jobportal.digest', 'ERROR'):
+                self.assertEqual(run_digest(per_minute=0)[1:], (0, 1))
+
+        # Nothing was recorded, so the next run retries
+        self.assertEqual(run_digest(per_minute=0)[1:], (1, 0))
+
+    def test_job_sent_meanwhile_leaves_the_rest_of_the_digest(self):
+        sent_meanwhile = make_job(self.company, 'Python Developer')
+        other = make_job(self.company, 'Python Engineer')
+        real_get_recipients = digest.get_recipients
+
+        def outbox_sends_first(user_ids):
+            # The outbox emails one of the jobs while the digest is running
+            JobAlertDelivery.objects.get_or_create(user=self.seeker, job=sent_meanwhile)
+            return real_get_recipients(user_ids)
+
+        with mock.patch('jobportal.digest.get_recipients', outbox_sends_first):
+            self.assertEqual(run_digest(per_minute=0)[1:], (1, 0))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Python Engineer', mail.outbox[0].body)
+        self.assertNotIn('Python Developer', mail.outbox[0].body)
+        self.assertTrue(JobAlertDelivery.objects.filter(user=self.seeker, job=other).exists())
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.company = make_company()
+        self.seekers = [make_user(f'seeker{i}') for i in range(3)]
+        for seeker in self.seekers:
+            JobAlert.objects.create(user=seeker, keyword='Python')
+
+    def test_posting_a_job_only_queues_it(self):
+        job = make_job(self.company, 'Python Developer')
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(JobAlertOutbox.objects.get(job=job).status, 'pending')
+
+        self.assertEqual(drain_outbox(batch_size=2, per_minute=0), (3, 0))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), sorted(s.email for s in self.seekers))
+        item = JobAlertOutbox.objects.get(job=job)
+        self.assertEqual((item.status, item.sent_count), ('sent', 3))
+
+    def test_connection_failure_is_retried_later_without_resending(self):
+        job = make_job(self.company, 'Python Developer')
+        calls = []
+
+        def flaky_send(backend, messages):
+            calls.append(messages[0].to[0])
+            if len(calls) == 2:
+                raise OSError('connection reset')
+            mail.outbox.extend(messages)
+            return len(messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', flaky_send):
+            self.assertEqual(drain_outbox(batch_size=1, per_minute=0), (0, 1))
+
+        item = JobAlertOutbox.objects.get(job=job)
+        self.assertEqual((item.status, item.attempts), ('pending', 1))
+        self.assertGreater(item.next_attempt_at, item.created_at)
+
+        JobAlertOutbox.objects.filter(pk=item.pk).update(next_attempt_at=item.created_at)
+        drain_outbox(batch_size=1, per_minute=0)
+        # The first seeker was checkpointed and is not emailed twice
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), sorted(s.email for s in self.seekers))
+
+
+    def test_failure_mid_batch_still_records_the_emails_sent(self):
+        job = make_job(self.company, 'Python Developer')
+        calls = []
+
+        def flaky_send(backend, messages):
+            calls.append(messages[0].to[0])
+            if len(calls) == 2:
+                raise OSError('connection reset')
+            mail.outbox.extend(messages)
+            return len(messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', flaky_send):
+            drain_outbox(batch_size=10, per_minute=0)
+
+        self.assertEqual(JobAlertDelivery.objects.filter(job=job).count(), 1)
+        # The digest does not email the first seeker a second time
+        run_digest(per_minute=0)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), sorted(s.email for s in self.seekers))
+
+
+class RateLimiterTests(TestCase):
+    def test_waits_once_the_minute_is_full(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            limiter.wait()
+            now[0] += 1
+
+        self.assertEqual(sleeps, [58.0])
+
+
+class PercolatorTests(TestCase):
+    def setUp(self):
+        self.company = make_company()
+        self.python = make_user('python_fan')
+        self.remote = make_user('remote_fan')
+        JobAlert.objects.create(user=self.python, keyword='Senior Python', location='Ahmedabad')
+        JobAlert.objects.create(user=self.remote, keyword='django', location='remote')
+
+    def test_every_term_must_match(self):
+        job = make_job(self.company, 'Senior Python Developer', location='Ahmedabad, India')
+        self.assertEqual(match_user_ids(job), {self.python.id})
+
+        job = make_job(self.company, 'Python Developer', location='Ahmedabad')
+        self.assertEqual(match_user_ids(job), set())
+
+    def test_remote_jobs_match_remote_alerts(self):
+        job = make_job(self.company, 'Backend Engineer', skills='Django', location='Pune', is_remote=True)
+        self.assertEqual(match_user_ids(job), {self.remote.id})
+
+    def test_editing_an_alert_reindexes_it(self):
+        alert = JobAlert.objects.get(user=self.python)
+        alert.keyword = 'rust'
+        alert.save()
+
+        self.assertEqual(set(JobAlertTerm.objects.filter(alert=alert).values_list('term', flat=True)),
+                         {'rust', 'ahmedabad'})
+
+
+class AlertTermBackfillMigrationTests(MigrationTestCase):
+    migrate_from = '0016_jobalertoutbox'
+    migrate_to = '0017_jobalertterm'
+
+    def setUpBeforeMigration(self, apps):
+        User = apps.get_model('auth', 'User')
+        JobAlert = apps.get_model('jobportal', 'JobAlert')
+        user = User.objects.create(username='seeker')
+        self.alert_id = JobAlert.objects.create(user=user, keyword='The Node.js developer', location='Pune').id
+
+    def test_existing_alerts_are_indexed(self):
+        JobAlertTerm = self.apps.get_model('jobportal', 'JobAlertTerm')
+
+        terms = JobAlertTerm.objects.filter(alert_id=self.alert_id)
+        self.assertEqual(set(terms.values_list('kind', 'term')),
+                         {('keyword', 'node.js'), ('keyword', 'developer'), ('location', 'pune')})
+        self.assertEqual(set(terms.values_list('required', flat=True)), {3})
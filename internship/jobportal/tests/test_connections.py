@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from .helpers import MigrationTestCase, connect, make_user
+
+
+class ConnectionsListTests(TestCase):
+    def setUp(self):
+        self.me = make_user('me')
+        self.friends = [make_user(name, last_name=last) for name, last in
+                        (('cara', 'Young'), ('abe', 'Zane'), ('bea', 'Adams'))]
+        for friend in self.friends:
+            connect(self.me, friend)
+        self.client.force_login(self.me)
+
+    def names(self, response):
+        return [row['user'].username for row in response.context['connections']]
+
+    def test_sorts_by_name(self):
+        self.assertEqual(self.names(self.client.get('/connections/', {'sort': 'first_name'})), ['abe', 'bea', 'cara'])
+        self.assertEqual(self.names(self.client.get('/connections/', {'sort': 'last_name'})), ['bea', 'cara', 'abe'])
+
+    def test_search_matches_the_full_name(self):
+        response = self.client.get('/connections/', {'name': 'abe za'})
+        self.assertEqual(self.names(response), ['abe'])
+        self.assertEqual(response.context['count'], 1)
+
+    def test_pages_follow_the_cursor(self):
+        with mock.patch('jobportal.views.CONNECTIONS_PAGE_SIZE', 2):
+            first = self.client.get('/connections/', {'sort': 'first_name'})
+            second = self.client.get('/connections/', {'sort': 'first_name', 'cursor': first.context['next_cursor']})
+
+        self.assertEqual(self.names(first) + self.names(second), ['abe', 'bea', 'cara'])
+        self.assertIsNone(second.context['next_cursor'])
+
+    def test_renamed_friend_is_found_under_the_new_name(self):
+        abe = self.friends[1]
+        abe.first_name = 'Abraham'
+        abe.save()
+
+        self.assertEqual(self.names(self.client.get('/connections/', {'name': 'abraham'})), ['abe'])
+
+
+class EdgeNamesMigrationTests(MigrationTestCase):
+    migrate_from = '0022_connection_edges'
+    migrate_to = '0023_connection_edge_names'
+
+    def setUpBeforeMigration(self, apps):
+        User = apps.get_model('auth', 'User')
+        ConnectionEdge = apps.get_model('jobportal', 'ConnectionEdge')
+        self.ann = User.objects.create(username='ann', first_name='Ann', last_name='Lee').id
+        self.ben = User.objects.create(username='ben', first_name='Ben', last_name='Ray').id
+        ConnectionEdge.objects.create(user_id=self.ann, friend_id=self.ben)
+        ConnectionEdge.objects.create(user_id=self.ben, friend_id=self.ann)
+
+    def test_names_are_copied_onto_the_edges(self):
+        ConnectionEdge = self.apps.get_model('jobportal', 'ConnectionEdge')
+        self.assertEqual(
+            set(ConnectionEdge.objects.values_list('user_id', 'friend_first_name', 'friend_last_name')),
+            {(self.ann, 'Ben', 'Ray'), (self.ben, 'Ann', 'Lee')},
+        )
@@ -0,0 +1,83 @@
+import json
+from unittest import mock
+
+from django.test import TestCase
+
+from jobportal.counters import CounterBuffer, job_views, post_impressions
+from jobportal.models import JobViewDaily, Post
+
+from .helpers import make_company, make_job, make_user
+
+
+class BufferTestCase(TestCase):
+    def setUp(self):
+        # Flushed by hand, no background thread
+        patcher = mock.patch.object(CounterBuffer, '_start_flusher')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class ImpressionTests(BufferTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('reader')
+        self.post = Post.objects.create(user=self.user, content='Hello')
+        self.client.force_login(self.user)
+        post_impressions.flush()
+
+    def beacon(self, post_ids):
+        return self.client.post('/impressions/', json.dumps({'post_ids': post_ids}), content_type='application/json')
+
+    def test_impressions_are_buffered_then_flushed(self):
+        other = Post.objects.create(user=self.user, content='Other')
+        self.beacon([self.post.id, other.id])
+        self.beacon([self.post.id])
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.impressions_count, 0)
+        self.assertEqual(post_impressions.flush(), 2)
+        self.post.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.post.impressions_count, other.impressions_count), (2, 1))
+
+    def test_repeated_ids_count_once(self):
+        response = self.beacon([self.post.id] * 100)
+
+        self.assertEqual(response.json()['recorded'], 1)
+        post_impressions.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.impressions_count, 1)
+
+    def test_invalid_payload(self):
+        self.assertEqual(self.beacon('nope').status_code, 400)
+
+
+class JobViewTests(BufferTestCase):
+    def setUp(self):
+        super().setUp()
+        company = make_company()
+        self.job = make_job(company)
+        self.other = make_job(company, 'Data Engineer')
+        job_views.flush()
+
+    def test_views_and_daily_rollup(self):
+        for _ in range(3):
+            job_views.add_view(self.job.id)
+        job_views.add_view(self.other.id)
+        job_views.flush()
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.views, 3)
+        self.assertEqual(JobViewDaily.objects.get(job=self.job).views, 3)
+
+    def test_deleted_job_does_not_block_the_flush(self):
+        job_views.add_view(self.job.id)
+        job_views.add_view(self.other.id)
+        self.other.delete()
+
+        job_views.flush()
+        # Nothing was put back for the next flush
+        self.assertEqual(job_views.flush(), 0)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.views, 1)
+        self.assertEqual(JobViewDaily.objects.get(job=self.job).views, 1)
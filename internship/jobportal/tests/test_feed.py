@@ -0,0 +1,46 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from jobportal.models import Post
+from jobportal.pagination import keyset_page
+
+from .helpers import make_user
+
+
+class KeysetPageTests(TestCase):
+    def test_pages_cover_every_row_once_even_with_equal_timestamps(self):
+        user = make_user('ann')
+        Post.objects.bulk_create([Post(user=user, content=f'post {i}') for i in range(25)])
+        Post.objects.update(created_at=timezone.now())
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            posts, cursor = keyset_page(Post.objects.all(), ('-created_at', '-id'), cursor=cursor, page_size=10)
+            seen.extend(post.id for post in posts)
+            pages += 1
+            if cursor is None:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, list(Post.objects.order_by('-id').values_list('id', flat=True)))
+
+
+class FeedEndpointTests(TestCase):
+    def setUp(self):
+        self.user = make_user('ann')
+        self.client.force_login(self.user)
+
+    def test_second_page_follows_the_first(self):
+        Post.objects.bulk_create([Post(user=self.user, content=f'post {i}') for i in range(12)])
+
+        first = self.client.get('/feed/').json()
+        self.assertEqual(len(first['posts']), 10)
+        second = self.client.get('/feed/', {'cursor': first['next_cursor']}).json()
+
+        self.assertEqual(len(second['posts']), 2)
+        self.assertIsNone(second['next_cursor'])
+        ids = [post['id'] for post in first['posts'] + second['posts']]
+        self.assertEqual(len(set(ids)), 12)
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.client.get('/feed/', {'cursor': 'not-a-cursor'}).status_code, 400)
@@ -0,0 +1,90 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from jobportal.csr import RowIndex
+from jobportal.graph import adjacency_index, connection_count, connection_degrees, connection_ids
+from jobportal.models import ConnectionEdge, ConnectionRequest
+
+from .helpers import connect, make_user
+
+
+class EdgeTests(TestCase):
+    def setUp(self):
+        self.ann = make_user('ann')
+        self.ben = make_user('ben')
+
+    def test_accepting_stores_both_directions(self):
+        request = ConnectionRequest.objects.create(sender=self.ann, receiver=self.ben)
+        self.assertEqual(connection_count(self.ann.id), 0)
+
+        request.status = 'accepted'
+        request.save()
+
+        self.assertEqual(connection_ids(self.ann.id), {self.ben.id})
+        self.assertEqual(connection_ids(self.ben.id), {self.ann.id})
+
+    def test_removing_the_request_drops_the_edges(self):
+        connect(self.ann, self.ben).delete()
+        self.assertFalse(ConnectionEdge.objects.exists())
+
+    def test_backfill_command_rebuilds_from_requests(self):
+        connect(self.ann, self.ben)
+        # A duplicate request in the other direction is one connection
+        connect(self.ben, self.ann)
+        ConnectionEdge.objects.all().delete()
+
+        out = StringIO()
+        call_command('backfill_connection_edges', stdout=out)
+
+        self.assertIn('Stored 1 connections (2 edges)', out.getvalue())
+        self.assertEqual(connection_count(self.ann.id), 1)
+        edge = ConnectionEdge.objects.get(user=self.ann)
+        self.assertEqual(edge.friend_first_name, 'Ben')
+
+
+class RowIndexTests(TestCase):
+    def test_segments_match_the_table(self):
+        users = [make_user(name) for name in ('ann', 'ben', 'cat', 'dan')]
+        connect(users[0], users[1])
+        connect(users[0], users[2])
+        index = RowIndex(ConnectionEdge, 'user_id', 'friend_id')
+        index.build()
+        ann, ben, cat, dan = (user.id for user in users)
+
+        rows, values = index.segments([ann, dan, ben, ann])
+        grouped = {}
+        for row, value in zip(rows.tolist(), values.tolist()):
+            grouped.setdefault(row, set()).add(value)
+        self.assertEqual(grouped, {0: {ben, cat}, 2: {ann}, 3: {ben, cat}})
+
+        # A dirty owner is read from the database until the next rebuild
+        connect(users[3], users[1])
+        index.mark_dirty(dan)
+        rows, values = index.segments([dan])
+        self.assertEqual(values.tolist(), [ben])
+
+
+class DegreeTests(TestCase):
+    def setUp(self):
+        # ann - ben - cat - dan - eve, in a line
+        self.users = [make_user(name) for name in ('ann', 'ben', 'cat', 'dan', 'eve')]
+        adjacency_index.build()
+        for a, b in zip(self.users, self.users[1:]):
+            connect(a, b)
+
+    def test_badges_up_to_three_hops(self):
+        ann, ben, cat, dan, eve = self.users
+
+        degrees = connection_degrees(ann, [ben, cat, dan, eve])
+
+        self.assertEqual(degrees, {ben.id: 1, cat.id: 2, dan.id: 3})
+
+    def test_new_connection_shortens_the_path(self):
+        ann, ben, cat, dan, eve = self.users
+        self.assertNotIn(eve.id, connection_degrees(ann, [eve]))
+
+        connect(ann, eve)
+
+        self.assertEqual(connection_degrees(ann, [eve, dan]), {eve.id: 1, dan.id: 2})
@@ -0,0 +1,176 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from jobportal.inbox import direct_threads, inbox_page, send_to_many, unread_total
+from jobportal.models import Message, MessageThread, Post, ThreadMembership
+
+from .helpers import MigrationTestCase, make_user
+
+
+def make_thread(*users):
+    thread = MessageThread.objects.create()
+    thread.participants.add(*users)
+    return thread
+
+
+def send(thread, sender, body='Hi'):
+    return Message.objects.create(thread=thread, sender=sender, body=body)
+
+
+class ReadReceiptTests(TestCase):
+    def setUp(self):
+        self.ann = make_user('ann')
+        self.ben = make_user('ben')
+        self.thread = make_thread(self.ann, self.ben)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                send(self.thread, self.ann, f'm{i}')
+            send(self.thread, self.ben, 'reply')
+        self.client.force_login(self.ben)
+
+    def test_opening_a_thread_marks_it_read(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(f'/messages/{self.thread.id}/')
+
+        self.assertFalse(Message.objects.filter(thread=self.thread, sender=self.ann, is_read=False).exists())
+        # Ben's own message stays unread until Ann reads it
+        self.assertTrue(Message.objects.filter(thread=self.thread, sender=self.ben, is_read=False).exists())
+        self.assertEqual(ThreadMembership.objects.get(thread=self.thread, user=self.ben).unread_count, 0)
+        self.assertEqual(self.client.get('/messages/unread/').json(), {'unread': 0})
+
+    def test_unread_total_is_cached_and_follows_changes(self):
+        self.assertEqual(unread_total(self.ben.id), 3)
+        with CaptureQueriesContext(connection) as queries:
+            unread_total(self.ben.id)
+        self.assertFalse(any('jobportal_threadmembership' in q['sql'] for q in queries.captured_queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            send(self.thread, self.ann)
+        self.assertEqual(unread_total(self.ben.id), 4)
+
+    def test_mark_read_endpoint(self):
+        response = self.client.post(f'/messages/{self.thread.id}/read/')
+        self.assertEqual(response.json()['marked'], 3)
+
+        self.client.force_login(make_user('outsider'))
+        self.assertEqual(self.client.post(f'/messages/{self.thread.id}/read/').status_code, 404)
+
+
+class InboxTests(TestCase):
+    def test_latest_activity_first_with_unread_counts(self):
+        ann, ben, cat = make_user('ann'), make_user('ben'), make_user('cat')
+        old = make_thread(ann, ben)
+        new = make_thread(ann, cat)
+        send(old, ben)
+        send(new, cat)
+        send(new, cat, 'again')
+        send(new, ann, 'answer')
+
+        memberships, _ = inbox_page(ann)
+
+        self.assertEqual([m.thread_id for m in memberships], [new.id, old.id])
+        self.assertEqual([m.unread_count for m in memberships], [2, 1])
+        self.assertEqual(memberships[0].last_message.body, 'answer')
+
+
+class MessageHistoryTests(TestCase):
+    def setUp(self):
+        self.ann = make_user('ann')
+        self.ben = make_user('ben')
+        self.thread = make_thread(self.ann, self.ben)
+        self.sent = [send(self.thread, self.ann, f'm{i}').id for i in range(5)]
+        self.client.force_login(self.ben)
+
+    def test_older_pages_walk_back_in_time(self):
+        with mock.patch('jobportal.views.MESSAGE_PAGE_SIZE', 2):
+            newest = self.client.get(f'/messages/{self.thread.id}/')
+            cursor = newest.context['older_cursor']
+            pages = [[message.id for message in newest.context['chat_messages']]]
+            while cursor:
+                data = self.client.get(f'/messages/{self.thread.id}/older/', {'cursor': cursor}).json()
+                pages.append([message['id'] for message in data['messages']])
+                cursor = data['next_cursor']
+
+        # Each page oldest first, pages newest first
+        self.assertEqual(pages, [self.sent[3:], self.sent[1:3], self.sent[:1]])
+
+    def test_html_format_and_access(self):
+        response = self.client.get(f'/messages/{self.thread.id}/older/', {'format': 'html'})
+        self.assertContains(response, 'm4')
+        self.assertEqual(response['X-Next-Cursor'], '')
+        self.assertEqual(self.client.get(f'/messages/{self.thread.id}/older/', {'cursor': '!!'}).status_code, 400)
+
+        self.client.force_login(make_user('outsider'))
+        self.assertEqual(self.client.get(f'/messages/{self.thread.id}/older/').status_code, 404)
+
+
+class DirectThreadTests(TestCase):
+    def setUp(self):
+        self.ann = make_user('ann')
+        self.others = [make_user(f'user{i}') for i in range(3)]
+
+    def test_one_thread_per_pair(self):
+        first = direct_threads(self.ann.id, [user.id for user in self.others])
+        again = direct_threads(self.others[0].id, [self.ann.id])
+
+        self.assertEqual(again[self.ann.id], first[self.others[0].id])
+        self.assertEqual(MessageThread.objects.count(), 3)
+        self.assertEqual(set(first[self.others[1].id].participants.all()), {self.ann, self.others[1]})
+        self.assertEqual(ThreadMembership.objects.count(), 6)
+
+    def test_send_to_many_in_a_fixed_number_of_queries(self):
+        post = Post.objects.create(user=self.ann, content='Look')
+        direct_threads(self.ann.id, [self.others[0].id])
+        many = self.others + [make_user(f'extra{i}') for i in range(5)]
+
+        with CaptureQueriesContext(connection) as few:
+            send_to_many(self.ann, [user.id for user in self.others[:2]], post=post, body='Shared')
+        with CaptureQueriesContext(connection) as more:
+            messages = send_to_many(self.ann, [user.id for user in many], post=post, body='Shared')
+
+        self.assertEqual(len(messages), len(many))
+        self.assertLessEqual(len(more), len(few) + 1)
+        membership = ThreadMembership.objects.get(user=self.others[0])
+        self.assertEqual(membership.unread_count, 2)
+
+    def test_share_post_endpoint(self):
+        post = Post.objects.create(user=self.ann, content='Look')
+        self.client.force_login(self.ann)
+
+        response = self.client.post(
+            f'/share-post/{post.id}/', {'user_ids': [user.id for user in self.others] + [self.ann.id]},
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.json()['message'], 'Post shared with 3 user(s)')
+        self.assertEqual(Message.objects.filter(post=post).count(), 3)
+
+
+class MembershipBackfillMigrationTests(MigrationTestCase):
+    migrate_from = '0023_connection_edge_names'
+    migrate_to = '0024_thread_memberships'
+
+    def setUpBeforeMigration(self, apps):
+        User = apps.get_model('auth', 'User')
+        MessageThread = apps.get_model('jobportal', 'MessageThread')
+        Message = apps.get_model('jobportal', 'Message')
+        ann = User.objects.create(username='ann')
+        ben = User.objects.create(username='ben')
+        thread = MessageThread.objects.create()
+        thread.participants.add(ann, ben)
+        Message.objects.create(thread=thread, sender=ann, body='first')
+        self.last_id = Message.objects.create(thread=thread, sender=ben, body='second').id
+        self.thread_id = thread.id
+
+    def test_history_starts_out_read(self):
+        ThreadMembership = self.apps.get_model('jobportal', 'ThreadMembership')
+        Message = self.apps.get_model('jobportal', 'Message')
+
+        memberships = ThreadMembership.objects.filter(thread_id=self.thread_id)
+        self.assertEqual(memberships.count(), 2)
+        self.assertEqual(set(memberships.values_list('unread_count', flat=True)), {0})
+        self.assertEqual(set(memberships.values_list('last_message_id', flat=True)), {self.last_id})
+        self.assertFalse(Message.objects.filter(is_read=False).exists())
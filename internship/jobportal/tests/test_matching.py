@@ -0,0 +1,84 @@
+from django.test import TestCase
+
+from jobportal.matching import attach_match_scores, candidate_matrix, job_matrix, rank_applications
+from jobportal.models import Application, Job
+from jobportal.skills import job_skill_ids, profile_skill_ids, skill_match_score
+
+from .helpers import make_company, make_job, make_user
+
+
+def make_candidate(username, skills):
+    user = make_user(username)
+    user.userprofile.skills = skills
+    user.userprofile.save()
+    return user
+
+
+class MatchingTestCase(TestCase):
+    def setUp(self):
+        # The matrices are process-wide; start every test from this database
+        job_matrix.build()
+        candidate_matrix.build()
+
+
+class JobScoringTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        company = make_company()
+        self.web = make_job(company, 'Web', skills='JavaScript, React')
+        self.backend = make_job(company, 'Backend', skills='Python, Django, SQL')
+        self.blank = make_job(company, 'Blank')
+        self.candidate = make_candidate('seeker', 'py, django, js')
+
+    def test_scores_and_sort(self):
+        skills = profile_skill_ids(self.candidate.userprofile)
+        jobs = attach_match_scores(Job.objects.order_by('id'), skills, sort_by_match=True)
+
+        self.assertEqual([(job.title, job.match_score) for job in jobs], [('Backend', 66), ('Web', 50), ('Blank', 0)])
+
+    def test_edited_job_is_scored_from_its_new_skills(self):
+        self.web.skills = 'JavaScript'
+        self.web.save()
+
+        [job] = attach_match_scores([self.web], profile_skill_ids(self.candidate.userprofile))
+        self.assertEqual(job.match_score, 100)
+
+    def test_find_jobs_sorted_by_match(self):
+        self.client.force_login(self.candidate)
+        response = self.client.get('/find-jobs/', {'sort': 'match'})
+
+        self.assertEqual([job.title for job in response.context['jobs']], ['Backend', 'Web', 'Blank'])
+
+
+class ApplicantRankingTests(MatchingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = make_job(make_company(), skills='Python, Django')
+        self.apps = {}
+        for username, skills, experience in (('both', 'python,django', '1'), ('half', 'py', '5'), ('none', 'excel', '10')):
+            self.apps[username] = Application.objects.create(
+                user=make_candidate(username, skills), job=self.job, resume='cv.pdf', experience=experience,
+            )
+
+    def ranked(self, **options):
+        ids, scores = rank_applications(Application.objects.filter(job=self.job), **options)
+        names = {app.id: name for name, app in self.apps.items()}
+        return [names[app_id] for app_id in ids], scores
+
+    def test_best_match_first(self):
+        order, scores = self.ranked()
+        self.assertEqual(order, ['both', 'half', 'none'])
+        self.assertEqual([scores[self.apps[name].id] for name in order], [100, 50, 0])
+
+    def test_scores_agree_with_skill_match_score(self):
+        _, scores = self.ranked()
+        required = job_skill_ids(self.job)
+        for app in self.apps.values():
+            expected = skill_match_score(required, profile_skill_ids(app.user.userprofile))
+            self.assertEqual(scores[app.id], expected)
+
+    def test_filters_and_sorts(self):
+        self.assertEqual(self.ranked(min_score=50)[0], ['both', 'half'])
+        self.assertEqual(self.ranked(min_experience=5)[0], ['half', 'none'])
+        self.assertEqual(self.ranked(sort='experience')[0], ['none', 'half', 'both'])
+        self.assertEqual(self.ranked(sort='recent')[0], ['none', 'half', 'both'])
@@ -0,0 +1,49 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from jobportal.models import Post, PostComment
+
+from .helpers import make_user
+
+
+class PostCounterTests(TestCase):
+    def setUp(self):
+        self.author = make_user('ann')
+        self.reader = make_user('ben')
+        self.post = Post.objects.create(user=self.author, content='Hello')
+        self.client.force_login(self.reader)
+
+    def counts(self):
+        self.post.refresh_from_db()
+        return self.post.likes_count, self.post.comments_count
+
+    def test_like_toggles_the_counter(self):
+        liked = self.client.get(f'/like-post/{self.post.id}/').json()
+        self.assertEqual(liked, {'likes_count': 1, 'is_liked': True})
+        self.assertTrue(self.post.likes.filter(pk=self.reader.pk).exists())
+
+        unliked = self.client.get(f'/like-post/{self.post.id}/').json()
+        self.assertEqual(unliked, {'likes_count': 0, 'is_liked': False})
+
+    def test_comments_follow_the_rows(self):
+        response = self.client.post(f'/add-comment/{self.post.id}/', json.dumps({'text': 'Nice'}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counts(), (0, 1))
+
+        PostComment.objects.get(post=self.post).delete()
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_reconcile_repairs_drift(self):
+        self.post.toggle_like(self.reader)
+        PostComment.objects.create(post=self.post, user=self.reader, text='Hi')
+        Post.objects.filter(pk=self.post.pk).update(likes_count=7, comments_count=0)
+
+        out = StringIO()
+        call_command('reconcile_post_counters', chunk_size=1, stdout=out)
+
+        self.assertEqual(self.counts(), (1, 1))
+        self.assertIn('1 posts corrected', out.getvalue())
@@ -0,0 +1,111 @@
+import asyncio
+import importlib.util
+import json
+import os
+import threading
+from unittest import mock, skipUnless
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from jobportal.realtime import LocalBroker, RedisBroker, check_workers, format_event
+
+
+class LocalBrokerTests(SimpleTestCase):
+    def test_events_reach_the_channel_subscribers_only(self):
+        broker = LocalBroker()
+
+        async def run():
+            mine = broker.subscribe('user:1')
+            other = broker.subscribe('user:2')
+            broker.publish('user:1', {'type': 'message', 'thread_id': 7})
+            received = await mine.get(1), await other.get(0.01)
+            mine.close()
+            other.close()
+            return received
+
+        self.assertEqual(asyncio.run(run()), ({'type': 'message', 'thread_id': 7}, None))
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    def test_format_event(self):
+        frame = format_event({'type': 'thread_read', 'thread_id': 3})
+        self.assertEqual(frame, 'event: thread_read\ndata: {"thread_id": 3}\n\n')
+
+
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = messages
+
+    def psubscribe(self, pattern):
+        pass
+
+    def listen(self):
+        for message in self.messages:
+            if isinstance(message, Exception):
+                raise message
+            yield message
+        # Then idle like a live connection
+        threading.Event().wait()
+
+    def close(self):
+        pass
+
+
+@skipUnless(importlib.util.find_spec('redis'), 'needs the redis package')
+class RedisBrokerTests(SimpleTestCase):
+    def test_listener_reconnects_after_redis_goes_away(self):
+        import redis
+
+        event = {'type': 'message', 'thread_id': 1}
+        connections = iter([
+            FakePubSub([redis.ConnectionError('Redis restarted')]),
+            FakePubSub([{'channel': b'jobportal:realtime:user:1', 'data': json.dumps(event)}]),
+        ])
+        client = mock.Mock()
+        client.pubsub.side_effect = lambda **kwargs: next(connections)
+        with mock.patch('redis.Redis.from_url', return_value=client):
+            broker = RedisBroker()
+        broker.RECONNECT_DELAY = 0
+
+        async def run():
+            subscription = broker.subscribe('user:1')
+            try:
+                return await subscription.get(2)
+            finally:
+                subscription.close()
+
+        with self.assertLogs('jobportal.realtime', 'WARNING'):
+            self.assertEqual(asyncio.run(run()), event)
+        self.assertEqual(client.pubsub.call_count, 2)
+
+    def test_dead_listener_is_restarted(self):
+        client = mock.Mock()
+        client.pubsub.side_effect = [FakePubSub([RuntimeError('bug')]), FakePubSub([])]
+        with mock.patch('redis.Redis.from_url', return_value=client):
+            broker = RedisBroker()
+
+        async def subscribe_twice():
+            with self.assertLogs('jobportal.realtime', 'ERROR'):
+                broker.subscribe('user:1').close()
+                broker._listener.join(2)
+            self.assertIsNone(broker._listener)
+            broker.subscribe('user:1').close()
+
+        asyncio.run(subscribe_twice())
+        self.assertIsNotNone(broker._listener)
+        self.assertEqual(client.pubsub.call_count, 2)
+
+
+class CheckWorkersTests(SimpleTestCase):
+    @override_settings(REALTIME_BROKER='local')
+    def test_several_workers_need_redis(self):
+        with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': '4'}):
+            with self.assertRaises(ImproperlyConfigured):
+                check_workers()
+        with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': '1'}):
+            check_workers()
+
+    @override_settings(REALTIME_BROKER='redis')
+    def test_redis_broker_allows_several_workers(self):
+        with mock.patch.dict(os.environ, {'WEB_CONCURRENCY': '4'}):
+            check_workers()
@@ -0,0 +1,94 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from jobportal.search import job_facets, search
+
+from .helpers import make_company, make_job, make_user
+
+
+class SearchTests(TestCase):
+    def test_better_match_ranks_first(self):
+        company = make_company()
+        description_only = make_job(company, 'Backend Engineer', description='Some Django work.')
+        in_title = make_job(company, 'Django Developer')
+
+        self.assertEqual(search('jobs', 'django'), [in_title.id, description_only.id])
+
+    def test_prefix_match(self):
+        job = make_job(make_company(), 'Developer')
+        self.assertEqual(search('jobs', 'dev'), [job.id])
+
+    def test_best_match_survives_the_candidate_cap(self):
+        exact = make_user('pythonista', first_name='Python')
+        for i in range(10):
+            user = make_user(f'user{i}')
+            user.userprofile.headline = 'Python developer'
+            user.userprofile.save()
+
+        with mock.patch('jobportal.search.MAX_CANDIDATES', 5):
+            ids = search('people', 'python')
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(ids[0], exact.id)
+
+    def test_index_follows_changes(self):
+        company = make_company()
+        job = make_job(company, 'Rust Developer', description='Systems work.')
+        job.title = 'Go Developer'
+        job.save()
+
+        self.assertEqual(search('jobs', 'rust'), [])
+        self.assertEqual(search('jobs', 'go'), [job.id])
+        job.delete()
+        self.assertEqual(search('jobs', 'go'), [])
+
+
+class FacetedSearchTests(TestCase):
+    def setUp(self):
+        tech = make_company('tech', industry='Software')
+        shop = make_company('shop')
+        self.jobs = [
+            make_job(tech, 'Python Developer', job_type='Internship', location='Pune'),
+            make_job(tech, 'Python Engineer', location='Pune', is_remote=True),
+            make_job(shop, 'Python Analyst', location='Ahmedabad'),
+        ]
+        self.client.force_login(make_user('seeker'))
+
+    def test_facet_counts(self):
+        facets = job_facets([job.id for job in self.jobs])
+
+        self.assertEqual(facets['location'], [('Pune', 2), ('Ahmedabad', 1)])
+        self.assertEqual(dict(facets['job_type']), {'Internship': 1, 'Full Time': 2})
+        self.assertEqual(dict(facets['is_remote']), {True: 1, False: 2})
+        # Companies without an industry are left out
+        self.assertEqual(facets['industry'], [('Software', 2)])
+
+    def test_filters_and_pages_keep_rank_order(self):
+        with mock.patch('jobportal.views.SEARCH_PAGE_SIZE', 1):
+            response = self.client.get('/search/', {'q': 'python', 'type': 'jobs', 'location': 'Pune', 'page': 2})
+
+        jobs = response.context['jobs']
+        self.assertEqual(jobs['count'], 2)
+        self.assertEqual(len(jobs['page'].object_list), 1)
+        self.assertIn(jobs['page'].object_list[0], self.jobs[:2])
+        self.assertEqual(response.context['job_filters'], {'location': 'Pune'})
+        # Facets describe every match, not just the filtered ones
+        self.assertEqual(dict(response.context['job_facets']['location']), {'Pune': 2, 'Ahmedabad': 1})
+
+
+class LoginSaveTests(TestCase):
+    def test_login_leaves_the_indexes_alone(self):
+        user = make_user('ann')
+        with mock.patch('jobportal.search.update_index') as update_index, \
+                mock.patch('jobportal.typeahead.people_index.update_user') as update_user, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.client.force_login(user)
+
+        update_index.assert_not_called()
+        update_user.assert_not_called()
+
+    def test_name_change_is_indexed(self):
+        user = make_user('ann')
+        user.first_name = 'Zelda'
+        user.save(update_fields=['first_name', 'last_login'])
+        self.assertEqual(search('people', 'zelda'), [user.id])
@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from jobportal.models import SimilarJob
+from jobportal.similar import SimilarityIndex, UpdateQueue, similar_jobs, similar_jobs_queue, similarity_index
+
+from .helpers import make_company, make_job
+
+
+@mock.patch('jobportal.similar.K', 2)
+class SimilarJobsTests(TestCase):
+    def setUp(self):
+        # Applied by hand, no background thread
+        patcher = mock.patch.object(UpdateQueue, '_start_thread')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        similar_jobs_queue.run()
+        similarity_index._built_at = None
+
+        self.company = make_company()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.a = make_job(self.company, 'Python Django API', description='Python Django REST api')
+            self.b = make_job(self.company, 'Python Django Web', description='Python Django web pages')
+            self.c = make_job(self.company, 'Python Django Data', description='Python Django data pipelines')
+            self.d = make_job(self.company, 'Python Flask', description='Python flask service')
+
+    def listed(self, job):
+        return set(SimilarJob.objects.filter(job=job).values_list('similar_id', flat=True))
+
+    def test_saving_a_job_only_queues_it(self):
+        self.assertIsNone(similarity_index._built_at)
+        self.assertFalse(SimilarJob.objects.exists())
+
+        similar_jobs_queue.run()
+        self.assertEqual(self.listed(self.a), {self.b.id, self.c.id})
+        self.assertEqual([job.id for job in similar_jobs(self.a, limit=1)], [self.b.id])
+
+    def test_edit_refills_the_lists_it_left(self):
+        similar_jobs_queue.run()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.b.title = 'Chef'
+            self.b.description = 'Cooking in a busy kitchen'
+            self.b.save()
+        similar_jobs_queue.run()
+
+        self.assertEqual(self.listed(self.a), {self.c.id, self.d.id})
+
+    def test_delete_refills_the_lists_it_left(self):
+        similar_jobs_queue.run()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.b.delete()
+        similar_jobs_queue.run()
+
+        self.assertEqual(self.listed(self.a), {self.c.id, self.d.id})
+
+    def test_job_page_without_a_list_queues_the_job(self):
+        similar_jobs_queue.run()
+        # As in a new process after the migration: no list for the job yet
+        SimilarJob.objects.filter(job=self.a).delete()
+        with mock.patch('jobportal.similar.similarity_index', SimilarityIndex()):
+            self.assertEqual(similar_jobs(self.a), [])
+            similar_jobs_queue.run()
+        self.assertTrue(self.listed(self.a))
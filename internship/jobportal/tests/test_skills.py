@@ -0,0 +1,63 @@
+from django.test import TestCase
+
+from jobportal.models import JobSkill
+from jobportal.skills import add_profile_skill, remove_profile_skill
+
+from .helpers import MigrationTestCase, make_company, make_job, make_user
+
+
+def skill_names(rows):
+    return sorted(rows.values_list('skill__name', flat=True))
+
+
+class SkillSyncTests(TestCase):
+    def test_job_skills_are_canonical(self):
+        job = make_job(make_company(), skills='JS, Python3\nDjango.')
+
+        self.assertEqual(skill_names(JobSkill.objects.filter(job=job)), ['django', 'javascript', 'python'])
+        job.skills = 'django'
+        job.save()
+        self.assertEqual(skill_names(JobSkill.objects.filter(job=job)), ['django'])
+
+    def test_add_and_remove_profile_skill(self):
+        profile = make_user('seeker').userprofile
+
+        self.assertTrue(add_profile_skill(profile, 'k8s'))
+        self.assertFalse(add_profile_skill(profile, 'Kubernetes'))
+        self.assertEqual(skill_names(profile.profile_skills.all()), ['kubernetes'])
+
+        self.assertTrue(remove_profile_skill(profile, 'kubernetes'))
+        profile.refresh_from_db()
+        self.assertEqual(profile.skills, '')
+        self.assertFalse(profile.profile_skills.exists())
+
+    def test_add_several_skills_at_once(self):
+        profile = make_user('seeker').userprofile
+        add_profile_skill(profile, 'python')
+
+        self.assertTrue(add_profile_skill(profile, 'js, Python3\nReact'))
+        self.assertEqual(skill_names(profile.profile_skills.all()), ['javascript', 'python', 'react'])
+        profile.refresh_from_db()
+        self.assertEqual(profile.skills, 'python,js,React')
+        self.assertFalse(add_profile_skill(profile, 'JavaScript, py'))
+
+
+class SkillBackfillMigrationTests(MigrationTestCase):
+    migrate_from = '0019_search_index'
+    migrate_to = '0020_skills'
+
+    def setUpBeforeMigration(self, apps):
+        User = apps.get_model('auth', 'User')
+        Company = apps.get_model('jobportal', 'Company')
+        Job = apps.get_model('jobportal', 'Job')
+        owner = User.objects.create(username='employer')
+        company = Company.objects.create(user=owner, company_name='Acme', location='Remote')
+        self.job_id = Job.objects.create(
+            company=company, title='Dev', company_name='Acme', location='Remote',
+            description='d', skills='Py, ReactJS,python3',
+        ).id
+
+    def test_backfill(self):
+        JobSkill = self.apps.get_model('jobportal', 'JobSkill')
+        names = sorted(JobSkill.objects.filter(job_id=self.job_id).values_list('skill__name', flat=True))
+        self.assertEqual(names, ['python', 'react'])
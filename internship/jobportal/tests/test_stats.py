@@ -0,0 +1,103 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from jobportal.models import Application, SavedJob
+from jobportal.stats import EMPTY_STATS, compute_stats, user_stats
+
+from .helpers import MigrationTestCase, make_company, make_job, make_user
+
+
+class UserStatsTests(TestCase):
+    def setUp(self):
+        self.user = make_user('ann')
+        company = make_company()
+        self.jobs = [make_job(company, title=f'Job {i}') for i in range(4)]
+        with self.captureOnCommitCallbacks(execute=True):
+            for job, status in zip(self.jobs, ['applied', 'interview', 'interview', 'rejected']):
+                Application.objects.create(user=self.user, job=job, resume='r.pdf', status=status)
+            for job in self.jobs[:3]:
+                SavedJob.objects.create(user=self.user, job=job)
+
+    def test_counts_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            stats = compute_stats(self.user.id)
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(stats, {'applied': 4, 'interviews': 2, 'selected': 0, 'rejected': 1, 'saved': 3})
+
+    def test_user_without_rows(self):
+        self.assertEqual(compute_stats(make_user('ben').id), EMPTY_STATS)
+
+    def test_cached_until_an_application_or_saved_job_changes(self):
+        self.assertEqual(user_stats(self.user.id)['applied'], 4)
+        with CaptureQueriesContext(connection) as queries:
+            user_stats(self.user.id)
+        self.assertFalse(any('jobportal_application' in q['sql'] for q in queries.captured_queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Application.objects.filter(user=self.user, status='rejected').get().delete()
+        self.assertEqual(user_stats(self.user.id)['rejected'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SavedJob.objects.filter(user=self.user).first().delete()
+        self.assertEqual(user_stats(self.user.id)['saved'], 2)
+
+
+class StatusUpdateTests(TestCase):
+    def setUp(self):
+        self.user = make_user('ann')
+        self.company = make_company()
+        job = make_job(self.company)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.application = Application.objects.create(user=self.user, job=job, resume='r.pdf', status='applied')
+        self.client.force_login(self.company.user)
+
+    def update(self, status):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/application/{self.application.id}/status/', {'status': status})
+        self.application.refresh_from_db()
+
+    def test_employer_update_is_counted_in_the_stats(self):
+        self.update('interview')
+        self.assertEqual(self.application.status, 'interview')
+        self.assertEqual(user_stats(self.user.id)['interviews'], 1)
+
+        self.update('selected')
+        stats = user_stats(self.user.id)
+        self.assertEqual((stats['interviews'], stats['selected']), (0, 1))
+
+    def test_old_button_labels_are_stored_as_choices(self):
+        self.update('Accepted')
+        self.assertEqual(self.application.status, 'selected')
+        self.update('Rejected')
+        self.assertEqual(self.application.status, 'rejected')
+        self.assertEqual(user_stats(self.user.id)['rejected'], 1)
+
+    def test_unknown_status_is_ignored(self):
+        self.update('hired')
+        self.assertEqual(self.application.status, 'applied')
+
+
+class NormalizeStatusMigrationTests(MigrationTestCase):
+    migrate_from = '0028_cache_table'
+    migrate_to = '0029_normalize_application_status'
+
+    def setUpBeforeMigration(self, apps):
+        User = apps.get_model('auth', 'User')
+        Company = apps.get_model('jobportal', 'Company')
+        Job = apps.get_model('jobportal', 'Job')
+        Application = apps.get_model('jobportal', 'Application')
+        employer = User.objects.create(username='employer')
+        company = Company.objects.create(user=employer, company_name='Acme', location='Remote')
+        for i, status in enumerate(['Pending', 'Interview', 'Accepted', 'Rejected', 'interview']):
+            job = Job.objects.create(company=company, title=f'Job {i}', location='Remote', description='-')
+            user = User.objects.create(username=f'user{i}')
+            Application.objects.create(user=user, job=job, resume='r.pdf', status=status)
+
+    def test_statuses_use_the_choice_values(self):
+        Application = self.apps.get_model('jobportal', 'Application')
+        self.assertEqual(
+            sorted(Application.objects.values_list('status', flat=True)),
+            ['applied', 'interview', 'interview', 'rejected', 'selected'],
+        )
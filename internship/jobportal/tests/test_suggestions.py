@@ -0,0 +1,58 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+
+from jobportal.models import ConnectionRequest, Experience
+from jobportal.suggestions import MUTUAL, compute_candidates, get_candidates, suggestions_for
+
+from .helpers import connect, make_user
+
+
+class SuggestionTests(TestCase):
+    def setUp(self):
+        self.users = {name: make_user(name) for name in ('ann', 'ben', 'cat', 'dan', 'eve', 'fay')}
+        u = self.users
+        # ann - ben, ann - cat; ben - dan, cat - dan, ben - eve
+        with self.captureOnCommitCallbacks(execute=True):
+            for a, b in (('ann', 'ben'), ('ann', 'cat'), ('ben', 'dan'), ('cat', 'dan'), ('ben', 'eve')):
+                connect(u[a], u[b])
+
+    def test_ranked_by_mutual_connections(self):
+        u = self.users
+        suggestions = suggestions_for(u['ann'], limit=3)
+
+        self.assertEqual([user.username for user in suggestions[:2]], ['dan', 'eve'])
+        self.assertEqual([user.mutual_count for user in suggestions[:2]], [2, 1])
+        # Topped up with people outside the network
+        self.assertEqual(suggestions[2].username, 'fay')
+
+    def test_shared_company_counts(self):
+        u = self.users
+        Experience.objects.create(user=u['ann'], title='Dev', company='Acme')
+        Experience.objects.create(user=u['fay'], title='QA', company='ACME')
+
+        self.assertIn(u['fay'].id, compute_candidates(u['ann'].id))
+
+    def test_requested_people_are_left_out(self):
+        u = self.users
+        with self.captureOnCommitCallbacks(execute=True):
+            ConnectionRequest.objects.create(sender=u['ann'], receiver=u['dan'])
+
+        self.assertNotIn(u['dan'].id, get_candidates(u['ann'].id))
+
+    def test_accepted_connection_patches_cached_lists(self):
+        u = self.users
+        for user in u.values():
+            get_candidates(user.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            connect(u['eve'], u['fay'])
+
+        for user in u.values():
+            cached = {pk: counts[MUTUAL] for pk, counts in get_candidates(user.id).items()}
+            fresh = {pk: counts[MUTUAL] for pk, counts in compute_candidates(user.id).items()}
+            self.assertEqual(cached, fresh, user.username)
+
+    def test_cache_is_shared_between_workers(self):
+        # Invalidation by signals only reaches every worker through a shared cache
+        self.assertNotIsInstance(caches['default'], LocMemCache)
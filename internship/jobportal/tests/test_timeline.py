@@ -0,0 +1,64 @@
+from django.test import TestCase
+
+from jobportal.models import Post, TimelineEntry
+from jobportal.timeline import fan_out_post, has_timeline
+from jobportal.views import get_feed_page
+
+from .helpers import connect, make_company, make_user
+
+
+def post_as(user, content='Hello'):
+    post = Post.objects.create(user=user, content=content)
+    fan_out_post(post)
+    return post
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+        self.carol = make_user('carol')
+
+    def test_own_post_keeps_global_feed(self):
+        for i in range(3):
+            Post.objects.create(user=self.carol, content=f'carol {i}')
+        post_as(self.alice)
+
+        self.assertFalse(has_timeline(self.alice))
+        posts, _ = get_feed_page(self.alice)
+        self.assertEqual(len(posts), 4)
+
+    def test_post_reaches_connections(self):
+        connect(self.alice, self.bob)
+        post = post_as(self.bob)
+
+        self.assertTrue(has_timeline(self.alice))
+        posts, _ = get_feed_page(self.alice)
+        self.assertEqual([p.id for p in posts], [post.id])
+
+    def test_new_connection_backfills_recent_posts(self):
+        old = post_as(self.bob, 'before we met')
+        with self.captureOnCommitCallbacks(execute=True):
+            connect(self.alice, self.bob)
+
+        self.assertTrue(TimelineEntry.objects.filter(owner=self.alice, post=old).exists())
+        posts, _ = get_feed_page(self.alice)
+        self.assertIn(old.id, [p.id for p in posts])
+
+    def test_following_a_company_shows_its_posts_right_away(self):
+        company = make_company()
+        company.user.userprofile.fanout_on_read = True
+        company.user.userprofile.save()
+        news = Post.objects.create(user=company.user, content='We are hiring')
+        connect(self.alice, self.bob)
+        post_as(self.bob)
+        self.client.force_login(self.alice)
+
+        def feed_ids():
+            return [p.id for p in get_feed_page(self.alice)[0]]
+
+        self.assertNotIn(news.id, feed_ids())
+        self.client.post(f'/company/{company.id}/follow/')
+        self.assertIn(news.id, feed_ids())
+        self.client.post(f'/company/{company.id}/follow/')
+        self.assertNotIn(news.id, feed_ids())
@@ -0,0 +1,65 @@
+from django.test import TestCase
+
+from jobportal.typeahead import PeopleIndex, people_index
+
+from .helpers import make_user
+
+
+class PeopleIndexTests(TestCase):
+    def setUp(self):
+        self.jose = make_user('jdoe', first_name='José', last_name='Doe')
+        self.jane = make_user('jane', first_name='Jane', last_name='Smith')
+        self.jane.userprofile.headline = 'Data engineer'
+        self.jane.userprofile.save()
+        self.index = PeopleIndex()
+
+    def ids(self, query, **kwargs):
+        return [row['id'] for row in self.index.search(query, **kwargs)]
+
+    def test_prefixes_of_every_word(self):
+        self.assertEqual(self.ids('jose d'), [self.jose.id])
+        self.assertEqual(set(self.ids('j')), {self.jose.id, self.jane.id})
+        self.assertEqual(self.ids('smi eng'), [self.jane.id])
+        self.assertEqual(self.ids('jane@exa'), [])
+        self.assertEqual(self.ids('jane@exa', match_email=True), [self.jane.id])
+        self.assertEqual(self.ids('j', exclude_id=self.jane.id), [self.jose.id])
+
+    def test_updates_replace_the_old_tokens(self):
+        self.index.build()
+        self.jane.last_name = 'Brown'
+        self.jane.save()
+        self.index.update_user(self.jane.id)
+
+        self.assertEqual(self.ids('smith'), [])
+        self.assertEqual(self.ids('brown'), [self.jane.id])
+
+        self.index.remove_user(self.jane.id)
+        self.assertEqual(self.ids('brown'), [])
+
+
+class TypeaheadEndpointTests(TestCase):
+    def test_share_users_follow_profile_changes(self):
+        people_index.build()
+        viewer = make_user('viewer')
+        with self.captureOnCommitCallbacks(execute=True):
+            friend = make_user('friend', first_name='Priya')
+        self.client.force_login(viewer)
+
+        users = self.client.get('/get-share-users/', {'q': 'pri'}).json()['users']
+        self.assertEqual([user['id'] for user in users], [friend.id])
+        self.assertEqual(self.client.get('/user-search/', {'q': 'viewer'}).json(), [])
+
+    def test_email_lookup_is_for_sharing_only(self):
+        people_index.build()
+        target = make_user('target', first_name='Quinn', email='secret.person@corp.test')
+        target.userprofile.delete()
+        people_index.update_user(target.id)
+        self.client.force_login(make_user('viewer'))
+
+        self.assertEqual(self.client.get('/user-search/', {'q': 'secret.person@corp'}).json(), [])
+        self.assertEqual(self.client.get('/user-search/', {'q': 'secret'}).json(), [])
+        [row] = self.client.get('/user-search/', {'q': 'quinn'}).json()
+        self.assertEqual(row['headline'], 'Job Seeker')
+
+        users = self.client.get('/get-share-users/', {'q': 'secret.person@corp'}).json()['users']
+        self.assertEqual([(user['id'], user['headline']) for user in users], [(target.id, 'User')])
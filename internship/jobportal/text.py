@@ -0,0 +1,39 @@
+"""
+Small text helpers shared by the matching and indexing code.
+"""
+
+import re
+
+# Keeps things like "c++", "c#", "node.js" and ".net" in one piece
+TOKEN_RE = re.compile(r"[a-z0-9+#.]*[a-z0-9+#]")
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'our', 'the', 'to', 'we', 'with', 'you',
+    'your', 'will', 'this', 'that',
+}
+
+MAX_TOKEN_LENGTH = 50
+
+
+def words(text):
+    """
+    Lowercased words of `text` in order, repeats kept, without stopwords.
+    "Python dev, Python/Django" -> ["python", "dev", "python", "django"]
+    """
+    if not text:
+        return []
+    result = []
+    for token in TOKEN_RE.findall(text.lower()):
+        token = token.lstrip('.')
+        if token and token not in STOPWORDS:
+            result.append(token[:MAX_TOKEN_LENGTH])
+    return result
+
+
+def tokenize(text):
+    """
+    Lowercased set of words in `text`, without stopwords.
+    "Senior Python/Django Developer" -> {"senior", "python", "django", "developer"}
+    """
+    return set(words(text))
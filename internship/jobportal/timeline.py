@@ -0,0 +1,150 @@
+"""
+Personal home timelines.
+
+Posts are pushed into their readers' timelines when they are written
+(fan-out-on-write), so reading a feed is one range scan on TimelineEntry.
+Authors with a very large audience (typically companies with many followers)
+are skipped at write time and flagged with UserProfile.fanout_on_read; their
+recent posts are pulled at read time and merged into the page instead.
+When two users connect, each one's recent posts are copied into the other's
+timeline (backfill_connection), so a new contact's feed is not empty.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .graph import connection_ids
+from .models import Company, ConnectionEdge, Post, TimelineEntry, UserProfile
+from .pagination import encode_cursor, keyset_page
+
+# Above this many readers a post is not copied into timelines
+FANOUT_LIMIT = getattr(settings, 'TIMELINE_FANOUT_LIMIT', 1000)
+
+# How long the list of fan-out-on-read authors a reader follows is cached
+PULL_AUTHORS_TTL = 300
+
+# Recent posts of a new connection copied into the reader's timeline
+BACKFILL_POSTS = getattr(settings, 'TIMELINE_BACKFILL_POSTS', 50)
+
+
+def get_audience_ids(author):
+    """
+    Everyone who should see `author`'s posts:
+    accepted connections (either direction) and, for employers, company followers.
+    """
+    audience = connection_ids(author.id)
+
+    company = Company.objects.filter(user=author).first()
+    if company:
+        audience.update(company.followers.values_list('id', flat=True))
+
+    audience.discard(author.id)
+    return audience
+
+
+def fan_out_post(post):
+    """
+    Pushes a freshly created post into the timelines of its author's audience.
+    Large audiences switch the author to fan-out-on-read instead.
+    """
+    author = post.user
+    audience = get_audience_ids(author)
+    on_read = len(audience) > FANOUT_LIMIT
+
+    if UserProfile.objects.filter(user=author).exclude(fanout_on_read=on_read).update(fanout_on_read=on_read):
+        # Readers' cached pull lists are now stale
+        forget_pull_authors(audience)
+
+    # The author always sees their own posts
+    owners = {author.id} if on_read else audience | {author.id}
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(owner_id=owner_id, post=post, created_at=post.created_at) for owner_id in owners],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def _pull_cache_key(user_id):
+    return f"timeline:pull_authors:{user_id}"
+
+
+def forget_pull_authors(user_ids):
+    """Drops the cached pull lists of `user_ids` (they followed, unfollowed or connected)."""
+    cache.delete_many([_pull_cache_key(user_id) for user_id in user_ids])
+
+
+def get_pull_author_ids(user):
+    """
+    Fan-out-on-read authors whose posts `user` should see
+    (followed companies and connections flagged with fanout_on_read).
+    """
+    key = _pull_cache_key(user.id)
+    author_ids = cache.get(key)
+    if author_ids is None:
+        author_ids = set(Company.objects.filter(
+            followers=user, user__userprofile__fanout_on_read=True
+        ).values_list('user_id', flat=True))
+        author_ids.update(ConnectionEdge.objects.filter(
+            user=user, friend__userprofile__fanout_on_read=True
+        ).values_list('friend_id', flat=True))
+        author_ids.discard(user.id)
+        cache.set(key, author_ids, PULL_AUTHORS_TTL)
+    return author_ids
+
+
+def backfill_connection(a, b):
+    """
+    Copies b's recent posts into a's timeline and a's into b's after they
+    connect. Fan-out-on-read authors are skipped, their posts are pulled anyway.
+    """
+    entries = []
+    for owner_id, author_id in ((a, b), (b, a)):
+        recent = Post.objects.filter(user_id=author_id).exclude(
+            user__userprofile__fanout_on_read=True
+        ).order_by('-created_at', '-id').values_list('id', 'created_at')[:BACKFILL_POSTS]
+        entries.extend(TimelineEntry(owner_id=owner_id, post_id=post_id, created_at=created_at) for post_id, created_at in recent)
+    TimelineEntry.objects.bulk_create(entries, batch_size=500, ignore_conflicts=True)
+    forget_pull_authors([a, b])
+
+
+def has_timeline(user):
+    """
+    False for readers with no network yet (they get the global feed instead).
+    Their own posts do not count: they are always copied into their timeline.
+    """
+    return (
+        TimelineEntry.objects.filter(owner=user).exclude(post__user=user).exists()
+        or bool(get_pull_author_ids(user))
+    )
+
+
+def get_timeline_page(user, cursor=None, page_size=10):
+    """
+    One page of `user`'s timeline, newest first. Returns (posts, next_cursor).
+    The cursor is the (created_at, post id) of the last post, the same shape
+    the global feed uses.
+    """
+    entries, _ = keyset_page(
+        TimelineEntry.objects.filter(owner=user),
+        ('-created_at', '-post_id'), cursor=cursor, page_size=page_size + 1,
+    )
+    candidates = [(entry.created_at, entry.post_id) for entry in entries]
+
+    # Merge step: recent posts from fan-out-on-read authors
+    pull_ids = get_pull_author_ids(user)
+    if pull_ids:
+        pulled, _ = keyset_page(
+            Post.objects.filter(user_id__in=pull_ids).only('id', 'created_at'),
+            ('-created_at', '-id'), cursor=cursor, page_size=page_size + 1,
+        )
+        candidates.extend((post.created_at, post.id) for post in pulled)
+
+    candidates = sorted(set(candidates), reverse=True)
+    page_keys = candidates[:page_size]
+    next_cursor = encode_cursor(page_keys[-1]) if len(candidates) > page_size else None
+
+    posts_by_id = Post.objects.select_related('user', 'user__userprofile').prefetch_related(
+        'comments__user__userprofile'
+    ).in_bulk([post_id for _, post_id in page_keys])
+    posts = [posts_by_id[post_id] for _, post_id in page_keys if post_id in posts_by_id]
+    return posts, next_cursor
@@ -0,0 +1,193 @@
+"""
+People typeahead.
+
+user_search_api and get_share_users answer every keystroke from a
+process-local prefix index instead of the database. The index is a sorted
+list of (token, user_id) pairs over normalized first/last names, usernames
+and headline words; a prefix lookup is a bisect plus a short scan.
+Email addresses sit in a separate sorted list that only get_share_users
+searches (match_email=True), so the people search cannot be used to look
+users up by email. Result rows (name, headline, picture URL) are precomputed.
+
+The index is built lazily on first use, kept current by the User and
+UserProfile signals in models.py, and rebuilt in the background every
+TYPEAHEAD_MAX_AGE seconds so changes saved by other worker processes show up.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection
+
+WORD_RE = re.compile(r"\w+")
+
+# Only the first words of a long headline are searchable
+MAX_HEADLINE_WORDS = 20
+
+
+def normalize(text):
+    """Lowercase, accents removed ("José" -> "jose")."""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def user_tokens(username, first_name, last_name, headline):
+    tokens = set(WORD_RE.findall(normalize(f"{username} {first_name} {last_name}")))
+    tokens.update(WORD_RE.findall(normalize(headline))[:MAX_HEADLINE_WORDS])
+    return tokens
+
+
+def build_row(user_id, username, first_name, last_name, profile_id, headline, picture):
+    return {
+        'id': user_id,
+        'username': username,
+        'name': f"{first_name} {last_name}",
+        'display_name': f"{first_name} {last_name}".strip() or username,
+        # The views fall back to their own default headline without a profile
+        'has_profile': profile_id is not None,
+        'headline': headline,
+        'image': default_storage.url(picture) if picture else None,
+    }
+
+
+class PeopleIndex:
+    FIELDS = ('id', 'username', 'first_name', 'last_name', 'email',
+              'userprofile__id', 'userprofile__headline', 'userprofile__profile_picture')
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._keys = []      # sorted (token, user_id)
+        self._tokens = {}    # user_id -> tokens
+        self._emails = []    # sorted (email, user_id)
+        self._email_of = {}  # user_id -> email
+        self._rows = {}      # user_id -> result row
+        self._built_at = None
+        self._rebuilding = False
+
+    def _load(self, users):
+        keys, tokens, emails, rows = [], {}, {}, {}
+        for user_id, username, first_name, last_name, email, profile_id, headline, picture in users.values_list(*self.FIELDS):
+            tokens[user_id] = user_tokens(username, first_name, last_name, headline)
+            if email:
+                emails[user_id] = normalize(email)
+            rows[user_id] = build_row(user_id, username, first_name, last_name, profile_id, headline, picture)
+            keys.extend((token, user_id) for token in tokens[user_id])
+        return keys, tokens, emails, rows
+
+    def build(self):
+        """Loads every user (one query) and swaps the new index in."""
+        keys, tokens, emails, rows = self._load(User.objects.order_by('id'))
+        keys.sort()
+        email_keys = sorted((email, user_id) for user_id, email in emails.items())
+        with self._lock:
+            self._keys, self._tokens, self._rows = keys, tokens, rows
+            self._emails, self._email_of = email_keys, emails
+            self._built_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        if self._built_at is None:
+            self.build()
+        elif time.monotonic() - self._built_at > self.max_age and not self._rebuilding:
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild_in_background, daemon=True, name="people typeahead").start()
+
+    def _rebuild_in_background(self):
+        try:
+            close_old_connections()
+            self.build()
+        finally:
+            self._rebuilding = False
+            connection.close()
+
+    def _discard(self, user_id):
+        for token in self._tokens.pop(user_id, ()):
+            i = bisect_left(self._keys, (token, user_id))
+            if i < len(self._keys) and self._keys[i] == (token, user_id):
+                del self._keys[i]
+        email = self._email_of.pop(user_id, None)
+        if email is not None:
+            i = bisect_left(self._emails, (email, user_id))
+            if i < len(self._emails) and self._emails[i] == (email, user_id):
+                del self._emails[i]
+        self._rows.pop(user_id, None)
+
+    def update_user(self, user_id):
+        """Re-reads one user. No-op until the index has been built."""
+        if self._built_at is None:
+            return
+        _, tokens, emails, rows = self._load(User.objects.filter(id=user_id))
+        with self._lock:
+            self._discard(user_id)
+            if user_id in rows:
+                self._tokens[user_id] = tokens[user_id]
+                self._rows[user_id] = rows[user_id]
+                for token in tokens[user_id]:
+                    insort(self._keys, (token, user_id))
+                if user_id in emails:
+                    self._email_of[user_id] = emails[user_id]
+                    insort(self._emails, (emails[user_id], user_id))
+
+    def remove_user(self, user_id):
+        if self._built_at is None:
+            return
+        with self._lock:
+            self._discard(user_id)
+
+    def search(self, query, limit=10, exclude_id=None, match_email=False):
+        """
+        Up to `limit` rows whose tokens start with every word of `query`,
+        in token order. An empty query returns the first users. With
+        `match_email`, users whose email address starts with the query
+        follow the name matches.
+        """
+        self._ensure_fresh()
+        query = normalize(query.strip())
+        words = WORD_RE.findall(query)
+
+        with self._lock:
+            if not words:
+                rows = (row for user_id, row in self._rows.items() if user_id != exclude_id)
+                return list(islice(rows, limit))
+
+            results, seen = [], {exclude_id}
+            # An email address is never a name; only the email list can match it
+            if '@' not in query:
+                # Scan the range of the longest word, check the others per user
+                anchor = max(words, key=len)
+                others = list(words)
+                others.remove(anchor)
+                for user_id in self._scan(self._keys, anchor, seen):
+                    tokens = self._tokens[user_id]
+                    if all(any(token.startswith(word) for token in tokens) for word in others):
+                        results.append(self._rows[user_id])
+                        if len(results) >= limit:
+                            return results
+
+            if match_email and ' ' not in query:
+                for user_id in self._scan(self._emails, query, seen):
+                    if len(results) >= limit:
+                        break
+                    results.append(self._rows[user_id])
+            return results
+
+    @staticmethod
+    def _scan(keys, prefix, seen):
+        """Ids of the users with a key starting with `prefix`, each once, skipping `seen`."""
+        i = bisect_left(keys, (prefix,))
+        while i < len(keys) and keys[i][0].startswith(prefix):
+            user_id = keys[i][1]
+            i += 1
+            if user_id not in seen:
+                seen.add(user_id)
+                yield user_id
+
+
+people_index = PeopleIndex(max_age=getattr(settings, 'TYPEAHEAD_MAX_AGE', 300))
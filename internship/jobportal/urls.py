@@ -14,6 +14,7 @@ urlpatterns = [
     
     # Main Pages
     path('', views.home, name='home'),
+    path('feed/', views.feed_page, name='feed_page'),
     path('search/', views.search_results, name='search_results'),
     path('find-jobs/', views.find_jobs, name='find_jobs'),
     path('job/<int:job_id>/kanban/', views.kanban_board, name='kanban_board'),
@@ -68,12 +69,17 @@ urlpatterns = [
     # Messaging
     path('messages/', views.messaging, name='messaging'),
     path('messages/<int:thread_id>/', views.messaging, name='message_thread'),
+    path('messages/<int:thread_id>/older/', views.message_history, name='message_history'),
+    path('messages/<int:thread_id>/read/', views.mark_thread_read_view, name='mark_thread_read'),
+    path('messages/unread/', views.unread_count, name='unread_count'),
+    path('events/', views.events_stream, name='events_stream'),
     path('send-message/<int:thread_id>/', views.send_message, name='send_message'),
     path('delete-message/<int:message_id>/', views.delete_message, name='delete_message'),
     
     # Posts (AJAX)
     path('like-post/<int:post_id>/', views.like_post, name='like_post'),
     path('add-comment/<int:post_id>/', views.add_comment, name='add_comment'),
+    path('impressions/', views.record_impressions, name='record_impressions'),
     path('share-post/<int:post_id>/', views.share_post, name='share_post'),
     path('get-share-users/', views.get_share_users, name='get_share_users'),
     path('create-post/', views.create_post, name='create_post'),
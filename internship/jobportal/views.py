@@ -1,16 +1,20 @@
 import json
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Count, Q, Sum
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Concat
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
+from django.core.paginator import Paginator
 from django.views.decorators.http import require_POST
 from django.utils import timezone
-from django.db.models import Max
-import re # Import regex to handle punctuation
+from datetime import timedelta
+from django.db import transaction
 import requests
 from urllib.parse import urlencode
 import os
@@ -20,9 +24,23 @@ import os
 from .models import (
     Job, Application, SavedJob, Company, 
     UserProfile, Experience, Education, Certification, Post,
-    ConnectionRequest, MessageThread, Message, PostComment, ProfileView, Connection
+    ConnectionRequest, ConnectionEdge, MessageThread, Message, PostComment, ProfileView, Connection,
+    JobViewDaily
 )
 
+from .pagination import keyset_page, InvalidCursor
+from .timeline import fan_out_post, forget_pull_authors, get_timeline_page, has_timeline
+from .counters import post_impressions, job_views
+from .typeahead import people_index
+from .search import MAX_CANDIDATES, search, in_rank_order, job_facets
+from .matching import APPLICANT_SORTS, attach_match_scores, rank_applications
+from .similar import similar_jobs as similar_jobs_for
+from .suggestions import suggestions_for
+from .graph import connection_count, connection_degrees
+from .inbox import inbox_page, mark_thread_read, send_to_many, unread_total
+from .realtime import event_stream
+from .stats import EMPTY_STATS, user_stats
+
 # 2. IMPORT FORMS
 from .forms import (
     UserRegistrationForm, UserLoginForm, CompanyRegistrationForm,
@@ -34,64 +52,12 @@ from .forms import (
 ############################
 # PROFILE MATCH HELPER FUNCTIONS
 ############################
-
-def split_skills(skill_text):
-    """
-    Splits a skill string by Commas (,) OR Newlines (Enter key).
-    This handles cases where you pasted a list or pressed Enter between skills.
-    """
-    if not skill_text:
-        return []
-    
-    # Regex Explanation:
-    # [,\n\r]+  -> Means "Split whenever you find a comma OR a new line"
-    skills = re.split(r'[,\n\r]+', skill_text)
-    
-    # Clean up each skill (remove extra spaces)
-    return [s.strip() for s in skills if s.strip()]
-
-def normalize_skill(skill):
-    """
-    Standardizes a skill for comparison:
-    - "Sketch." -> "sketch" (Removes dots)
-    - "Python"  -> "python" (Case insensitive)
-    - " C++ "   -> "c++"    (Removes spaces)
-    """
-    if not skill:
-        return ""
-    # Lowercase and remove trailing punctuation (. or ,)
-    return skill.strip().lower().rstrip('.,')
-
-def calculate_match_score(job_skills_text, candidate_skills_text):
-    """
-    Calculates the match percentage between two raw text fields.
-    """
-    # 1. Use the SMART SPLIT on both texts
-    job_list = split_skills(job_skills_text)
-    candidate_list = split_skills(candidate_skills_text)
-    
-    if not job_list:
-        return 0
-    
-    # 2. Normalize both lists (handling "Sketch." vs "Sketch")
-    job_set = {normalize_skill(s) for s in job_list}
-    candidate_set = {normalize_skill(s) for s in candidate_list}
-    
-    # Remove empty strings if any crept in
-    job_set.discard("")
-    candidate_set.discard("")
-
-    if not job_set:
-        return 0
-
-    # 3. Count Matches
-    matches = 0
-    for j_skill in job_set:
-        if j_skill in candidate_set:
-            matches += 1
-            
-    # Calculate Percentage
-    return int((matches / len(job_set)) * 100)
+# Skills are compared as canonical Skill ids, see skills.py
+from .skills import (
+    skill_match_score,
+    job_skill_ids, profile_skill_ids,
+    add_profile_skill, remove_profile_skill,
+)
 
 ############################
 # 0. ROLE-BASED HELPERS    #
@@ -341,13 +307,31 @@ def logout_view(request):
 # 2. MAIN PAGES & JOBS     #
 ############################
 
+FEED_PAGE_SIZE = getattr(settings, 'FEED_PAGE_SIZE', 10)
+
+def get_feed_page(user, cursor=None):
+    """
+    One page of the home feed, newest first.
+    Paginated by the (created_at, id) keyset so page N costs the same as page 1.
+    Users with a network read their personal timeline; everyone else gets
+    the global list of posts. Returns (posts, next_cursor).
+    """
+    if has_timeline(user):
+        return get_timeline_page(user, cursor=cursor, page_size=FEED_PAGE_SIZE)
+
+    posts = Post.objects.select_related('user', 'user__userprofile').prefetch_related(
+        'comments__user__userprofile'
+    )
+    return keyset_page(posts, ('-created_at', '-id'), cursor=cursor, page_size=FEED_PAGE_SIZE)
+
+
 @login_required(login_url='login')
 @candidate_only
 def home(request):
     jobs = Job.objects.all().order_by('-created_at')
     
-    # Fetch all posts from users and employers
-    posts = Post.objects.select_related('user').prefetch_related('likes', 'comments').order_by('-created_at')
+    # First page of posts is rendered server-side, the rest comes from feed_page()
+    posts, next_cursor = get_feed_page(request.user)
 
     # Search Logic
     query = request.GET.get('q')
@@ -369,90 +353,143 @@ def home(request):
         total_positions=Count('jobs') 
     ).order_by('-total_positions')[:5]
 
-    # Sidebar counts
-    applied_count = 0
-    saved_count = 0
-    if request.user.is_authenticated:
-        applied_count = Application.objects.filter(user=request.user).count()
-        saved_count = SavedJob.objects.filter(user=request.user).count()
+    # Sidebar counts (one cached query, see stats.py)
+    stats = user_stats(request.user.id) if request.user.is_authenticated else EMPTY_STATS
+
+    profile = getattr(request.user, 'userprofile', None)
+    candidate_skills = profile_skill_ids(profile) if profile else set()
+    jobs = attach_match_scores(jobs.select_related('company'), candidate_skills)
 
     context = {
         'jobs': jobs,
+        'show_match': bool(candidate_skills),
         'posts': posts,
+        'next_cursor': next_cursor,
         'top_companies': top_companies,
-        'applied_count': applied_count,
-        'saved_count': saved_count,
+        'stats': stats,
     }
     return render(request, 'jobportal/home.html', context)
 
 
+@login_required(login_url='login')
+@candidate_only
+def feed_page(request):
+    """
+    Infinite-scroll endpoint for the home feed.
+    ?cursor=<next_cursor> returns the following page as JSON,
+    add &format=html to get the rendered post cards instead
+    (the next cursor is then sent in the X-Next-Cursor header).
+    """
+    try:
+        posts, next_cursor = get_feed_page(request.user, request.GET.get('cursor'))
+    except InvalidCursor as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    if request.GET.get('format') == 'html':
+        html = render_to_string('jobportal/partials/post_list.html', {'posts': posts}, request=request)
+        response = HttpResponse(html)
+        response['X-Next-Cursor'] = next_cursor or ''
+        return response
+
+    post_list = []
+    for post in posts:
+        profile = getattr(post.user, 'userprofile', None)
+        post_list.append({
+            'id': post.id,
+            'user': {
+                'username': post.user.username,
+                'name': post.user.get_full_name() or post.user.username,
+                'headline': profile.headline if profile else None,
+                'profile_picture': profile.profile_picture.url if profile and profile.profile_picture else None,
+            },
+            'content': post.content,
+            'image': post.image.url if post.image else None,
+            'video': post.video.url if post.video else None,
+            'created_at': post.created_at.isoformat(),
+            'likes_count': post.likes_count,
+            'comments_count': post.comments_count,
+        })
+
+    return JsonResponse({'posts': post_list, 'next_cursor': next_cursor})
+
+
+SEARCH_PAGE_SIZE = getattr(settings, 'SEARCH_PAGE_SIZE', 10)
+
+# Job filters the facet links can set: GET parameter -> Job lookup
+SEARCH_JOB_FILTERS = {
+    'job_type': 'job_type',
+    'remote': 'is_remote',
+    'location': 'location',
+    'industry': 'company__industry',
+}
+
+
+def search_tab(ids, queryset, page_number):
+    """
+    One result tab: a page of ranked objects plus the (capped) match count.
+    Only the objects of the requested page are loaded.
+    """
+    page = Paginator(ids, SEARCH_PAGE_SIZE).get_page(page_number)
+    page.object_list = in_rank_order(queryset, list(page.object_list))
+    return {
+        'page': page,
+        'count': len(ids),
+        'capped': len(ids) >= MAX_CANDIDATES,
+    }
+
+
 def search_results(request):
     """Unified search across users, companies, and jobs"""
     query = request.GET.get('q', '').strip()
     search_type = request.GET.get('type', 'all')  # all, people, companies, jobs
-    
-    users_list = []
-    companies_list = []
-    jobs_list = []
-    
+    # 'All' shows the first page of every tab; a single tab can be paged
+    page_number = request.GET.get('page') if search_type != 'all' else 1
+
+    people = companies = jobs = None
+    job_facets_list = {}
+    job_filters = {}
+
     if query:
-        # Split query into words for better matching
-        query_words = query.split()
-        
-        # Search Users/People
+        # Ranked full-text search, see search.py
         if search_type in ['all', 'people']:
-            user_query = Q()
-            # Add individual word searches for flexible matching
-            for word in query_words:
-                user_query |= Q(username__icontains=word)
-                user_query |= Q(first_name__icontains=word)
-                user_query |= Q(last_name__icontains=word)
-                user_query |= Q(userprofile__headline__icontains=word)
-            # Also search for the full query as a phrase
-            user_query |= Q(username__icontains=query)
-            user_query |= Q(first_name__icontains=query)
-            user_query |= Q(last_name__icontains=query)
-            user_query |= Q(userprofile__headline__icontains=query)
-            
-            users_list = User.objects.filter(user_query).distinct()
-        
-        # Search Companies
+            people = search_tab(search('people', query), User.objects.select_related('userprofile'), page_number)
+            # 1st / 2nd / 3rd badges for the whole page in one search, see graph.py
+            degrees = connection_degrees(request.user, people['page'].object_list)
+            for person in people['page'].object_list:
+                person.connection_degree = degrees.get(person.id)
+
         if search_type in ['all', 'companies']:
-            company_query = Q()
-            for word in query_words:
-                company_query |= Q(company_name__icontains=word)
-                company_query |= Q(industry__icontains=word)
-                company_query |= Q(location__icontains=word)
-            company_query |= Q(company_name__icontains=query)
-            company_query |= Q(industry__icontains=query)
-            company_query |= Q(location__icontains=query)
-            
-            companies_list = Company.objects.filter(company_query).distinct()
-        
-        # Search Jobs
+            companies = search_tab(
+                search('companies', query), Company.objects.annotate(jobs_count=Count('jobs')), page_number
+            )
+
         if search_type in ['all', 'jobs']:
-            job_query = Q()
-            for word in query_words:
-                job_query |= Q(title__icontains=word)
-                job_query |= Q(description__icontains=word)
-                job_query |= Q(company__company_name__icontains=word)
-                job_query |= Q(location__icontains=word)
-                job_query |= Q(skills__icontains=word)
-            job_query |= Q(title__icontains=query)
-            job_query |= Q(description__icontains=query)
-            job_query |= Q(company__company_name__icontains=query)
-            job_query |= Q(location__icontains=query)
-            job_query |= Q(skills__icontains=query)
-            
-            jobs_list = Job.objects.filter(job_query).select_related('company').distinct().order_by('-created_at')
-    
+            job_ids = search('jobs', query)
+            job_facets_list = job_facets(job_ids)
+
+            lookups = {}
+            for param, lookup in SEARCH_JOB_FILTERS.items():
+                value = request.GET.get(param)
+                if value:
+                    job_filters[param] = value
+                    lookups[lookup] = (value == '1') if param == 'remote' else value
+            if lookups:
+                keep = set(Job.objects.filter(id__in=job_ids, **lookups).values_list('id', flat=True))
+                job_ids = [job_id for job_id in job_ids if job_id in keep]
+
+            jobs = search_tab(job_ids, Job.objects.select_related('company'), page_number)
+
+    tabs = [tab for tab in (people, companies, jobs) if tab]
     context = {
         'query': query,
         'search_type': search_type,
-        'users_list': users_list,
-        'companies_list': companies_list,
-        'jobs_list': jobs_list,
-        'total_results': len(users_list) + len(companies_list) + len(jobs_list),
+        'people': people,
+        'companies': companies,
+        'jobs': jobs,
+        'job_facets': job_facets_list,
+        'job_filters': job_filters,
+        'total_results': sum(tab['count'] for tab in tabs),
+        'total_capped': any(tab['capped'] for tab in tabs),
     }
     return render(request, 'jobportal/search_results.html', context)
 
@@ -478,39 +515,28 @@ def find_jobs(request):
     if request.GET.get('internship') == 'on':
         jobs = jobs.filter(job_type='Internship')
 
-    context = {'jobs': jobs}
-    return render(request, 'jobportal/find_jobs.html', context)
+    # Fit score for every listed job in one vectorized pass, see matching.py
+    sort = request.GET.get('sort', 'recent')
+    profile = getattr(request.user, 'userprofile', None)
+    candidate_skills = profile_skill_ids(profile) if profile else set()
+    jobs = attach_match_scores(jobs.select_related('company'), candidate_skills, sort_by_match=(sort == 'match'))
 
-# Put this function at the very top of views.py, outside of any class or function
-def calculate_match_score(job_skills, candidate_skills):
-    if not job_skills: 
-        return 0
-    
-    # Simple logic: check how many job skills the candidate has
-    matches = 0
-    # Assuming skills are strings. If they are objects, use skill.name
-    for skill in job_skills:
-        if skill in candidate_skills:
-            matches += 1
-            
-    score = (matches / len(job_skills)) * 100
-    return round(score)
+    context = {
+        'jobs': jobs,
+        'sort': sort,
+        'show_match': bool(candidate_skills),
+    }
+    return render(request, 'jobportal/find_jobs.html', context)
 
 # Add this new view function inside views.py
 
 def kanban_board(request, job_id):
     job = get_object_or_404(Job, id=job_id)
-    applicants = Application.objects.filter(job=job)
-
-    # 1. Calculate Match Score for each applicant
+    # 1. Match Score for every applicant in one vectorized pass, best match first (matching.py)
+    ranked_ids, scores = rank_applications(Application.objects.filter(job=job))
+    applicants = in_rank_order(Application.objects.select_related('user'), ranked_ids)
     for app in applicants:
-        c_text = ""
-        # Safely get candidate skills text
-        if hasattr(app.user, 'userprofile') and app.user.userprofile.skills:
-             c_text = app.user.userprofile.skills
-             
-        # Use the same smart calculator for the kanban board
-        app.match_score = calculate_match_score(job.skills or "", c_text)
+        app.match_score = scores[app.id]
 
     context = {
         'job': job,
@@ -526,96 +552,6 @@ from django.contrib.auth.decorators import login_required
 # Import your models here if not already imported
 # from .models import Job, Application, SavedJob
 
-# --- 1. Helper Function (Paste this ABOVE your view function) ---
-def calculate_match_score(job_skills, candidate_skills):
-    """
-    Calculates percentage match between job requirements and candidate skills.
-    Expects lists of strings.
-    """
-    if not job_skills:
-        return 0
-    
-    # Convert to sets for easy comparison
-    # Lowercase everything to ensure 'Python' matches 'python'
-    j_skills_set = {s.lower() for s in job_skills}
-    c_skills_set = {s.lower() for s in candidate_skills}
-    
-    # Count matches
-    match_count = 0
-    for skill in j_skills_set:
-        if skill in c_skills_set:
-            match_count += 1
-            
-    if len(j_skills_set) == 0:
-        return 0
-        
-    score = (match_count / len(j_skills_set)) * 100
-    return int(score)
-
-
-# --- 2. Updated View Function ---
-
-
-# --- 1. ROBUST MATCHING HELPER FUNCTION (UPDATED) ---
-def split_skills(skill_text):
-    """
-    The 'Better Solution':
-    Splits a skill string by Commas (,) OR Newlines (Enter key).
-    This handles cases where you pasted a list or pressed Enter between skills.
-    """
-    if not skill_text:
-        return []
-    
-    # Regex Explanation:
-    # [,\n\r]+  -> Means "Split whenever you find a comma OR a new line"
-    skills = re.split(r'[,\n\r]+', skill_text)
-    
-    # Clean up each skill (remove extra spaces)
-    return [s.strip() for s in skills if s.strip()]
-
-def normalize_skill(skill):
-    """
-    Standardizes a skill for comparison:
-    - "Sketch." -> "sketch" (Removes dots)
-    - "Python"  -> "python" (Case insensitive)
-    - " C++ "   -> "c++"    (Removes spaces)
-    """
-    if not skill:
-        return ""
-    # Lowercase and remove trailing punctuation (. or ,)
-    return skill.strip().lower().rstrip('.,')
-
-def calculate_match_score(job_skills_text, candidate_skills_text):
-    """
-    Calculates the match percentage between two raw text fields.
-    """
-    # 1. Use the SMART SPLIT on both texts
-    job_list = split_skills(job_skills_text)
-    candidate_list = split_skills(candidate_skills_text)
-    
-    if not job_list:
-        return 0
-    
-    # 2. Normalize both lists (handling "Sketch." vs "Sketch")
-    job_set = {normalize_skill(s) for s in job_list}
-    candidate_set = {normalize_skill(s) for s in candidate_list}
-    
-    # Remove empty strings if any crept in
-    job_set.discard("")
-    candidate_set.discard("")
-
-    if not job_set:
-        return 0
-
-    # 3. Count Matches
-    matches = 0
-    for j_skill in job_set:
-        if j_skill in candidate_set:
-            matches += 1
-            
-    # Calculate Percentage
-    return int((matches / len(job_set)) * 100)
-
 # ==========================================
 # 2. VIEWS
 # ==========================================
@@ -627,22 +563,15 @@ def job_detail_view(request, pk):
     # --- CALCULATE MATCH SCORE ---
     match_score = 0
     if request.user.is_authenticated and hasattr(request.user, 'userprofile'):
-        # Pass the raw text fields directly to our smart calculator
-        match_score = calculate_match_score(
-            job.skills, 
-            request.user.userprofile.skills
-        )
+        match_score = skill_match_score(job_skill_ids(job), profile_skill_ids(request.user.userprofile))
     # -----------------------------
 
-    # Track Views count
-    if not hasattr(job, 'views'):
-        job.views = 0
-    job.views += 1
-    job.save()
+    # Track Views count (buffered, flushed in bulk by counters.job_views)
+    job_views.add_view(job.id)
 
     has_applied = Application.objects.filter(user=request.user, job=job).exists()
     is_saved = SavedJob.objects.filter(user=request.user, job=job).exists()
-    similar_jobs = Job.objects.exclude(pk=pk).order_by('?')[:3]
+    similar_jobs = similar_jobs_for(job)  # precomputed neighbours, see similar.py
 
     if request.method == 'POST':
         if hasattr(request.user, 'company'):
@@ -698,16 +627,11 @@ def job_detail_view(request, pk):
 @login_required(login_url='login')
 def kanban_board(request, job_id):
     job = get_object_or_404(Job, id=job_id)
-    applicants = Application.objects.filter(job=job)
-    
+    # 1. Match Score for every applicant in one vectorized pass, best match first (matching.py)
+    ranked_ids, scores = rank_applications(Application.objects.filter(job=job))
+    applicants = in_rank_order(Application.objects.select_related('user'), ranked_ids)
     for app in applicants:
-        c_text = ""
-        # Safely get candidate skills text
-        if hasattr(app.user, 'userprofile') and app.user.userprofile.skills:
-             c_text = app.user.userprofile.skills
-             
-        # Use the same smart calculator for the company view
-        app.match_score = calculate_match_score(job.skills or "", c_text)
+        app.match_score = scores[app.id]
 
     context = {
         'job': job,
@@ -720,28 +644,18 @@ def kanban_board(request, job_id):
 def job_detail_view(request, pk):
     job = get_object_or_404(Job, pk=pk)
     
-    # Track Views
-    if not hasattr(job, 'views'):
-        job.views = 0
-    job.views += 1
-    job.save()
+    # Track Views (buffered, flushed in bulk by counters.job_views)
+    job_views.add_view(job.id)
 
     has_applied = Application.objects.filter(user=request.user, job=job).exists()
     is_saved = SavedJob.objects.filter(user=request.user, job=job).exists()
-    similar_jobs = Job.objects.exclude(pk=pk).order_by('?')[:3]
+    similar_jobs = similar_jobs_for(job)  # precomputed neighbours, see similar.py
 
     # --- START INNOVATION: AI Match Score Logic ---
     match_score = 0
     if request.user.is_authenticated and hasattr(request.user, 'userprofile'):
-        try:
-            # Use the text-based match score calculation
-            match_score = calculate_match_score(
-                job.skills or "",  # Job skills as text
-                request.user.userprofile.skills or ""  # User skills as text
-            )
-        except AttributeError:
-            # Handles cases where skills might not exist or be named differently
-            match_score = 0
+        # Compare canonical skill ids (JobSkill / ProfileSkill), see skills.py
+        match_score = skill_match_score(job_skill_ids(job), profile_skill_ids(request.user.userprofile))
     # --- END INNOVATION ---
 
     if request.method == 'POST':
@@ -820,11 +734,7 @@ def dashboard_view(request):
         'user': request.user,
         'recommended_jobs': recommended_jobs,
         'recent_applications': recent_applications,
-        'stats': {
-            'applied': Application.objects.filter(user=request.user).count(),
-            'saved': SavedJob.objects.filter(user=request.user).count(),
-            'interviews': Application.objects.filter(user=request.user, status='Interview').count(),
-        }
+        'stats': user_stats(request.user.id),
     }
     return render(request, 'jobportal/dashboard.html', context)
 
@@ -880,23 +790,13 @@ def profile_view(request, username=None):
         analytics['search_appearances'] = profile.search_appearances_count
 
     # --- 3. PEOPLE YOU MAY KNOW LOGIC ---
-    # Find users who are NOT the current user AND NOT already connected
+    # Friends of friends first (most mutual connections), then shared company / school
     suggested_people = []
     if request.user.is_authenticated:
-        # Get IDs of people user is already connected with (or sent request to)
-        connected_ids = ConnectionRequest.objects.filter(
-            Q(sender=request.user) | Q(receiver=request.user)
-        ).values_list('sender_id', 'receiver_id')
-        
-        # Flatten the list of IDs
-        exclude_ids = set()
-        for sender_id, receiver_id in connected_ids:
-            exclude_ids.add(sender_id)
-            exclude_ids.add(receiver_id)
-        exclude_ids.add(request.user.id)  # Exclude self
-
-        # Get 3 random profiles not in that list
-        suggested_people = UserProfile.objects.exclude(user__id__in=exclude_ids).order_by('?')[:3]
+        for person in suggestions_for(request.user, limit=3):
+            if hasattr(person, 'userprofile'):
+                person.userprofile.mutual_count = person.mutual_count
+                suggested_people.append(person.userprofile)
 
     # Parse skills into a list for template
     skills_list = []
@@ -912,6 +812,7 @@ def profile_view(request, username=None):
         'certifications': Certification.objects.filter(user=profile_user),
         'posts': Post.objects.filter(user=profile_user).order_by('-created_at'),
         'analytics': analytics,  # Pass analytics data
+        'connection_degree': None if is_own_profile else connection_degrees(request.user, [profile_user]).get(profile_user.id),
         'suggested_people': suggested_people,  # Pass suggestions
         'skills': skills_list,  # Pass parsed skills list
     }
@@ -940,15 +841,8 @@ def delete_skill(request):
             profile = request.user.userprofile
             
             if profile.skills and skill_to_delete:
-                # Split by comma and strip whitespace from each skill
-                skill_list = [s.strip() for s in profile.skills.split(',')]
-                
-                # Remove the skill if it exists (case-sensitive match)
-                if skill_to_delete in skill_list:
-                    skill_list.remove(skill_to_delete)
-                    # Join back and save
-                    profile.skills = ",".join(skill_list)
-                    profile.save()
+                # Deletes the ProfileSkill row (any spelling of the skill), see skills.py
+                if remove_profile_skill(profile, skill_to_delete):
                     messages.success(request, f"Skill '{skill_to_delete}' removed successfully!")
                 else:
                     messages.warning(request, f"Skill '{skill_to_delete}' not found.")
@@ -969,15 +863,8 @@ def add_skill(request):
             try:
                 profile = request.user.userprofile
                 
-                # Check if skill already exists
-                existing_skills = [s.strip() for s in profile.skills.split(',') if s.strip()] if profile.skills else []
-                
-                if skill_name not in existing_skills:
-                    if profile.skills:
-                        profile.skills += f",{skill_name}"
-                    else:
-                        profile.skills = skill_name
-                    profile.save()
+                # Adds a ProfileSkill row per new skill; False if it has them all (any spelling)
+                if add_profile_skill(profile, skill_name):
                     messages.success(request, f"Skill '{skill_name}' added successfully!")
                 else:
                     messages.warning(request, f"Skill '{skill_name}' already exists in your profile.")
@@ -1179,6 +1066,8 @@ def employer_register(request):
     })
 
 
+VIEW_TREND_DAYS = 14
+
 @login_required(login_url='employer_login')
 @employer_only
 def company_dashboard(request):
@@ -1191,7 +1080,23 @@ def company_dashboard(request):
     total_jobs = jobs.count()
     total_applicants = Application.objects.filter(job__company=company).count()
     profile_views = jobs.aggregate(total_views=Sum('views'))['total_views'] or 0
-    recent_posts = Post.objects.filter(user=request.user).prefetch_related('comments', 'likes').order_by('-created_at')[:5]
+
+    # Views per day over the last two weeks, read from the daily rollup table
+    today = timezone.localdate()
+    start = today - timedelta(days=VIEW_TREND_DAYS - 1)
+    daily = dict(
+        JobViewDaily.objects.filter(job__company=company, date__gte=start)
+        .values('date').annotate(total=Sum('views')).values_list('date', 'total')
+    )
+    view_trend = [
+        {'date': day, 'views': daily.get(day, 0)}
+        for day in (start + timedelta(days=i) for i in range(VIEW_TREND_DAYS))
+    ]
+    trend_max = max([point['views'] for point in view_trend] + [1])
+    for point in view_trend:
+        point['height'] = int(point['views'] * 100 / trend_max)
+
+    recent_posts = Post.objects.filter(user=request.user).order_by('-created_at')[:5]
 
     context = {
         'company': company,
@@ -1199,6 +1104,7 @@ def company_dashboard(request):
         'total_jobs': total_jobs,
         'total_applicants': total_applicants,
         'profile_views': profile_views,
+        'view_trend': view_trend,
         'recent_posts': recent_posts,
     }
     return render(request, 'companies/company_dashboard.html', context)
@@ -1217,7 +1123,9 @@ def post_job(request):
         if form.is_valid():
             job = form.save(commit=False)
             job.company = company
-            job.save()
+            # The post_save signal queues the alert emails; commit both together
+            with transaction.atomic():
+                job.save()
             messages.success(request, "Job posted successfully!")
             return redirect('company_dashboard')
     else:
@@ -1333,6 +1241,9 @@ def follow_company(request, pk):
         # Follow
         company.followers.add(request.user)
         is_now_following = True
+
+    # The feed pulls followed companies' posts from a cached list
+    forget_pull_authors([request.user.id])
     
     # Return JSON response for AJAX
     return JsonResponse({
@@ -1342,6 +1253,9 @@ def follow_company(request, pk):
     })
 
 
+APPLICANTS_PAGE_SIZE = getattr(settings, 'APPLICANTS_PAGE_SIZE', 25)
+
+
 @login_required(login_url='employer_login') 
 @employer_only
 def employer_applicants_view(request):
@@ -1351,15 +1265,47 @@ def employer_applicants_view(request):
     
     company = request.user.company
 
-    # 2. Fetch Applications
+    # 2. Filters (all optional): ?job_id= &sort= &min_score= &min_experience= &commute=
+    applications = Application.objects.filter(job__company=company)
+    filters = {}
+    if request.GET.get('job_id', '').isdigit():
+        filters['job_id'] = int(request.GET['job_id'])
+        applications = applications.filter(job_id=filters['job_id'])
+    sort = request.GET.get('sort')
+    if sort not in APPLICANT_SORTS:
+        sort = 'match'
+    for param in ('min_score', 'min_experience'):
+        try:
+            filters[param] = float(request.GET[param])
+        except (KeyError, ValueError):
+            pass
+    if request.GET.get('commute') in ('Yes', 'No'):
+        filters['commute'] = request.GET['commute']
+
+    # 3. Score, filter and sort every applicant at once (matching.py), then load one page
+    ranked_ids, scores = rank_applications(
+        applications, sort,
+        min_score=filters.get('min_score'),
+        min_experience=filters.get('min_experience'),
+        commute=filters.get('commute'),
+    )
+    page = Paginator(ranked_ids, APPLICANTS_PAGE_SIZE).get_page(request.GET.get('page'))
     # FIXED: Changed 'user__profile' to 'user__userprofile'
-    applications = Application.objects.filter(
-        job__company=company
-    ).select_related('user', 'job', 'user__userprofile').order_by('-applied_at')
+    page.object_list = in_rank_order(
+        Application.objects.select_related('user', 'job', 'user__userprofile'), list(page.object_list)
+    )
+    for app in page.object_list:
+        app.match_score = scores[app.id]
 
     context = {
         'company': company,
-        'applications': applications
+        'applications': page.object_list,
+        'page': page,
+        'total_count': len(scores),
+        'filtered_count': len(ranked_ids),
+        'jobs': company.jobs.order_by('-created_at').only('id', 'title'),
+        'sort': sort,
+        'filters': filters,
     }
     
     return render(request, 'companies/employer_applicants.html', context)
@@ -1374,11 +1320,13 @@ def update_application_status(request, application_id):
             messages.error(request, "Permission denied.")
             return redirect('employer_applicants')
 
-        new_status = request.POST.get('status')
-        if new_status in ['Accepted', 'Rejected', 'Interview']:
+        # Older forms post 'Accepted' / 'Interview' / 'Rejected'
+        new_status = request.POST.get('status', '').lower()
+        new_status = {'accepted': 'selected'}.get(new_status, new_status)
+        if new_status in ['interview', 'selected', 'rejected']:
             application.status = new_status
             application.save()
-            messages.success(request, f"Applicant status updated to {new_status}")
+            messages.success(request, f"Applicant status updated to {application.get_status_display()}")
     return redirect('employer_applicants')
 
 
@@ -1389,10 +1337,8 @@ def update_application_status(request, application_id):
 def network_page(request):
     user = request.user
     
-    # 1. FIX: COUNT CONNECTIONS FROM ConnectionRequest
-    connections_count = ConnectionRequest.objects.filter(
-        (Q(sender=user) | Q(receiver=user)) & Q(status='accepted')
-    ).count()
+    # 1. COUNT CONNECTIONS (one index lookup on the edge table)
+    connections_count = connection_count(user.id)
 
     # 2. CALCULATE INVITATIONS (Received & Pending)
     received_requests = ConnectionRequest.objects.filter(
@@ -1411,7 +1357,7 @@ def network_page(request):
     )
 
     # 5. SUGGESTIONS (People you may know)
-    suggestions = User.objects.exclude(id=user.id).order_by('?')[:4]
+    suggestions = suggestions_for(user, limit=4)
 
     context = {
         'connections_count': connections_count,
@@ -1435,46 +1381,46 @@ def following_list(request):
     return render(request, 'jobportal/following_list.html', context)
 
 
+CONNECTIONS_PAGE_SIZE = getattr(settings, 'CONNECTIONS_PAGE_SIZE', 50)
+
+# ?sort= value -> keyset ordering on ConnectionEdge (each has a matching index)
+CONNECTION_SORTS = {
+    '-timestamp': ('-created_at', '-id'),
+    'first_name': ('friend_first_name', 'friend_id'),
+    'last_name': ('friend_last_name', 'friend_id'),
+}
+
 @login_required
 def connections_list_view(request):
     """Display all user's connections with search and sort options"""
     query = request.GET.get('name', '').strip()
     sort_by = request.GET.get('sort', '-timestamp')
-    
-    # Get all accepted connections
-    connections_qs = ConnectionRequest.objects.filter(
-        Q(sender=request.user) | Q(receiver=request.user),
-        status='accepted'
-    ).select_related('sender', 'receiver', 'sender__userprofile', 'receiver__userprofile').order_by('-timestamp')
-    
-    # Build user list with their connection info
-    user_list = []
-    for conn in connections_qs:
-        other_user = conn.receiver if conn.sender == request.user else conn.sender
-        
-        # Apply search filter
-        if query and query.lower() not in other_user.get_full_name().lower():
-            continue
-            
-        user_list.append({
-            'user': other_user,
-            'connected_at': conn.timestamp,
-            'connection_id': conn.id
-        })
-    
-    # Apply sorting
-    if 'first_name' in sort_by:
-        user_list.sort(key=lambda x: x['user'].first_name)
-    elif 'last_name' in sort_by:
-        user_list.sort(key=lambda x: x['user'].last_name)
-    else:
-        user_list.sort(key=lambda x: x['connected_at'], reverse=True)
+    if sort_by not in CONNECTION_SORTS:
+        sort_by = '-timestamp'
+
+    # Search, sort and paging all happen in the query, on the user's edges only
+    edges = ConnectionEdge.objects.filter(user=request.user)
+    if query:
+        edges = edges.annotate(
+            full_name=Concat('friend_first_name', Value(' '), 'friend_last_name')
+        ).filter(full_name__icontains=query)
+
+    try:
+        page, next_cursor = keyset_page(
+            edges.select_related('friend__userprofile'), CONNECTION_SORTS[sort_by],
+            cursor=request.GET.get('cursor'), page_size=CONNECTIONS_PAGE_SIZE,
+        )
+    except InvalidCursor:
+        return redirect(f"{request.path}?{urlencode({'name': query, 'sort': sort_by})}")
+
+    user_list = [{'user': edge.friend, 'connected_at': edge.created_at} for edge in page]
 
     return render(request, 'jobportal/connections_list.html', {
         'connections': user_list,
-        'count': len(user_list),
+        'count': edges.count(),
         'query': query,
-        'sort_by': sort_by
+        'sort_by': sort_by,
+        'next_cursor': next_cursor,
     })
 
 @login_required
@@ -1486,9 +1432,11 @@ def send_request(request, user_id):
 
 @login_required
 def accept_request(request, request_id):
-    req = get_object_or_404(ConnectionRequest, id=request_id, receiver=request.user)
-    req.status = 'accepted'
-    req.save()
+    # The request and its ConnectionEdge rows are saved together
+    with transaction.atomic():
+        req = get_object_or_404(ConnectionRequest, id=request_id, receiver=request.user)
+        req.status = 'accepted'
+        req.save()
     return redirect('network')
 
 @login_required
@@ -1500,47 +1448,134 @@ def ignore_request(request, request_id):
 
 @login_required
 def withdraw_request(request, request_id):
-    req = get_object_or_404(ConnectionRequest, id=request_id, sender=request.user)
-    req.delete()
+    with transaction.atomic():
+        req = get_object_or_404(ConnectionRequest, id=request_id, sender=request.user)
+        req.delete()
     return redirect('network')
 
 @login_required
 def user_search_api(request):
     query = request.GET.get('q', '')
-    users = User.objects.filter(Q(first_name__icontains=query) | Q(last_name__icontains=query)).exclude(id=request.user.id)[:5]
+    # Answered from the in-memory prefix index, see typeahead.py
     results = []
-    for user in users:
-        img_url = user.userprofile.profile_picture.url if hasattr(user, 'userprofile') and user.userprofile.profile_picture else None
-        headline = user.userprofile.headline if hasattr(user, 'userprofile') else "Job Seeker"
-        results.append({'id': user.id, 'name': f"{user.first_name} {user.last_name}", 'headline': headline, 'image': img_url})
+    for row in people_index.search(query, limit=5, exclude_id=request.user.id):
+        headline = row['headline'] if row['has_profile'] else "Job Seeker"
+        results.append({'id': row['id'], 'name': row['name'], 'headline': headline, 'image': row['image']})
     return JsonResponse(results, safe=False)
 
 
+MESSAGE_PAGE_SIZE = getattr(settings, 'MESSAGE_PAGE_SIZE', 30)
+
+
+def get_message_page(thread, cursor=None):
+    """
+    One page of a thread's messages going back in time, from `cursor` (or
+    the newest message), as (messages oldest first, cursor for the page
+    before it or None).
+    """
+    messages_qs = Message.objects.filter(thread=thread).select_related(
+        'sender__userprofile', 'post__user__userprofile'
+    )
+    page, older_cursor = keyset_page(messages_qs, ('-timestamp', '-id'), cursor=cursor, page_size=MESSAGE_PAGE_SIZE)
+    page.reverse()
+    return page, older_cursor
+
+
 @login_required
 def messaging(request, thread_id=None):
     user = request.user
     
-    threads = MessageThread.objects.filter(participants=user).annotate(
-        last_msg_time=Max('messages__timestamp')
-    ).order_by('-last_msg_time')
+    # One page of the materialized inbox (ThreadMembership rows, see inbox.py)
+    try:
+        inbox, next_cursor = inbox_page(user, request.GET.get('cursor'))
+    except InvalidCursor:
+        inbox, next_cursor = inbox_page(user)
     
     active_thread = None
     chat_messages = [] 
+    older_cursor = None
 
     if thread_id:
         active_thread = get_object_or_404(MessageThread, id=thread_id, participants=user)
-        chat_messages = Message.objects.filter(thread=active_thread).order_by('timestamp')
-    elif threads.exists():
-        active_thread = threads.first()
-        chat_messages = Message.objects.filter(thread=active_thread).order_by('timestamp')
+    elif inbox:
+        active_thread = inbox[0].thread
+    if active_thread:
+        # Opening a thread reads it: one UPDATE for all of its unread messages
+        mark_thread_read(active_thread.id, user.id)
+        for item in inbox:
+            if item.thread_id == active_thread.id:
+                item.unread_count = 0
+        # Only the newest page; "Load older messages" fetches the rest
+        chat_messages, older_cursor = get_message_page(active_thread)
 
     context = {
-        'threads': threads,
+        'inbox': inbox,
+        'next_cursor': next_cursor,
         'active_thread': active_thread,
         'chat_messages': chat_messages, 
+        'older_cursor': older_cursor,
     }
     return render(request, 'jobportal/messaging.html', context)
 
+@login_required
+def message_history(request, thread_id):
+    """
+    Older messages of a thread.
+    ?cursor=<older_cursor> returns the page before it as JSON (oldest first),
+    add &format=html to get the rendered message bubbles instead
+    (the next cursor is then sent in the X-Next-Cursor header).
+    """
+    thread = get_object_or_404(MessageThread, id=thread_id, participants=request.user)
+    try:
+        chat_messages, older_cursor = get_message_page(thread, request.GET.get('cursor'))
+    except InvalidCursor as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    if request.GET.get('format') == 'html':
+        html = render_to_string('jobportal/partials/message_list.html', {'chat_messages': chat_messages}, request=request)
+        response = HttpResponse(html)
+        response['X-Next-Cursor'] = older_cursor or ''
+        return response
+
+    message_list = [{
+        'id': msg.id,
+        'sender': msg.sender.username,
+        'is_mine': msg.sender_id == request.user.id,
+        'body': msg.body,
+        'image': msg.image.url if msg.image else None,
+        'post_id': msg.post_id,
+        'timestamp': msg.timestamp.isoformat(),
+        'is_read': msg.is_read,
+    } for msg in chat_messages]
+    return JsonResponse({'messages': message_list, 'next_cursor': older_cursor})
+
+@login_required
+@require_POST
+def mark_thread_read_view(request, thread_id):
+    """Marks the thread read, e.g. when a live message arrives in the open conversation."""
+    thread = get_object_or_404(MessageThread, id=thread_id, participants=request.user)
+    marked = mark_thread_read(thread.id, request.user.id)
+    return JsonResponse({'status': 'ok', 'marked': marked, 'unread': unread_total(request.user.id)})
+
+@login_required
+def unread_count(request):
+    """Unread messages over all conversations, for the navbar badge (cached, see inbox.py)."""
+    return JsonResponse({'unread': unread_total(request.user.id)})
+
+@login_required
+async def events_stream(request):
+    """
+    Server-sent events for the logged-in user: new and deleted messages
+    with unread counts, see realtime.py. Needs the ASGI server
+    (internship/asgi.py); one idle stream is a waiting coroutine, not a thread.
+    """
+    user = await request.auser()
+    response = StreamingHttpResponse(event_stream(user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 @login_required
 def send_message(request, thread_id):
     if request.method == 'POST':
@@ -1575,13 +1610,32 @@ def delete_message(request, message_id):
 @login_required
 def like_post(request, post_id):
     post = get_object_or_404(Post, id=post_id)
-    if post.likes.filter(id=request.user.id).exists():
-        post.likes.remove(request.user)
-        is_liked = False
-    else:
-        post.likes.add(request.user)
-        is_liked = True
-    return JsonResponse({'likes_count': post.total_likes, 'is_liked': is_liked})
+    is_liked = post.toggle_like(request.user)
+    likes_count = Post.objects.filter(id=post.id).values_list('likes_count', flat=True).first() or 0
+    return JsonResponse({'likes_count': likes_count, 'is_liked': is_liked})
+
+# A single feed screen never shows more than this many posts
+MAX_IMPRESSIONS_PER_REQUEST = 100
+
+@login_required
+@require_POST
+def record_impressions(request):
+    """
+    Batch impression beacon from the feed: {"post_ids": [1, 2, 3]}.
+    Counts are buffered in memory and written in bulk by post_impressions.
+    """
+    try:
+        data = json.loads(request.body)
+        post_ids = data.get('post_ids', [])
+        if not isinstance(post_ids, list):
+            raise ValueError
+        # One impression per post and request, however often an id is repeated
+        post_ids = list({int(pid) for pid in post_ids[:MAX_IMPRESSIONS_PER_REQUEST]})
+    except (json.JSONDecodeError, ValueError, TypeError, AttributeError):
+        return JsonResponse({'status': 'error', 'message': 'Invalid JSON'}, status=400)
+
+    post_impressions.add(post_ids)
+    return JsonResponse({'status': 'success', 'recorded': len(post_ids)})
 
 @login_required
 @require_POST
@@ -1591,7 +1645,9 @@ def add_comment(request, post_id):
         data = json.loads(request.body)
         text = data.get('text', '').strip()
         if text:
-            comment = PostComment.objects.create(post=post, user=request.user, text=text)
+            # comments_count is bumped by the PostComment post_save signal in the same transaction
+            with transaction.atomic():
+                comment = PostComment.objects.create(post=post, user=request.user, text=text)
             return JsonResponse({'status': 'success', 'user': f"{request.user.first_name} {request.user.last_name}", 'text': comment.text, 'date': 'Just now'})
         return JsonResponse({'status': 'error', 'message': 'Empty comment'}, status=400)
     except json.JSONDecodeError:
@@ -1605,6 +1661,8 @@ def create_post(request):
             post = form.save(commit=False)
             post.user = request.user
             post.save()
+            # Push the post into connections' and followers' home timelines
+            fan_out_post(post)
             messages.success(request, "Post created successfully!")
         else:
             messages.error(request, "Error creating post.")
@@ -1643,35 +1701,11 @@ def share_post(request, post_id):
         if not user_ids:
             return JsonResponse({'status': 'error', 'message': 'Please select at least one user to share with'}, status=400)
         
-        # Get the recipient users
-        recipients = User.objects.filter(id__in=user_ids)
-        shared_with_count = 0
-        
-        for recipient in recipients:
-            # Find or create a thread between these two users
-            # First, look for an existing thread with both users
-            existing_threads = MessageThread.objects.filter(
-                participants=request.user
-            ).filter(
-                participants=recipient
-            )
-            
-            if existing_threads.exists():
-                thread = existing_threads.first()
-            else:
-                # Create a new thread
-                thread = MessageThread.objects.create()
-                thread.participants.add(request.user, recipient)
-            
-            # Create a message with the shared post
-            Message.objects.create(
-                thread=thread,
-                sender=request.user,
-                post=post,
-                body="Shared a post with you"
-            )
-            
-            shared_with_count += 1
+        # Resolve (or create) every one-to-one thread and insert all the
+        # messages in bulk, see inbox.send_to_many
+        recipient_ids = list(User.objects.filter(id__in=user_ids).exclude(id=request.user.id).values_list('id', flat=True))
+        shared = send_to_many(request.user, recipient_ids, post=post, body="Shared a post with you")
+        shared_with_count = len(shared)
         
         return JsonResponse({
             'status': 'success', 
@@ -1687,26 +1721,16 @@ def get_share_users(request):
     """Get list of users to share post with (connections/network)"""
     search = request.GET.get('q', '').strip()
     
-    # Get all users except the current user
-    users = User.objects.exclude(id=request.user.id).select_related('userprofile')
-    
-    if search:
-        users = users.filter(
-            Q(first_name__icontains=search) |
-            Q(last_name__icontains=search) |
-            Q(email__icontains=search)
-        )
-    
-    users = users[:10]  # Limit to 10 results
-    
+    # Answered from the in-memory prefix index, see typeahead.py
     user_list = []
-    for user in users:
+    # Sharing also finds people by email address
+    for row in people_index.search(search, limit=10, exclude_id=request.user.id, match_email=True):
         user_list.append({
-            'id': user.id,
-            'name': user.get_full_name() or user.username,
-            'username': user.username,
-            'headline': getattr(user.userprofile, 'headline', 'User') if hasattr(user, 'userprofile') else 'User',
-            'profile_picture': user.userprofile.profile_picture.url if hasattr(user, 'userprofile') and user.userprofile.profile_picture else None,
+            'id': row['id'],
+            'name': row['display_name'],
+            'username': row['username'],
+            'headline': row['headline'] if row['has_profile'] else 'User',
+            'profile_picture': row['image'],
         })
     
     return JsonResponse({'users': user_list})